@@ -0,0 +1,231 @@
+import asyncio
+import json
+import time
+import urllib.parse
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie, CookieError
+
+from utils import BASE_API_URL, DEV_USERNAME, DEV_COMPANY, is_mapping_version
+
+''' Asyncio API client mirroring the blocking *_via_api helpers '''
+
+# aiohttp is only needed here (run_tests.py seed/unseed), the rest of the harness runs without it...
+AIOHTTP_MISSING = "The async API client (run_tests.py seed/unseed) needs aiohttp, install it with: pip install aiohttp"
+
+def _aiohttp():
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError(AIOHTTP_MISSING) from e
+    return aiohttp
+
+class AsyncResponse:
+    """Minimal requests.Response look-alike so assertions written for the helpers keep working."""
+
+    def __init__(self, method, url, status_code, headers, content, elapsed):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed # seconds, from send to fully read body
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+class AsyncSession:
+    """
+    Cookie state for one client, the async counterpart of a requests.Session.
+    Cookies are kept as a plain name -> value dict and the Cookie header is built by
+    hand for every request (like update_company_via_api does), which is what makes
+    per-request overrides and omissions possible.
+    """
+
+    def __init__(self, cookies=None):
+        self.cookies = dict(cookies or {})
+
+    def cookie_header(self, override_cookies_in_header=None, omit_cookies_from_header=None):
+        omit = omit_cookies_from_header or []
+        override = override_cookies_in_header or {}
+        parts = [f"{name}={value}" for name, value in self.cookies.items() if name not in omit and name not in override]
+        parts.extend(f"{name}={value}" for name, value in override.items())
+        return "; ".join(parts)
+
+    def update_from_headers(self, headers):
+        """Applies every Set-Cookie header of a response, dropping cookies the server expired."""
+        for raw in headers.getall("Set-Cookie", []):
+            parsed = SimpleCookie()
+            try:
+                parsed.load(raw)
+            except CookieError:
+                continue
+            for name, morsel in parsed.items():
+                if _is_expired(morsel) or morsel.value == "":
+                    self.cookies.pop(name, None)
+                else:
+                    self.cookies[name] = morsel.value
+
+def _is_expired(morsel):
+    if morsel["max-age"]:
+        try:
+            return int(morsel["max-age"]) <= 0
+        except ValueError:
+            return False
+    if morsel["expires"]:
+        try:
+            return parsedate_to_datetime(morsel["expires"]) <= datetime.now(timezone.utc)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class AsyncApiClient:
+    """
+    Shares one aiohttp connection pool across any number of AsyncSessions so a single
+    process can keep hundreds of requests in flight against /v1/users and /v1/sessions.
+
+        async with AsyncApiClient() as client:
+            session = await client.login()
+            responses = await asyncio.gather(*(client.get_current_driver(session) for _ in range(200)))
+    """
+
+    def __init__(self, base_url=None, max_connections=500, timeout=30):
+        self.base_url = base_url or BASE_API_URL
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._http = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        if self._http is None:
+            aiohttp = _aiohttp()
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ssl=False, keepalive_timeout=30)
+            self._http = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=aiohttp.DummyCookieJar(), # cookies are tracked per AsyncSession instead
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    async def request(self, session, method, path, json_body=None,
+                      override_cookies_in_header=None, omit_cookies_from_header=None, headers=None):
+        """Sends one request with the session's cookies and folds any Set-Cookie headers back into it."""
+        url = f"{self.base_url}{path}"
+        headers_to_send = dict(headers or {})
+        cookie_header = session.cookie_header(override_cookies_in_header, omit_cookies_from_header)
+        if cookie_header:
+            headers_to_send["Cookie"] = cookie_header
+
+        start = time.perf_counter()
+        async with self._http.request(method, url, json=json_body, headers=headers_to_send, allow_redirects=False) as response:
+            content = await response.read()
+            elapsed = time.perf_counter() - start
+            session.update_from_headers(response.headers)
+            return AsyncResponse(method, url, response.status, response.headers, content, elapsed)
+
+    # --- SESSIONS ---
+
+    async def login(self, username=DEV_USERNAME, company=DEV_COMPANY):
+        """Dev-login, returns an authenticated AsyncSession or None (same contract as get_authenticated_session)."""
+        session = AsyncSession()
+        response = await self.request(session, "GET", f"/sessions/dev-login?username={username}&company={company}")
+        if response.status_code in [302, 303, 307, 308]:
+            if not session.cookies.get("access_token"):
+                raise Exception("Access token missing from dev login cookies.")
+            return session
+        return None
+
+    async def get_current_driver(self, session):
+        """GET /v1/sessions/me"""
+        return await self.request(session, "GET", "/sessions/me")
+
+    async def return_session(self, session, session_id):
+        """POST /v1/sessions/return/{userId}"""
+        return await self.request(session, "POST", f"/sessions/return/{session_id}")
+
+    async def post_credentials(self, session):
+        """POST /v1/sessions/me"""
+        return await self.request(session, "POST", "/sessions/me")
+
+    async def get_mappings(self, session, etag=None):
+        """GET /v1/sessions/mappings, conditionally when an ETag is given."""
+        headers = {"If-None-Match": etag} if etag else None
+        return await self.request(session, "GET", "/sessions/mappings", headers=headers)
+
+    async def mapping_keys(self, session):
+        """
+        (company keys, module keys) behind the session's mapping cookies, async counterpart of
+        datagen.mappings_from_session: JSON cookies are read as is, versions are resolved
+        through GET /sessions/mappings.
+        """
+        companies, modules = (urllib.parse.unquote(session.cookies.get(name) or "") for name in ("company_mapping", "module_mapping"))
+        if is_mapping_version(companies) or is_mapping_version(modules):
+            response = await self.get_mappings(session)
+            if response.status_code != 200:
+                raise Exception(f"Could not resolve the mapping cookies: {response.status_code}")
+            body = response.json()
+            return tuple(body["companies"]), tuple(body["modules"])
+        return tuple(json.loads(companies or "{}")), tuple(json.loads(modules or "{}"))
+
+    async def logout_with_id(self, session, session_id, session_body=None):
+        """POST /v1/sessions/logout/{userId}"""
+        body = session_body if session_body is not None else {}
+        return await self.request(session, "POST", f"/sessions/logout/{session_id}", json_body=body)
+
+    async def logout(self, session):
+        """POST /v1/sessions/logout"""
+        return await self.request(session, "POST", "/sessions/logout")
+
+    # --- USERS ---
+
+    async def create_user(self, session, user_data):
+        """POST /v1/users"""
+        return await self.request(session, "POST", "/users", json_body=user_data)
+
+    async def get_user(self, session, username):
+        """GET /v1/users/{username}"""
+        return await self.request(session, "GET", f"/users/{username}")
+
+    async def update_user(self, session, prev_username, new_user_data):
+        """PUT /v1/users/{prevUsername}"""
+        return await self.request(session, "PUT", f"/users/{prev_username}", json_body=new_user_data)
+
+    async def delete_user(self, session, username):
+        """DELETE /v1/users/{username}"""
+        return await self.request(session, "DELETE", f"/users/{username}")
+
+    # --- COMPANIES ---
+
+    async def update_company(self, session, new_company_name,
+                             override_cookies_in_header=None, # dict: {'cookie_name': 'value'} for specific cookies
+                             omit_cookies_from_header=None):  # list: ['cookie_name1', 'cookie_name2'] to exclude
+        """PUT /v1/companies/{newName}"""
+        return await self.request(
+            session, "PUT", f"/companies/{new_company_name}",
+            override_cookies_in_header=override_cookies_in_header,
+            omit_cookies_from_header=omit_cookies_from_header
+        )
+
+async def gather_limited(coroutines, limit):
+    """Awaits coroutines with at most `limit` of them in flight at once, results in input order."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(_bounded(c) for c in coroutines), return_exceptions=True)
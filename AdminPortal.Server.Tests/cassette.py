@@ -0,0 +1,181 @@
+import io
+import json
+import mmap
+import struct
+import threading
+import uuid
+from http.client import HTTPMessage
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.response import HTTPResponse
+
+''' Record/replay of API traffic at the shared transport level (see utils.KeepAliveAdapter) '''
+
+# --- FILE FORMAT ---
+# MAGIC | u32 index length | index (utf-8 JSON) | response bodies, back to back
+# The index holds everything but the bodies (keys, statuses, headers incl. Set-Cookie,
+# body offset/length), so loading a cassette parses one small JSON document and maps
+# the rest; a body is only sliced out of the mapping when its response is replayed.
+
+MAGIC = b"APICASS1"
+_INDEX_LENGTH = struct.Struct("<I")
+
+# hop-by-hop/encoding headers describe the wire format, bodies are stored decoded...
+_DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "keep-alive"}
+
+# cookies that change which response the server gives for the same method + path
+MATCHED_COOKIES = ("company", "username")
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Raised in replay mode for a request the cassette has no recording of."""
+
+def request_key(request):
+    """(method, path + query, company, username, has access_token) for a PreparedRequest."""
+    parts = urlsplit(request.url)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    cookies = {}
+    for pair in request.headers.get("Cookie", "").split(";"):
+        name, _, value = pair.strip().partition("=")
+        if name:
+            cookies[name] = value
+    return (request.method, path) + tuple(cookies.get(name, "") for name in MATCHED_COOKIES) + ("access_token" in cookies,)
+
+class _RecordedMessage:
+    """Stands in for http.client.HTTPResponse so requests can extract Set-Cookie headers."""
+
+    def __init__(self, headers):
+        self.msg = HTTPMessage()
+        for name, value in headers:
+            self.msg[name] = value # HTTPMessage appends, duplicates (Set-Cookie) are kept
+
+    def isclosed(self):
+        return True
+
+    def close(self):
+        pass
+
+class Cassette:
+    """
+    Recorded responses keyed by request_key() and the test that made them.
+
+    Replay hands out the recordings for a key in the order they were made within the
+    current test scope (see set_scope), so a test that reads, deletes, then reads the
+    same user again sees 200 then 404 just like it did live. Requests the scope never
+    made (eg: a dev-login the session pool avoided while recording) fall back to the
+    first recording of the same key from any scope.
+    """
+
+    def __init__(self, path, mode, salt=None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}', expected 'record' or 'replay'.")
+        self.path = path
+        self.mode = mode
+        self.scope = None
+        self.salt = salt or uuid.uuid4().hex[:8] # seeds deterministic ids, see utils.unique_id
+        self._lock = threading.Lock()
+        self._entries = [] # record: new entries (with bodies); replay: index entries
+        self._cursors = {}
+        self._by_scope = {}
+        self._by_key = {}
+        self._data = None
+        if mode == "replay":
+            self._load()
+
+    def set_scope(self, scope):
+        with self._lock:
+            self.scope = scope
+
+    # --- RECORD ---
+
+    def record(self, request, response):
+        headers = [(name, value) for name, value in response.raw.headers.items() if name.lower() not in _DROPPED_HEADERS]
+        entry = {
+            "scope": self.scope,
+            "key": list(request_key(request)),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": headers,
+            "body": response.content,
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+    def drain(self):
+        """Returns and forgets the entries recorded so far (eg: to ship them from a worker process)."""
+        with self._lock:
+            entries, self._entries = self._entries, []
+        return entries
+
+    def extend(self, entries):
+        with self._lock:
+            self._entries.extend(entries)
+
+    def save(self):
+        """Writes the recorded entries to self.path, returns how many were written."""
+        with self._lock:
+            entries = list(self._entries)
+        index, offset = [], 0
+        for entry in entries:
+            index.append({**{k: v for k, v in entry.items() if k != "body"}, "offset": offset, "length": len(entry["body"])})
+            offset += len(entry["body"])
+        encoded = json.dumps({"version": 1, "salt": self.salt, "entries": index}, separators=(",", ":")).encode("utf-8")
+        with open(self.path, "wb") as f:
+            f.write(MAGIC)
+            f.write(_INDEX_LENGTH.pack(len(encoded)))
+            f.write(encoded)
+            for entry in entries:
+                f.write(entry["body"])
+        return len(entries)
+
+    # --- REPLAY ---
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not an API cassette.")
+        start = len(MAGIC) + _INDEX_LENGTH.size
+        (index_length,) = _INDEX_LENGTH.unpack(self._data[len(MAGIC):start])
+        index = json.loads(self._data[start:start + index_length])
+        self._body_start = start + index_length
+        self.salt = index["salt"]
+        self._entries = index["entries"]
+        for entry in self._entries:
+            key = tuple(entry["key"])
+            self._by_scope.setdefault((entry["scope"], key), []).append(entry)
+            self._by_key.setdefault(key, entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _find(self, key):
+        with self._lock:
+            scoped = self._by_scope.get((self.scope, key))
+            if scoped:
+                cursor = self._cursors.get((self.scope, key), 0)
+                if cursor < len(scoped):
+                    self._cursors[(self.scope, key)] = cursor + 1
+                    return scoped[cursor]
+        return self._by_key.get(key)
+
+    def replay(self, adapter, request):
+        """Builds the recorded requests.Response for a PreparedRequest without touching the network."""
+        key = request_key(request)
+        entry = self._find(key)
+        if entry is None:
+            raise CassetteMiss(f"No recording for {key[0]} {key[1]} (cookies {dict(zip(MATCHED_COOKIES, key[2:]))}) in {self.path}", request=request)
+        start = self._body_start + entry["offset"]
+        body = self._data[start:start + entry["length"]]
+        headers = entry["headers"] + [["Content-Length", str(len(body))]]
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=entry["status"],
+            reason=entry["reason"],
+            preload_content=False,
+            original_response=_RecordedMessage(headers),
+            request_method=request.method,
+            request_url=request.url,
+        )
+        return adapter.build_response(request, raw)
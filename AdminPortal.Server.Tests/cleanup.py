@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import (
+    COLOR_FAIL, COLOR_SECONDARY, COLOR_WARN,
+    DEV_COMPANY, printc, get_authenticated_session, release_session
+)
+
+''' Run-wide cleanup registry: resources are journaled as tests create them and removed in one concurrent batch '''
+
+JOURNAL_DIR = os.environ.get("API_TEST_CLEANUP_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cleanup"))
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class CleanupRegistry:
+    """
+    Tracks test users (and guarded company renames) for the whole run instead of per test.
+
+    Every change is appended to a per-process journal (JOURNAL_DIR/<pid>.jsonl) before the
+    resource exists server-side, so a crashed run leaves a record of what it created;
+    recover_abandoned() picks those journals up at the start of the next run. flush()
+    deletes everything pending concurrently and removes the journal once it's empty.
+    """
+
+    def __init__(self, journal_dir=JOURNAL_DIR):
+        self.journal_dir = journal_dir
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._pending = {} # (kind, name) -> value (company for users, original display name for companies)
+        self._journal = None
+
+    def _check_process(self):
+        # forked workers inherit the parent's registry, they must keep their own journal...
+        if self._pid != os.getpid():
+            self._reset()
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.journal_dir, f"{os.getpid()}.jsonl")
+
+    def _write(self, op, kind, name, value=None):
+        if self._journal is None:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps({"op": op, "kind": kind, "name": name, "value": value}) + "\n")
+        self._journal.flush()
+
+    def _track(self, kind, name, value):
+        with self._lock:
+            self._check_process()
+            added = (kind, name) not in self._pending
+            self._pending[(kind, name)] = value
+            self._write("track", kind, name, value)
+            return added
+
+    def _forget(self, kind, name):
+        with self._lock:
+            self._check_process()
+            if self._pending.pop((kind, name), None) is not None:
+                self._write("forget", kind, name)
+
+    # --- USERS ---
+
+    def track_user(self, username, company=DEV_COMPANY):
+        """Registers a user the test is about to create, returns False if it was already tracked."""
+        return self._track("user", username, company)
+
+    def rename_user(self, prev_username, new_username, company=DEV_COMPANY):
+        """Follows a successful username change, the new name is what needs deleting."""
+        if prev_username != new_username:
+            self._track("user", new_username, company)
+            self._forget("user", prev_username)
+
+    def forget_user(self, username):
+        """The test deleted the user itself."""
+        self._forget("user", username)
+
+    # --- COMPANIES ---
+
+    def guard_company(self, company_key, original_name):
+        """Records the display name to restore should the run die before the test reverts it."""
+        self._track("company", company_key, original_name)
+
+    def release_company(self, company_key):
+        """The test reverted the rename itself."""
+        self._forget("company", company_key)
+
+    def pending(self):
+        with self._lock:
+            self._check_process()
+            return dict(self._pending)
+
+    # --- FLUSHING ---
+
+    def flush(self, max_workers=8, verbose=True):
+        """
+        Removes everything pending: companies are reverted first, then users are deleted
+        concurrently over a single pooled session. Returns True if nothing is left over.
+        """
+        from user_tests import delete_user_via_api # the helpers' modules import this one...
+        from company_tests import update_company_via_api
+
+        pending = self.pending()
+        if not pending:
+            self._close_journal()
+            return True
+
+        start = time.perf_counter()
+        failed = []
+        companies = [(name, value) for (kind, name), value in pending.items() if kind == "company"]
+        users = [(name, value) for (kind, name), value in pending.items() if kind == "user"]
+
+        for company_key, original_name in companies:
+            session = get_authenticated_session(company=company_key)
+            try:
+                response = update_company_via_api(session, original_name) if session else None
+                if response is not None and response.status_code == 200:
+                    self.release_company(company_key)
+                else:
+                    failed.append(f"company {company_key} -> '{original_name}'")
+            except Exception as e:
+                failed.append(f"company {company_key} -> '{original_name}' ({e})")
+            finally:
+                if session:
+                    release_session(session)
+
+        by_company = {}
+        for username, company in users:
+            by_company.setdefault(company, []).append(username)
+
+        deleted = gone = 0
+        for company, usernames in by_company.items():
+            session = get_authenticated_session(company=company)
+            if not session:
+                failed.extend(f"user {username}" for username in usernames)
+                continue
+
+            def _delete(username):
+                try:
+                    return username, delete_user_via_api(session, username).status_code
+                except Exception as e:
+                    return username, e
+
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(usernames)))) as pool:
+                for username, status in pool.map(_delete, usernames):
+                    if status in (204, 404): # 404: already gone (eg: the test deleted it after all)
+                        self.forget_user(username)
+                        deleted += status == 204
+                        gone += status == 404
+                    else:
+                        failed.append(f"user {username} ({status})")
+            release_session(session)
+
+        if verbose:
+            reverted = len(companies) - sum(item.startswith("company") for item in failed)
+            printc(
+                f"Cleanup: deleted {deleted} users ({gone} already gone)"
+                + (f", reverted {reverted} company name(s)" if companies else "")
+                + f" in {time.perf_counter() - start:.2f}s",
+                COLOR_SECONDARY
+            )
+            for item in failed:
+                printc(f"  < CLEANUP: Failed to remove {item}, kept in {self.journal_path} for the next run.", COLOR_FAIL)
+        if not failed:
+            self._close_journal()
+        return not failed
+
+    def _close_journal(self):
+        with self._lock:
+            self._check_process()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if not self._pending and os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    def recover_abandoned(self, verbose=True, source=None):
+        """
+        Adopts the journals of processes that exited before flushing (their pid is gone)
+        and flushes them right away, so leftovers can't collide with this run's tests.
+        The parallel runner also uses this to clean up after its finished workers.
+        """
+        if not os.path.isdir(self.journal_dir):
+            return True
+        adopted = 0
+        for filename in os.listdir(self.journal_dir):
+            pid, ext = os.path.splitext(filename)
+            if ext != ".jsonl" or not pid.isdigit() or int(pid) == os.getpid() or _pid_alive(int(pid)):
+                continue
+            path = os.path.join(self.journal_dir, filename)
+            state = {}
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # torn final line of a crashed writer
+                    if entry["op"] == "track":
+                        state[(entry["kind"], entry["name"])] = entry["value"]
+                    else:
+                        state.pop((entry["kind"], entry["name"]), None)
+            for (kind, name), value in state.items():
+                self._track(kind, name, value)
+            adopted += len(state)
+            os.remove(path)
+        if not adopted:
+            return True
+        if verbose:
+            printc(
+                f"Cleanup: recovered {adopted} leftover resource(s) from {source or 'an interrupted run'}.",
+                COLOR_SECONDARY if source else COLOR_WARN
+            )
+        return self.flush(verbose=verbose)
+
+# process-wide registry, flushed at the end of the run (workers' journals are adopted) and, failing that, at exit...
+CLEANUP = CleanupRegistry()
+atexit.register(lambda: CLEANUP.flush(verbose=False) if CLEANUP.pending() else None)
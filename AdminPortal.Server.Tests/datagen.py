@@ -0,0 +1,125 @@
+import random
+
+from utils import DEV_COMPANY, mapping_from_cookie
+
+''' Seeded, index-addressable test-data generation for seeding and load runs '''
+
+# --- DEFAULTS ---
+
+DEFAULT_COMPANIES = (DEV_COMPANY, "NTS", "TCS")
+DEFAULT_MODULES = ("admin", "deliverymanager")
+DEFAULT_PASSWORD = "TestPassword123!"
+
+_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+_MAX_COMPANIES = 5 # COMPANYKEY01..05
+_MAX_MODULES = 10 # MODULE01..10
+_COMBINATIONS = 1024 # precomputed (companies, modules, active) picks per generator
+
+def mappings_from_session(session):
+    """
+    (company keys, module keys) from a logged-in requests.Session's company_mapping/module_mapping
+    cookies, see AsyncApiClient.mapping_keys for AsyncSessions.
+    """
+    keys = [tuple(mapping_from_cookie(session, name) or ()) for name in ("company_mapping", "module_mapping")]
+    return keys[0], keys[1]
+
+def _mix64(value):
+    """splitmix64 finalizer, spreads consecutive indices over 64 well-mixed bits."""
+    value = (value + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return value ^ (value >> 31)
+
+class _Permutation:
+    """x -> (a*x + b) mod base**width, a bijection on [0, base**width) since gcd(a, base) == 1."""
+
+    def __init__(self, rng, width, base=36):
+        self.width = width
+        self.modulus = base ** width
+        self.a = rng.randrange(1, self.modulus)
+        while self.a % 2 == 0 or self.a % 3 == 0: # base 36 = 2^2 * 3^2...
+            self.a = rng.randrange(1, self.modulus)
+        self.b = rng.randrange(self.modulus)
+
+    def __call__(self, index):
+        value = (self.a * index + self.b) % self.modulus
+        chars = []
+        for _ in range(self.width):
+            value, digit = divmod(value, 36)
+            chars.append(_ALPHABET[digit])
+        return "".join(chars)
+
+class UserDataGenerator:
+    """
+    Reproducible User payloads: user(i) is the same dict for the same seed, on any machine,
+    in any order, so batches can be generated in parallel or resumed from an index.
+
+    Usernames ("<prefix>_<6 chars>") and powerunits (`powerunit_width` uppercase chars) come
+    from two seeded affine permutations of the index, so they never repeat within one
+    generator (up to 36**6, resp. 36**powerunit_width, users). Company/module assignments
+    are drawn from a table of seeded combinations built once, making each payload a couple
+    of integer ops and a few string joins, far cheaper than the request that sends it.
+
+    Distinct prefixes keep usernames apart across generators; powerunits are only unique
+    per generator, give concurrent generators different seeds AND prefixes.
+    """
+
+    def __init__(self, seed=0, prefix="gen", companies=DEFAULT_COMPANIES, modules=DEFAULT_MODULES,
+                 password=DEFAULT_PASSWORD, powerunit_width=6):
+        if not companies or not modules:
+            raise ValueError("UserDataGenerator needs at least one company and one module.")
+        if powerunit_width < 4:
+            raise ValueError("powerunit_width below 4 can't keep high-volume runs collision free.")
+        self.seed = seed
+        self.prefix = prefix
+        self.password = password
+        self.companies = tuple(companies)
+        self.modules = tuple(modules)
+        rng = random.Random(f"datagen:{seed}:{prefix}")
+        self._username = _Permutation(rng, 6)
+        self._powerunit = _Permutation(rng, powerunit_width)
+        self._salt = rng.getrandbits(64)
+        self._combinations = [self._combination(rng) for _ in range(_COMBINATIONS)]
+
+    @classmethod
+    def from_session(cls, session, seed=0, prefix="gen", **kwargs):
+        """A generator drawing companies/modules from the mapping tables a requests.Session was handed."""
+        companies, modules = mappings_from_session(session)
+        return cls(seed, prefix, companies or DEFAULT_COMPANIES, modules or DEFAULT_MODULES, **kwargs)
+
+    def _combination(self, rng):
+        # most drivers work for one or two companies and a couple of modules, a few for many...
+        n_companies = min(len(self.companies), _MAX_COMPANIES, 1 + int(rng.expovariate(1.2)))
+        n_modules = min(len(self.modules), _MAX_MODULES, 1 + int(rng.expovariate(0.8)))
+        companies = rng.sample(self.companies, n_companies)
+        return tuple(companies), tuple(rng.sample(self.modules, n_modules)), companies[0]
+
+    def user(self, index):
+        """The payload for POST /users at `index` (0 <= index < 36**6)."""
+        companies, modules, active = self._combinations[_mix64(index ^ self._salt) % _COMBINATIONS]
+        return {
+            "Username": self.username(index),
+            "Password": self.password,
+            "Powerunit": self._powerunit(index).upper(),
+            "ActiveCompany": active,
+            "Companies": list(companies),
+            "Modules": list(modules),
+        }
+
+    __getitem__ = user
+
+    def username(self, index):
+        """Just the username at `index`, eg: to delete a seeded user without rebuilding its payload."""
+        return f"{self.prefix}_{self._username(index)}"
+
+    def batch(self, start, count):
+        """Payloads for indices [start, start + count)."""
+        return [self.user(i) for i in range(start, start + count)]
+
+    def stream(self, start=0, stop=None, batch_size=1000):
+        """Yields lists of up to `batch_size` payloads from `start` until `stop` (or forever)."""
+        index = start
+        while stop is None or index < stop:
+            count = batch_size if stop is None else min(batch_size, stop - index)
+            yield self.batch(index, count)
+            index += count
@@ -0,0 +1,633 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.cookies import SimpleCookie, CookieError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import DEV_USERNAME, DEV_COMPANY, DEV_COMPANY_NAME
+
+''' Hermetic in-process stand-in for the AdminPortal v1 API '''
+
+# Mirrors the controllers in AdminPortal.Server (routes, status codes, messages and cookies)
+# closely enough for the functional suite, with all state kept in memory. It serves plain
+# HTTP, so cookies are issued without the Secure flag; everything else matches CookieService.
+
+FAKE_JWT_KEY = b"fake-api-signing-key-not-for-production-use"
+FAKE_JWT_ISSUER = "localhost:7242"
+FAKE_JWT_AUDIENCE = "localhost:5173"
+NAME_CLAIM = "unique_name" # ClaimTypes.Name as written by JwtSecurityTokenHandler
+
+ACCESS_MINUTES = 15
+REFRESH_DAYS = 1
+TOKEN_CACHE_REFRESH_WINDOW = 5 * 60 # TokenCache.RefreshWindow, seconds
+MAPPING_VERSION_PREFIX = "v1:" # MappingService.RefPrefix
+
+# --- JWT HELPERS ---
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64url_decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def make_jwt(username, session_id, expires_at):
+    """HS256 token with the same claims TokenService.GenerateToken issues."""
+    header = {"alg": "HS256", "typ": "JWT"}
+    payload = {
+        NAME_CLAIM: username,
+        "jti": str(uuid.uuid4()),
+        "sessionId": str(session_id),
+        "aud": [FAKE_JWT_AUDIENCE, FAKE_JWT_ISSUER],
+        "exp": int(expires_at.timestamp()),
+        "iss": FAKE_JWT_ISSUER,
+    }
+    signing_input = f"{_b64url(json.dumps(header).encode())}.{_b64url(json.dumps(payload).encode())}"
+    signature = hmac.new(FAKE_JWT_KEY, signing_input.encode("ascii"), hashlib.sha256).digest()
+    return f"{signing_input}.{_b64url(signature)}"
+
+def validate_jwt(token):
+    """Returns the payload of a valid, unexpired token signed by the stand-in, else None."""
+    try:
+        header, payload, signature = token.split(".")
+        expected = hmac.new(FAKE_JWT_KEY, f"{header}.{payload}".encode("ascii"), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+        claims = json.loads(_b64url_decode(payload))
+    except (ValueError, TypeError):
+        return None
+    if claims.get("iss") != FAKE_JWT_ISSUER or claims.get("exp", 0) <= time.time():
+        return None
+    return claims
+
+# --- IN-MEMORY STATE ---
+
+class FakeApiState:
+    """USERS, COMPANY, MODULE and SESSIONS tables, guarded by one lock."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.companies = {DEV_COMPANY: DEV_COMPANY_NAME, "NTS": "NTS", "TCS": "TCS"}
+        self.modules = {"admin": "Admin Portal", "deliverymanager": "Delivery Manager"}
+        self.users = {
+            DEV_USERNAME: {
+                "Username": DEV_USERNAME,
+                "Password": None,
+                "Powerunit": "000",
+                "Companies": [DEV_COMPANY, "NTS", "TCS"],
+                "Modules": ["admin", "deliverymanager"],
+            }
+        }
+        self.sessions = {}
+        self._next_session_id = 1
+        # TokenCache: sha256(access token) -> (session id, username, expires), plus its counters...
+        self.token_cache = {}
+        self.token_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def add_or_update_session(self, session_id, username, access, refresh, expiry):
+        with self.lock:
+            now = datetime.now(timezone.utc)
+            if session_id == 0:
+                session_id = self._next_session_id
+                self._next_session_id += 1
+                self.sessions[session_id] = {"Id": session_id, "LoginTime": now}
+            elif session_id not in self.sessions:
+                return None
+            self.sessions[session_id].update({
+                "Username": username, "AccessToken": access, "RefreshToken": refresh,
+                "ExpiryTime": expiry, "LastActivity": now,
+            })
+            return dict(self.sessions[session_id])
+
+    def find_session(self, username, access, refresh):
+        with self.lock:
+            for session in self.sessions.values():
+                if (session["Username"], session["AccessToken"], session["RefreshToken"]) == (username, access, refresh):
+                    return dict(session)
+            return None
+
+    def cached_token(self, access):
+        with self.lock:
+            key = hashlib.sha256(access.encode()).hexdigest()
+            entry = self.token_cache.get(key)
+            if entry is not None and entry[2] <= time.time():
+                del self.token_cache[key]
+                entry = None
+            self.token_cache_stats["hits" if entry else "misses"] += 1
+            return entry
+
+    def cache_token(self, access, session_id, username):
+        claims = validate_jwt(access)
+        expires = claims["exp"] - TOKEN_CACHE_REFRESH_WINDOW if claims else 0
+        if expires > time.time():
+            with self.lock:
+                self.token_cache[hashlib.sha256(access.encode()).hexdigest()] = (session_id, username, expires)
+
+    def evict_session_tokens(self, session_id):
+        with self.lock:
+            keys = [key for key, entry in self.token_cache.items() if entry[0] == session_id]
+            for key in keys:
+                del self.token_cache[key]
+            self.token_cache_stats["evictions"] += len(keys)
+
+    def cleanup_expired_sessions(self, idle_timeout):
+        with self.lock:
+            now = datetime.now(timezone.utc)
+            expired = [sid for sid, s in self.sessions.items()
+                       if s["ExpiryTime"] <= now or s["LastActivity"] < now - idle_timeout]
+            for sid in expired:
+                del self.sessions[sid]
+
+    def sweep_expired_sessions(self, batch_size, idle_timeout=None):
+        """SessionService.DeleteExpiredSessionsBatchAsync: removes up to batch_size expired (or idle) rows, returns their ids."""
+        with self.lock:
+            now = datetime.now(timezone.utc)
+            expired = [sid for sid, s in self.sessions.items()
+                       if s["ExpiryTime"] <= now or (idle_timeout is not None and s["LastActivity"] < now - idle_timeout)]
+            for sid in expired[:batch_size]:
+                del self.sessions[sid]
+            return expired[:batch_size]
+
+class FakeSessionSweeper:
+    """
+    SessionSweeper on a daemon thread, configured from the same SessionSweeper__* environment
+    variables ASP.NET reads (eg: SessionSweeper__IdleMinutes=1), with the same defaults.
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.interval = float(os.environ.get("SessionSweeper__IntervalSeconds", 60))
+        self.budget = float(os.environ.get("SessionSweeper__BudgetMs", 2000)) / 1000
+        self.pause = float(os.environ.get("SessionSweeper__PauseMs", 50)) / 1000
+        self.batch_size = max(1, int(os.environ.get("SessionSweeper__BatchSize", 500)))
+        idle_minutes = float(os.environ.get("SessionSweeper__IdleMinutes", 0))
+        self.idle_timeout = timedelta(minutes=idle_minutes) if idle_minutes > 0 else None
+        self.stats = {"sweeps": 0, "batches": 0, "rowsSwept": 0, "timeSpentMs": 0.0, "budgetExhausted": 0,
+                      "lastSwept": 0, "lastSweepUtc": None}
+        self._stop = threading.Event()
+
+    def start(self):
+        if self.interval > 0:
+            threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sweep()
+            self._stop.wait(self.interval)
+
+    def sweep(self):
+        start = time.perf_counter()
+        swept, batches, exhausted = 0, 0, False
+        while True:
+            deleted = self.state.sweep_expired_sessions(self.batch_size, self.idle_timeout)
+            for session_id in deleted:
+                self.state.evict_session_tokens(session_id)
+            rows = len(deleted)
+            batches += 1
+            swept += rows
+            if rows < self.batch_size:
+                break
+            if time.perf_counter() - start >= self.budget:
+                exhausted = True
+                break
+            time.sleep(self.pause)
+        with self.state.lock:
+            self.stats["sweeps"] += 1
+            self.stats["batches"] += batches
+            self.stats["rowsSwept"] += swept
+            self.stats["timeSpentMs"] += (time.perf_counter() - start) * 1000
+            self.stats["budgetExhausted"] += exhausted
+            self.stats["lastSwept"] = swept
+            self.stats["lastSweepUtc"] = datetime.now(timezone.utc).isoformat()
+        return swept
+
+# --- REQUEST HANDLING ---
+
+class ApiResult:
+    """Status, JSON (or empty) body, extra headers and cookies to set for one response."""
+
+    def __init__(self, status, body=None, headers=None):
+        self.status = status
+        self.body = body
+        self.headers = dict(headers or {})
+        self.cookies = [] # (name, value, expires)
+
+    def set_cookie(self, name, value, expires):
+        self.cookies.append((name, value, expires))
+        return self
+
+def _access_expiry():
+    return datetime.now(timezone.utc) + timedelta(minutes=ACCESS_MINUTES)
+
+def _refresh_expiry():
+    return datetime.now(timezone.utc) + timedelta(days=REFRESH_DAYS)
+
+def _removed_expiry():
+    return datetime.now(timezone.utc) - timedelta(days=1)
+
+def _mapping_version(mapping):
+    """MappingService.Version: a short hash of the mapping in ordinal key order."""
+    canonical = json.dumps(dict(sorted(mapping.items())), separators=(",", ":")).encode("utf-8")
+    return MAPPING_VERSION_PREFIX + hashlib.sha256(canonical).hexdigest()[:16]
+
+def _mapping_cookie(mapping):
+    """MappingService.ToCookieValue, Mappings__CookieFormat=ref in the environment selects versions."""
+    if os.environ.get("Mappings__CookieFormat", "json").lower() == "ref":
+        return _mapping_version(mapping)
+    return json.dumps(mapping, separators=(",", ":"))
+
+def _send_safe_user(user):
+    companies = user.get("Companies") or []
+    return {
+        "Username": user["Username"],
+        "Permissions": None,
+        "Powerunit": user.get("Powerunit"),
+        "ActiveCompany": companies[0] if companies else None,
+        "Companies": companies,
+        "Modules": user.get("Modules") or [],
+    }
+
+class FakeApi:
+    """Route table and handlers, kept separate from the HTTP plumbing."""
+
+    def __init__(self, state=None):
+        self.state = state or FakeApiState()
+        self.sweeper = FakeSessionSweeper(self.state)
+        self.routes = [
+            ("GET", r"sessions/dev-login", self.dev_login, False),
+            ("GET", r"sessions/me", self.get_current_driver, True),
+            ("POST", r"sessions/return/(?P<user_id>[^/]+)", self.return_session, True),
+            ("POST", r"sessions/logout/(?P<user_id>[^/]+)", self.logout, False),
+            ("GET", r"sessions/mappings", self.get_mappings, True),
+            ("GET", r"sessions/dev-token-cache", self.dev_token_cache, False),
+            ("GET", r"sessions/dev-sweeper", self.dev_sweeper, False),
+            ("POST", r"users", self.create_user, True),
+            ("GET", r"users/(?P<username>[^/]+)", self.get_user, True),
+            ("PUT", r"users/(?P<prev_username>[^/]+)", self.update_user, True),
+            ("DELETE", r"users/(?P<username>[^/]+)", self.delete_user, True),
+            ("PUT", r"companies/(?P<new_name>[^/]+)", self.update_company, True),
+        ]
+
+    def handle(self, method, path, query, cookies, headers, body):
+        if not path.startswith("/v1/"):
+            return ApiResult(404)
+        route_path = path[len("/v1/"):]
+
+        path_matched = False
+        for route_method, pattern, handler, requires_auth in self.routes:
+            match = re.fullmatch(pattern, route_path)
+            if not match:
+                continue
+            path_matched = True
+            if route_method != method:
+                continue
+            if requires_auth and not self._authenticated(cookies, headers):
+                return ApiResult(401, headers={"WWW-Authenticate": "Bearer"})
+            params = {k: urllib.parse.unquote(v) for k, v in match.groupdict().items()}
+            return handler(query=query, cookies=cookies, headers=headers, body=body, **params)
+
+        # empty route segments (eg: PUT companies/) never reach a controller action...
+        if path_matched or route_path.rstrip("/") in ("companies", "users"):
+            return ApiResult(405)
+        return ApiResult(404)
+
+    def _authenticated(self, cookies, headers):
+        token = cookies.get("access_token")
+        if token is None:
+            authorization = headers.get("Authorization", "")
+            if authorization.lower().startswith("bearer "):
+                token = authorization[len("Bearer "):].strip()
+        return bool(token) and validate_jwt(token) is not None
+
+    def _generate_tokens(self, username, session_id):
+        access = make_jwt(username, session_id, _access_expiry())
+        refresh_expires = _refresh_expiry()
+        refresh = make_jwt(username, session_id, refresh_expires)
+        self.state.add_or_update_session(session_id, username, access, refresh, refresh_expires)
+        return access, refresh
+
+    # --- sessions ---
+
+    def dev_login(self, query, cookies, headers, body):
+        username = query.get("username", [DEV_USERNAME])[0]
+        company = query.get("company", [DEV_COMPANY])[0]
+        if not username.strip() or not company.strip():
+            return ApiResult(400, {"message": "Username and company are both required for dev login."})
+
+        access, refresh = self._generate_tokens(username, 0)
+        with self.state.lock:
+            user = self.state.users.get(username)
+            companies = dict(self.state.companies)
+            modules = dict(self.state.modules)
+        if user is None:
+            return ApiResult(404, {"message": f"Development user '{username}' not found in local database. User must be created prior to login."})
+
+        result = ApiResult(302, headers={"Location": "https://localhost:5173/"})
+        result.set_cookie("username", user["Username"], _access_expiry())
+        result.set_cookie("company", company, _access_expiry())
+        result.set_cookie("access_token", access, _access_expiry())
+        result.set_cookie("refresh_token", refresh, _refresh_expiry())
+        result.set_cookie("company_mapping", _mapping_cookie(companies), _access_expiry())
+        result.set_cookie("module_mapping", _mapping_cookie(modules), _access_expiry())
+        return result
+
+    def get_current_driver(self, query, cookies, headers, body):
+        username = cookies.get("username")
+        if not username:
+            return ApiResult(400, {"message": "Username cookies is missing or empty."})
+        company_mapping = cookies.get("company_mapping")
+        if not company_mapping:
+            return ApiResult(400, {"message": "Company mapping cookie is missing or empty."})
+        module_mapping = cookies.get("module_mapping")
+        if not module_mapping:
+            return ApiResult(400, {"message": "Module mapping cookie is missing or empty."})
+        access, refresh = cookies.get("access_token"), cookies.get("refresh_token")
+        if not access or not refresh:
+            return ApiResult(401, {"message": "Session token cookies are missing. Please log in again."})
+
+        with self.state.lock:
+            user = self.state.users.get(username)
+            user = dict(user) if user else None
+        if user is None:
+            return ApiResult(404, {"message": "Driver not found."})
+
+        cached = self.state.cached_token(access)
+        if cached is not None and cached[1] == username:
+            session_id = cached[0]
+        else:
+            session = self.state.find_session(username, access, refresh)
+            if session is None:
+                return ApiResult(401, {"message": "Session cookies are missing. Please log in again."})
+            session_id = session["Id"]
+            self.state.cache_token(access, session_id, username)
+        return ApiResult(200, {"user": user, "companies": company_mapping, "modules": module_mapping, "userId": session_id})
+
+    def get_mappings(self, query, cookies, headers, body):
+        with self.state.lock:
+            companies = dict(self.state.companies)
+            modules = dict(self.state.modules)
+        companies_version, modules_version = _mapping_version(companies), _mapping_version(modules)
+        etag = f'"{companies_version[len(MAPPING_VERSION_PREFIX):]}-{modules_version[len(MAPPING_VERSION_PREFIX):]}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        # weak comparison like ASP.NET's, W/"x" matches "x" and "*" matches anything...
+        tags = [tag.strip().removeprefix("W/") for tag in headers.get("If-None-Match", "").split(",")]
+        if "*" in tags or etag in tags:
+            return ApiResult(304, headers=cache_headers)
+        return ApiResult(200, {"companies": companies, "modules": modules,
+                               "companiesVersion": companies_version, "modulesVersion": modules_version},
+                         headers=cache_headers)
+
+    def dev_token_cache(self, query, cookies, headers, body):
+        with self.state.lock:
+            stats = dict(self.state.token_cache_stats)
+            now = time.time()
+            stats["entries"] = sum(entry[2] > now for entry in self.state.token_cache.values())
+            access = cookies.get("access_token")
+            entry = self.state.token_cache.get(hashlib.sha256(access.encode()).hexdigest()) if access else None
+        lookups = stats["hits"] + stats["misses"]
+        return ApiResult(200, {
+            "entries": stats["entries"], "hits": stats["hits"], "misses": stats["misses"], "evictions": stats["evictions"],
+            "hitRate": stats["hits"] / lookups if lookups else 0.0,
+            "cached": entry is not None and entry[2] > now,
+        })
+
+    def dev_sweeper(self, query, cookies, headers, body):
+        with self.state.lock:
+            return ApiResult(200, {"sessions": len(self.state.sessions), **self.sweeper.stats})
+
+    def return_session(self, query, cookies, headers, body, user_id):
+        try:
+            session_id = int(user_id)
+        except ValueError:
+            return ApiResult(400, {"title": "One or more validation errors occurred.", "status": 400})
+        username = cookies.get("username")
+        access, refresh = cookies.get("access_token"), cookies.get("refresh_token")
+        if not username or not access or not refresh:
+            return ApiResult(401, {"message": "Session cookies are missing. Please log in again."})
+
+        claims = validate_jwt(refresh)
+        expiry = (datetime.fromtimestamp(claims["exp"], timezone.utc) if claims else _refresh_expiry())
+        if self.state.add_or_update_session(session_id, username, access, refresh, expiry) is None:
+            return ApiResult(500, "Failed to release session with manifest details.")
+
+        # CookieService.ExtendCookies, then the return flag...
+        result = ApiResult(200, {"message": "Returning, cookies extension completed successfully."})
+        for name, value in cookies.items():
+            result.set_cookie(name, value, _access_expiry() if name == "access_token" else _refresh_expiry())
+        result.set_cookie("return", "true", _access_expiry())
+        return result
+
+    def logout(self, query, cookies, headers, body, user_id):
+        if body is not None:
+            try:
+                session_id = int(user_id)
+            except ValueError:
+                return ApiResult(400, {"title": "One or more validation errors occurred.", "status": 400})
+            with self.state.lock:
+                cleared = self.state.sessions.pop(session_id, None) is not None
+            self.state.evict_session_tokens(session_id)
+            if not cleared:
+                self.state.cleanup_expired_sessions(timedelta(minutes=30))
+
+        result = ApiResult(200, {"message": "Logged out successfully"})
+        for name in cookies:
+            result.set_cookie(name, "", _removed_expiry())
+        return result
+
+    # --- users ---
+
+    def create_user(self, query, cookies, headers, body):
+        user = body or {}
+        username = user.get("Username")
+        if not username or not username.strip():
+            return ApiResult(400, {"message": "Username is required."})
+        powerunit = user.get("Powerunit")
+        with self.state.lock:
+            if username in self.state.users:
+                return ApiResult(409, {"message": "Username is already in use by another user."})
+            if powerunit is not None and any(u.get("Powerunit") == powerunit for u in self.state.users.values()):
+                return ApiResult(500, {"message": "Powerunit is already assigned to another user"})
+            self.state.users[username] = {
+                "Username": username,
+                "Password": None, # passwords are set by the user on first login...
+                "Powerunit": powerunit,
+                "Companies": list(user.get("Companies") or [])[:5],
+                "Modules": list(user.get("Modules") or [])[:10],
+            }
+        created = {
+            "Username": username,
+            "Permissions": user.get("Permissions"),
+            "Powerunit": powerunit,
+            "ActiveCompany": user.get("ActiveCompany"),
+            "Companies": user.get("Companies") or [],
+            "Modules": user.get("Modules") or [],
+        }
+        return ApiResult(201, created, headers={"Location": f"/v1/users/{urllib.parse.quote(username)}"})
+
+    def get_user(self, query, cookies, headers, body, username):
+        with self.state.lock:
+            user = self.state.users.get(username)
+            user = dict(user) if user else None
+        if user is None:
+            return ApiResult(404, f"User with username '{username}' not found.")
+        return ApiResult(200, _send_safe_user(user))
+
+    def update_user(self, query, cookies, headers, body, prev_username):
+        new_user = body or {}
+        new_username = new_user.get("Username")
+        if not new_username or not new_username.strip():
+            return ApiResult(500, {"message": "Username is required."})
+        new_powerunit = new_user.get("Powerunit") or None
+
+        with self.state.lock:
+            existing = self.state.users.get(prev_username)
+            if existing is None:
+                return ApiResult(404, f"User with username '{prev_username}' not found.")
+            others = [u for name, u in self.state.users.items() if name != prev_username]
+            if (existing["Username"].lower() != new_username.lower()
+                    and any(u["Username"] == new_username for u in others)):
+                return ApiResult(409, {"message": "Username is already in use by another user."})
+            if (new_powerunit is not None
+                    and (existing.get("Powerunit") or "").lower() != new_powerunit.lower()
+                    and any(u.get("Powerunit") == new_powerunit for u in others)):
+                return ApiResult(409, {"message": "Powerunit is already assigned to another user"})
+
+            del self.state.users[prev_username]
+            updated = {
+                "Username": new_username,
+                "Password": new_user.get("Password") or None,
+                "Powerunit": new_user.get("Powerunit"),
+                "Companies": list(new_user.get("Companies") or [])[:5],
+                "Modules": list(new_user.get("Modules") or [])[:10],
+            }
+            self.state.users[new_username] = updated
+
+        result = ApiResult(200, dict(updated))
+        current_user = cookies.get("username")
+        if current_user and current_user.lower() == prev_username.lower():
+            result.set_cookie("username", new_username, _access_expiry())
+        return result
+
+    def delete_user(self, query, cookies, headers, body, username):
+        current_user = cookies.get("username")
+        if current_user and current_user.lower() == username.lower():
+            return ApiResult(409, {"message": f"Active username '{username}' cannot be deleted while in use."})
+        with self.state.lock:
+            if self.state.users.pop(username, None) is None:
+                return ApiResult(404, f"User with username '{username}' not found.")
+        return ApiResult(204)
+
+    # --- companies ---
+
+    def update_company(self, query, cookies, headers, body, new_name):
+        company_key = cookies.get("company")
+        if not company_key:
+            return ApiResult(400, {"message": "Current company name was not found in cookies."})
+        with self.state.lock:
+            current_name = self.state.companies.get(company_key)
+            if current_name is None:
+                return ApiResult(404, {"message": f"Company with name '{company_key}' not found."})
+            if (current_name.lower() != new_name.lower()
+                    and any(name == new_name for key, name in self.state.companies.items() if key != company_key)):
+                return ApiResult(409, {"message": "Company name already exists for another company."})
+            self.state.companies[company_key] = new_name
+            companies = dict(self.state.companies)
+
+        result = ApiResult(200, {"message": f"Company '{company_key}' updated to '{new_name}' successfully."})
+        result.set_cookie("company_mapping", _mapping_cookie(companies), _access_expiry())
+        return result
+
+# --- HTTP PLUMBING ---
+
+def _make_handler(api):
+    class FakeApiHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # keep-alive, like Kestrel
+        wbufsize = 64 * 1024 # headers + body leave in one write (no Nagle/delayed-ACK stalls)...
+        disable_nagle_algorithm = True
+
+        def _dispatch(self):
+            parsed = urllib.parse.urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw_body) if raw_body else None
+            except ValueError:
+                body = None
+
+            cookies = {}
+            jar = SimpleCookie()
+            try:
+                jar.load(self.headers.get("Cookie", ""))
+            except CookieError:
+                pass
+            for name, morsel in jar.items():
+                cookies[name] = urllib.parse.unquote(morsel.value)
+
+            result = api.handle(self.command, parsed.path, urllib.parse.parse_qs(parsed.query), cookies, self.headers, body)
+            self._respond(result)
+
+        def _respond(self, result):
+            payload = b"" if result.body is None else json.dumps(result.body).encode("utf-8")
+            self.send_response(result.status)
+            for name, value in result.headers.items():
+                self.send_header(name, value)
+            for name, value, expires in result.cookies:
+                self.send_header("Set-Cookie", (
+                    f"{name}={urllib.parse.quote(value, safe='')}; expires={format_datetime(expires, usegmt=True)}; "
+                    f"path=/; samesite=none; httponly"
+                ))
+            if payload:
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            if payload and self.command != "HEAD":
+                self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+        def log_message(self, format, *args):
+            pass # keep test output clean...
+
+    return FakeApiHandler
+
+class FakeApiServer:
+    """
+    Serves FakeApi over HTTP on a background thread.
+
+        server = FakeApiServer().start()
+        set_base_api_url(server.base_url)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, state=None):
+        self.api = FakeApi(state)
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self.api))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        self.api.sweeper.start()
+        return self
+
+    def stop(self):
+        self.api.sweeper.stop()
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,173 @@
+import json
+import math
+import threading
+from collections import Counter
+
+''' Mergeable, log-bucketed (HDR-style) latency histograms keyed by method + route template '''
+
+class LatencyHistogram:
+    """
+    Records latencies as integer microseconds into log-linear buckets: values below
+    2**sub_bucket_bits are exact, above that every power-of-two range is split into
+    2**sub_bucket_bits equal sub-buckets (~3% worst-case error with the default 5 bits).
+    Buckets are kept sparse, so histograms are cheap to record into, merge and serialize.
+    """
+
+    def __init__(self, sub_bucket_bits=5):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_count = 1 << sub_bucket_bits
+        self.buckets = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _index(self, value_us):
+        if value_us < self._sub_count:
+            return value_us
+        shift = value_us.bit_length() - 1 - self.sub_bucket_bits
+        mantissa = value_us >> shift
+        return (shift + 1) * self._sub_count + (mantissa - self._sub_count)
+
+    def _bucket_range(self, index):
+        if index < self._sub_count:
+            return index, index
+        shift = index // self._sub_count - 1
+        mantissa = index % self._sub_count + self._sub_count
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        value_us = max(0, int(seconds * 1_000_000))
+        index = self._index(value_us)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        self.max_us = max(self.max_us, value_us)
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+
+    def merge(self, other):
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms with different bucket precision.")
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+        return self
+
+    def percentile(self, pct):
+        """Latency (seconds) at or below which pct% of recorded values fall."""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                low, high = self._bucket_range(index)
+                return min((low + high) / 2, self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    @property
+    def mean(self):
+        return self.total_us / self.count / 1_000_000 if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "buckets": {str(index): n for index, n in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data.get("sub_bucket_bits", 5))
+        histogram.buckets = {int(index): n for index, n in data["buckets"].items()}
+        histogram.count = data["count"]
+        histogram.total_us = data["total_us"]
+        histogram.min_us = data["min_us"]
+        histogram.max_us = data["max_us"]
+        return histogram
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.mean * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p90_ms": self.percentile(90) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max_us / 1000,
+        }
+
+class LatencyRegistry:
+    """Thread-safe collection of one histogram (+ status counts) per (method, route template)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, method, route, status, seconds):
+        key = f"{method} {route}"
+        with self._lock:
+            entry = self._routes.get(key)
+            if entry is None:
+                entry = self._routes[key] = (LatencyHistogram(), Counter())
+            entry[0].record(seconds)
+            entry[1][str(status)] += 1
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                key: {"histogram": histogram.to_dict(), "statuses": dict(statuses)}
+                for key, (histogram, statuses) in self._routes.items()
+            }
+
+    def merge_dict(self, data):
+        """Folds a to_dict() snapshot (eg: from a worker process) into this registry."""
+        with self._lock:
+            for key, route in data.items():
+                histogram = LatencyHistogram.from_dict(route["histogram"])
+                entry = self._routes.get(key)
+                if entry is None:
+                    self._routes[key] = (histogram, Counter(route["statuses"]))
+                else:
+                    entry[0].merge(histogram)
+                    entry[1].update(route["statuses"])
+
+    def report(self):
+        """Per-route summaries, sorted by route key."""
+        with self._lock:
+            items = sorted(self._routes.items())
+            return {
+                key: {**histogram.summary(), "statuses": dict(statuses)}
+                for key, (histogram, statuses) in items
+            }
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump({"summary": self.report(), "histograms": self.to_dict()}, f, indent=2)
+
+    def print_table(self):
+        from utils import COLOR_SECONDARY, COLOR_SUCCESS, COLOR_WARN, printc # utils imports this module
+        report = self.report()
+        if not report:
+            return
+        printc("\n--- Latency profile (client-side, per route) ---", COLOR_SECONDARY)
+        printc(f"{'route':<38}{'count':>7}{'mean ms':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}  statuses", COLOR_SECONDARY)
+        for key, r in report.items():
+            statuses = ", ".join(f"{code}x{n}" for code, n in sorted(r["statuses"].items()))
+            line = (f"{key:<38}{r['count']:>7}{r['mean_ms']:>9.1f}{r['p50_ms']:>9.1f}"
+                    f"{r['p90_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}  {statuses}")
+            printc(line, COLOR_SUCCESS if all(code < "400" for code in r["statuses"]) else COLOR_WARN)
+
+# process-wide registry fed by utils.api_request...
+LATENCY = LatencyRegistry()
@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, COLOR_WARN, printc
+from user_tests import create_user_via_api, get_user_via_api, update_user_via_api
+from cleanup import CLEANUP
+from datagen import UserDataGenerator
+from loadgen import RouteStats, WorkerContext
+
+''' Write contention: concurrent PUT /users/{prevUsername} calls that race for the same names and powerunits '''
+
+DEFAULT_LEVELS = (1, 2, 4, 8, 16)
+
+# --- RACES ---
+# Each round creates fresh users (untimed), then releases all writers at once on one
+# race. The server may let at most one writer of a race win; anything else is a wrong
+# outcome. Losers must get 409 (name/powerunit taken) or 404 (source already renamed).
+
+def _same_target(round_users, targets):
+    """Every writer renames its own user to the same new username: one winner, or duplicate usernames."""
+    name = targets[0]["Username"]
+    return [(user["Username"], {**user, "Username": name}) for user in round_users]
+
+def _same_powerunit(round_users, targets):
+    """Every writer moves its own user to the same new powerunit: one winner, or duplicate powerunits."""
+    powerunit = targets[0]["Powerunit"]
+    return [(user["Username"], {**user, "Powerunit": powerunit}) for user in round_users]
+
+def _same_source(round_users, targets):
+    """Every writer renames the same user to its own new username: one winner, or lost updates."""
+    source = round_users[0]
+    return [(source["Username"], {**source, "Username": target["Username"]}) for target in targets]
+
+RACES = {
+    "same-target": _same_target,
+    "same-powerunit": _same_powerunit,
+    "same-source": _same_source,
+}
+
+# --- BENCHMARK ---
+
+class ContentionBench:
+    """
+    For each concurrency level N, runs `rounds` rounds of every race with N writers (each
+    its own dev-login session, like N admins) released together by a barrier, then checks
+    the outcome with GETs:
+
+      duplicate username    more than one rename to the same name succeeded
+      duplicate powerunit   more than one move to the same powerunit succeeded
+      lost update           a writer got 200 but its rename isn't what the server holds
+      unexpected status     a loser got something other than 404/409
+
+    Created users are registered with CLEANUP (and followed through renames), so they're
+    removed at the end of the run, or by the next run if this one dies.
+    """
+
+    def __init__(self, levels=DEFAULT_LEVELS, rounds=20, races=tuple(RACES), seed=0):
+        self.levels = list(levels)
+        self.rounds = rounds
+        self.races = list(races)
+        self.seed = seed
+        # one generator for users and rename targets alike, so nothing collides by accident...
+        self._users = UserDataGenerator(seed=seed, prefix="contend")
+        self._next_index = 0
+
+    def _take(self, count):
+        users = self._users.batch(self._next_index, count)
+        self._next_index += count
+        return users
+
+    def _fresh_users(self, admin, count):
+        users = self._take(count)
+        for user in users:
+            CLEANUP.track_user(user["Username"])
+            if create_user_via_api(admin.session, user).status_code != 201:
+                CLEANUP.forget_user(user["Username"])
+                raise Exception(f"Could not create contention user {user['Username']}.")
+        return users
+
+    def _race(self, writers, admin, race, stats):
+        """Runs one race, returns (writes, seconds from release to the last response, wrong outcomes)."""
+        round_users = self._fresh_users(admin, len(writers) if race != "same-source" else 1)
+        calls = RACES[race](round_users, self._take(len(writers)))
+
+        barrier = threading.Barrier(len(writers))
+        def _write(i):
+            prev_username, payload = calls[i]
+            barrier.wait()
+            start = time.perf_counter()
+            try:
+                response = update_user_via_api(writers[i].session, prev_username, payload)
+                status = response.status_code
+            except Exception:
+                status = "EXC"
+            stats.record(status, time.perf_counter() - start)
+            return status
+
+        with ThreadPoolExecutor(max_workers=len(writers)) as pool:
+            futures = [pool.submit(_write, i) for i in range(len(writers))]
+            start = time.perf_counter()
+            statuses = [future.result() for future in futures]
+            busy = time.perf_counter() - start
+
+        winners = [i for i, status in enumerate(statuses) if status == 200]
+        for i in winners:
+            CLEANUP.rename_user(calls[i][0], calls[i][1]["Username"])
+        outcome = {
+            "duplicate_username": 0, "duplicate_powerunit": 0, "lost_update": 0,
+            "unexpected_status": sum(status not in (200, 404, 409) for status in statuses),
+        }
+        if race == "same-target":
+            outcome["duplicate_username"] = max(0, len(winners) - 1)
+        elif race == "same-powerunit":
+            outcome["duplicate_powerunit"] = max(0, len(winners) - 1)
+        # every winner's write must be what the server holds now...
+        for i in winners:
+            payload = calls[i][1]
+            response = get_user_via_api(admin.session, payload["Username"])
+            if response.status_code != 200 or response.json().get("Powerunit") != payload["Powerunit"]:
+                outcome["lost_update"] += 1
+        return len(writers), busy, outcome
+
+    def run(self):
+        admin = WorkerContext(next_user=None)
+        points = []
+        try:
+            for level in self.levels:
+                writers = [WorkerContext(next_user=None) for _ in range(level)]
+                try:
+                    stats = RouteStats()
+                    totals = {"duplicate_username": 0, "duplicate_powerunit": 0, "lost_update": 0, "unexpected_status": 0}
+                    races = writes = bad_races = 0
+                    elapsed = 0.0 # racing time only, setup and verification excluded
+                    for _ in range(self.rounds):
+                        for race in self.races:
+                            count, busy, outcome = self._race(writers, admin, race, stats)
+                            races += 1
+                            writes += count
+                            elapsed += busy
+                            bad_races += any(outcome.values())
+                            for kind, n in outcome.items():
+                                totals[kind] += n
+                finally:
+                    for writer in writers:
+                        writer.close()
+                summary = stats.summary(elapsed)
+                point = {
+                    "writers": level,
+                    "races": races,
+                    "writes": writes,
+                    "throughput": summary["throughput"],
+                    "p50_ms": summary["p50_ms"],
+                    "p99_ms": summary["p99_ms"],
+                    "wrong_outcomes": totals,
+                    "wrong_rate": bad_races / races if races else 0.0, # share of races with any wrong outcome
+                }
+                print_point(point)
+                points.append(point)
+        finally:
+            admin.close()
+            CLEANUP.flush()
+        return {"rounds": self.rounds, "races": self.races, "points": points}
+
+def print_point(point):
+    wrong = {kind: n for kind, n in point["wrong_outcomes"].items() if n}
+    printc(
+        f"Contention: {point['writers']:>3} writers, {point['writes']} writes at {point['throughput']:.1f}/s, "
+        f"p50 {point['p50_ms']:.1f} ms, p99 {point['p99_ms']:.1f} ms, "
+        f"wrong outcomes {point['wrong_rate']:.1%} of races"
+        + (" (" + ", ".join(f"{kind.replace('_', ' ')} x{n}" for kind, n in wrong.items()) + ")" if wrong else ""),
+        COLOR_FAIL if wrong else COLOR_SUCCESS
+    )
+
+def run_bench_contention(json_path=None, **kwargs):
+    """Entry point for `run_tests.py bench-contention`, returns True if no race produced a wrong outcome."""
+    report = ContentionBench(**kwargs).run()
+    clean = all(point["wrong_rate"] == 0 for point in report["points"])
+    printc(
+        "No wrong outcomes at any concurrency." if clean else "Concurrent updates produced wrong outcomes, see above.",
+        COLOR_SUCCESS if clean else COLOR_WARN
+    )
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        printc(f"Contention report written to {json_path}", COLOR_SECONDARY)
+    return clean
@@ -0,0 +1,143 @@
+import json
+import urllib.parse
+
+from utils import (
+    BASE_API_URL, DEV_USERNAME, DEV_COMPANY, COLOR_DEFAULT, COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, COLOR_WARN,
+    printc, new_session, api_request, get_mappings_via_api, is_mapping_version
+)
+from sessions_tests import get_current_driver_via_api, return_session_via_api, logout_with_id_via_api
+from user_tests import get_user_via_api
+
+''' Header weight: request/response header and body bytes per call with JSON or versioned mapping cookies '''
+
+# The cookie format is the server's choice (Mappings:CookieFormat), so measure once per mode
+# and compare, eg:
+#
+#   python run_tests.py bench-headers --json headers-json.json
+#   Mappings__CookieFormat=ref python run_tests.py bench-headers --baseline headers-json.json
+
+FIELDS = ("request_header_bytes", "cookie_bytes", "response_header_bytes", "body_bytes")
+
+def _request_header_bytes(response):
+    """Request line and headers as sent (urllib3 adds Host itself, so it's counted here)."""
+    request = response.request
+    lines = [f"{request.method} {request.path_url} HTTP/1.1", f"Host: {urllib.parse.urlsplit(request.url).netloc}"]
+    lines += [f"{name}: {value}" for name, value in request.headers.items()]
+    return len("\r\n".join(lines).encode("latin-1", "replace")) + 4
+
+def _response_header_bytes(response):
+    """Status line and headers as received, every Set-Cookie on its own line."""
+    headers = getattr(response.raw, "headers", None) or response.headers
+    lines = [f"HTTP/1.1 {response.status_code} {response.reason or ''}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return len("\r\n".join(lines).encode("latin-1", "replace")) + 4
+
+def measure(response):
+    """Byte counts for one round trip."""
+    return {
+        "request_header_bytes": _request_header_bytes(response),
+        "cookie_bytes": len(response.request.headers.get("Cookie", "")),
+        "response_header_bytes": _response_header_bytes(response),
+        "body_bytes": len(response.content),
+    }
+
+class HeaderBench:
+    """
+    One dev-login session, then `samples` calls of each route an open portal makes:
+
+      GET /sessions/me                 carries the mapping cookies and echoes them in its body
+      GET /users/{username}            a plain authenticated read, only the cookies add up
+      POST /sessions/return/{userId}   a write, same cookies
+
+    With versioned cookies the session also resolves them once through GET /sessions/mappings
+    and revalidates that with its ETag (a 304 when nothing was renamed); both calls are
+    reported, as is the login itself, since that's where the cookies are set.
+    """
+
+    def __init__(self, samples=20, username=DEV_USERNAME, company=DEV_COMPANY):
+        self.samples = samples
+        self.username = username
+        self.company = company
+        self.failures = 0
+
+    def _record(self, routes, route, response, ok=(200,)):
+        if response.status_code not in ok:
+            self.failures += 1
+            printc(f"{route} answered {response.status_code}", COLOR_FAIL)
+        totals = routes.setdefault(route, {"requests": 0, **{field: 0 for field in FIELDS}})
+        totals["requests"] += 1
+        for field, value in measure(response).items():
+            totals[field] += value
+
+    def run(self):
+        routes = {}
+        session = new_session()
+        url = f"{BASE_API_URL}/sessions/dev-login?username={self.username}&company={self.company}"
+        login = api_request(session, "GET", url, route="/sessions/dev-login", allow_redirects=False)
+        self._record(routes, "GET /sessions/dev-login", login, ok=(302, 303, 307, 308))
+        mode = "ref" if is_mapping_version(session.cookies.get("company_mapping")) else "json"
+
+        if mode == "ref":
+            resolved = get_mappings_via_api(session)
+            self._record(routes, "GET /sessions/mappings", resolved)
+            revalidated = get_mappings_via_api(session, etag=resolved.headers.get("ETag"))
+            self._record(routes, "GET /sessions/mappings (If-None-Match)", revalidated, ok=(304,))
+
+        session_id = None
+        for _ in range(self.samples):
+            me = get_current_driver_via_api(session)
+            self._record(routes, "GET /sessions/me", me)
+            if me.status_code == 200:
+                session_id = me.json()["userId"]
+            self._record(routes, "GET /users/{username}", get_user_via_api(session, self.username))
+            if session_id is not None:
+                self._record(routes, "POST /sessions/return/{userId}", return_session_via_api(session, session_id))
+        # as stored by the client, percent-encoded the way the browser sends them back...
+        cookies = {name: len(session.cookies.get(name) or "") for name in ("company_mapping", "module_mapping")}
+        if session_id is not None:
+            logout_with_id_via_api(session, session_id)
+
+        # per-call averages, so runs with different --samples still compare...
+        for totals in routes.values():
+            for field in FIELDS:
+                totals[field] = totals[field] / totals["requests"]
+        return {"mode": mode, "samples": self.samples, "cookie_bytes": cookies, "routes": routes, "failures": self.failures}
+
+def print_report(report, baseline=None):
+    printc(f"\n--- Header weight, {report['mode']} mapping cookies, {report['samples']} calls per route ---", COLOR_SECONDARY)
+    cookies = report["cookie_bytes"]
+    printc(f"company_mapping {cookies['company_mapping']} bytes, module_mapping {cookies['module_mapping']} bytes", COLOR_SECONDARY)
+    if baseline:
+        before = baseline["cookie_bytes"]
+        printc(f"{baseline['mode']} baseline: company_mapping {before['company_mapping']} bytes, "
+               f"module_mapping {before['module_mapping']} bytes", COLOR_SECONDARY)
+
+    printc(f"{'route':<40}{'':<10}{'req hdr':>9}{'cookie':>9}{'resp hdr':>10}{'body':>9}", COLOR_SECONDARY)
+    for route, r in report["routes"].items():
+        before = (baseline or {}).get("routes", {}).get(route)
+        rows = [(baseline["mode"], before)] if before else []
+        for i, (label, row) in enumerate(rows + [(report["mode"], r)]):
+            printc(
+                f"{route if i == 0 else '':<40}{label:<10}{row['request_header_bytes']:>9.0f}"
+                f"{row['cookie_bytes']:>9.0f}{row['response_header_bytes']:>10.0f}{row['body_bytes']:>9.0f}",
+                COLOR_DEFAULT
+            )
+        if before:
+            sent = r["request_header_bytes"] - before["request_header_bytes"]
+            received = r["response_header_bytes"] + r["body_bytes"] - before["response_header_bytes"] - before["body_bytes"]
+            printc(f"{'':<40}request headers {sent:+.0f} bytes, response {received:+.0f} bytes per call",
+                   COLOR_SUCCESS if sent <= 0 else COLOR_WARN)
+
+def run_bench_headers(json_path=None, baseline_path=None, **kwargs):
+    """Entry point for `run_tests.py bench-headers`, returns True if every call got its expected status."""
+    report = HeaderBench(**kwargs).run()
+    baseline = None
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        printc(f"Header report written to {json_path}", COLOR_SECONDARY)
+    return not report["failures"]
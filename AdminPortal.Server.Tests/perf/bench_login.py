@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import (
+    BASE_API_URL, DEV_USERNAME, DEV_COMPANY, COLOR_DEFAULT, COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, COLOR_WARN,
+    printc, new_session, api_request
+)
+from sessions_tests import get_current_driver_via_api, logout_with_id_via_api, return_session_via_api
+from loadgen import RouteStats, WorkerContext
+from bench_sessions import _measure
+
+''' Session write paths: dev-login (token issue, SESSIONS insert, mappings) and return/{userId} (SESSIONS update) '''
+
+ROUTES = ("GET /sessions/dev-login", "POST /sessions/return/{userId}")
+
+def _dev_login(username, company):
+    session = new_session()
+    url = f"{BASE_API_URL}/sessions/dev-login?username={username}&company={company}"
+    response = api_request(session, "GET", url, route="/sessions/dev-login", allow_redirects=False)
+    return session, response.status_code
+
+def _logout(session):
+    me = get_current_driver_via_api(session)
+    if me.status_code == 200:
+        logout_with_id_via_api(session, me.json()["userId"])
+
+class LoginBench:
+    """
+    Closed loop: `concurrency` clients call one route back to back for `duration` seconds
+    after `warmup` seconds, route after route.
+
+      GET /sessions/dev-login          each call opens a new session; only the login is
+                                       timed, the sessions are logged out once the clock
+                                       stops so the cleanup neither counts nor competes
+      POST /sessions/return/{userId}   each client refreshes its own session row
+
+    Run it once per server build with --json and hand the first report to the second run
+    as --baseline to get the before/after comparison.
+    """
+
+    def __init__(self, duration=20.0, warmup=2.0, concurrency=8, routes=ROUTES, username=DEV_USERNAME, company=DEV_COMPANY):
+        unknown = [route for route in routes if route not in ROUTES]
+        if unknown:
+            raise ValueError(f"Unknown route(s) {', '.join(unknown)}, expected some of: {', '.join(ROUTES)}")
+        self.duration = duration
+        self.warmup = warmup
+        self.concurrency = concurrency
+        self.routes = list(routes)
+        self.username = username
+        self.company = company
+
+    def _logins(self):
+        stats = RouteStats()
+        sessions, lock = [], threading.Lock()
+        stop_warmup = time.perf_counter() + self.warmup
+        stop_at = stop_warmup + self.duration
+
+        def _loop():
+            while True:
+                start = time.perf_counter()
+                if start >= stop_at:
+                    return
+                try:
+                    session, status = _dev_login(self.username, self.company)
+                    with lock:
+                        sessions.append(session)
+                except Exception:
+                    status = "EXC"
+                if start >= stop_warmup:
+                    stats.record(status, time.perf_counter() - start)
+
+        threads = [threading.Thread(target=_loop, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # every login left a SESSIONS row behind...
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(_logout, sessions))
+        return stats
+
+    def _returns(self):
+        contexts = [WorkerContext(next_user=None) for _ in range(self.concurrency)]
+        try:
+            return _measure(contexts, lambda ctx: return_session_via_api(ctx.session, ctx.session_id), self.duration, self.warmup)
+        finally:
+            for ctx in contexts:
+                ctx.close()
+
+    def run(self):
+        measure = {ROUTES[0]: self._logins, ROUTES[1]: self._returns}
+        routes = {}
+        for route in self.routes:
+            summary = measure[route]().summary(self.duration)
+            routes[route] = {key: summary[key] for key in ("count", "throughput", "p50_ms", "p95_ms", "p99_ms", "max_ms", "errors")}
+        return {"concurrency": self.concurrency, "duration": self.duration, "routes": routes}
+
+def print_report(report, baseline=None):
+    printc(f"\n--- Session writes, {report['concurrency']} clients for {report['duration']:.0f}s per route ---", COLOR_SECONDARY)
+    printc(f"{'route':<34}{'':<10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  errors", COLOR_SECONDARY)
+    for route, r in report["routes"].items():
+        before = (baseline or {}).get("routes", {}).get(route)
+        rows = [("baseline", before)] if before else []
+        for label, row in rows + [("this run", r)]:
+            errors = ", ".join(f"{code}x{n}" for code, n in sorted(row["errors"].items())) or "-"
+            printc(
+                f"{route if label == 'baseline' or not before else '':<34}{label:<10}{row['throughput']:>9.1f}{row['p50_ms']:>9.1f}"
+                f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}  {errors}",
+                COLOR_FAIL if row["errors"] else COLOR_DEFAULT
+            )
+        if before and before["throughput"]:
+            change = r["throughput"] / before["throughput"] - 1
+            printc(f"{'':<34}throughput {change:+.1%}, p50 {r['p50_ms'] - before['p50_ms']:+.1f} ms, "
+                   f"p99 {r['p99_ms'] - before['p99_ms']:+.1f} ms", COLOR_SUCCESS if change >= 0 else COLOR_WARN)
+
+def run_bench_login(json_path=None, baseline_path=None, **kwargs):
+    """Entry point for `run_tests.py bench-login`, returns True if no request failed."""
+    report = LoginBench(**kwargs).run()
+    baseline = None
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        printc(f"Session write report written to {json_path}", COLOR_SECONDARY)
+    return not any(r["errors"] for r in report["routes"].values())
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import threading
+import time
+
+from utils import COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, printc
+from sessions_tests import get_current_driver_via_api, return_session_via_api
+from loadgen import RouteStats, WorkerContext
+from seed import SeedCheckpoint, seed_tables
+
+''' Latency/throughput of session validation as the SESSIONS table grows '''
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+# route template -> callable(ctx), both look the session up by (username, access, refresh) or id...
+ROUTES = {
+    "GET /sessions/me": lambda ctx: get_current_driver_via_api(ctx.session),
+    "POST /sessions/return/{userId}": lambda ctx: return_session_via_api(ctx.session, ctx.session_id),
+}
+
+def _measure(contexts, call, duration, warmup):
+    """Closed loop: every context calls `call` back to back for `duration` seconds, returns RouteStats."""
+    stats = RouteStats()
+    stop_warmup = time.perf_counter() + warmup
+    stop_at = stop_warmup + duration
+
+    def _loop(ctx):
+        while True:
+            start = time.perf_counter()
+            if start >= stop_at:
+                return
+            try:
+                status = call(ctx).status_code
+            except Exception:
+                status = "EXC"
+            if start >= stop_warmup:
+                stats.record(status, time.perf_counter() - start)
+
+    threads = [threading.Thread(target=_loop, args=(ctx,), daemon=True) for ctx in contexts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats
+
+class SessionScalingBench:
+    """
+    Grows SESSIONS to each size in turn (through the resumable seed command, so the
+    rows persist between steps and across runs) and measures GET /sessions/me and
+    POST /sessions/return/{userId} at that size with `concurrency` logged-in clients.
+
+    Sizes count the seeded sessions only, whatever the table held before comes on top.
+    Dev-login inserts a row per login and nothing deletes them besides logout/{userId}
+    (which sweeps 30 minute idle rows when it misses), so keep benchmark runs apart from
+    functional runs that log out with stale ids.
+    """
+
+    def __init__(self, sizes=DEFAULT_SIZES, users=1000, duration=20.0, warmup=2.0, concurrency=8,
+                 budget_ms=None, seed=0, prefix="seed", batch_size=500, seed_concurrency=64):
+        self.sizes = sorted(sizes)
+        self.users = users
+        self.duration = duration
+        self.warmup = warmup
+        self.concurrency = concurrency
+        self.budget_ms = budget_ms
+        self.seed = seed
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.seed_concurrency = seed_concurrency
+
+    def _grow(self, size):
+        ok = asyncio.run(seed_tables(self.users, size, self.seed, self.prefix, self.batch_size, self.seed_concurrency))
+        if not ok:
+            raise Exception(f"Seeding SESSIONS to {size} rows failed, see above (rerun to resume).")
+        return len(SeedCheckpoint().session_ids)
+
+    def run(self):
+        points = []
+        for size in self.sizes:
+            seeded = self._grow(size)
+            contexts = [WorkerContext(next_user=None) for _ in range(self.concurrency)]
+            try:
+                routes = {}
+                for route, call in ROUTES.items():
+                    stats = _measure(contexts, call, self.duration, self.warmup)
+                    routes[route] = stats.summary(self.duration)
+            finally:
+                for ctx in contexts:
+                    ctx.close()
+            point = {"size": size, "seeded_sessions": seeded, "routes": routes}
+            print_point(point, self.budget_ms)
+            points.append(point)
+        return {
+            "concurrency": self.concurrency,
+            "duration": self.duration,
+            "budget_ms": self.budget_ms,
+            "points": points,
+            "first_over_budget": first_over_budget(points, self.budget_ms),
+        }
+
+def first_over_budget(points, budget_ms):
+    """Smallest size at which any route's p99 exceeds `budget_ms`, None if all stay within it."""
+    if budget_ms is None:
+        return None
+    for point in points:
+        if any(r["p99_ms"] > budget_ms or r["errors"] for r in point["routes"].values()):
+            return point["size"]
+    return None
+
+def print_point(point, budget_ms=None):
+    printc(f"\n--- SESSIONS ~{point['size']} rows ({point['seeded_sessions']} seeded) ---", COLOR_SECONDARY)
+    printc(f"{'route':<34}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  errors", COLOR_SECONDARY)
+    for route, r in point["routes"].items():
+        errors = ", ".join(f"{code}x{n}" for code, n in sorted(r["errors"].items())) or "-"
+        over = budget_ms is not None and r["p99_ms"] > budget_ms
+        printc(
+            f"{route:<34}{r['throughput']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}  {errors}",
+            COLOR_FAIL if over or r["errors"] else COLOR_SUCCESS
+        )
+
+def print_curve(report):
+    """p99 per route against table size, one row per size."""
+    routes = list(ROUTES)
+    printc("\n--- p99 ms vs SESSIONS size ---", COLOR_SECONDARY)
+    printc(f"{'size':>10}" + "".join(f"{route:>34}" for route in routes), COLOR_SECONDARY)
+    for point in report["points"]:
+        printc(f"{point['size']:>10}" + "".join(f"{point['routes'][route]['p99_ms']:>34.1f}" for route in routes))
+    if report["budget_ms"] is not None:
+        size = report["first_over_budget"]
+        if size is None:
+            printc(f"Every size stayed within the {report['budget_ms']:.0f} ms p99 budget.", COLOR_SUCCESS)
+        else:
+            printc(f"p99 budget of {report['budget_ms']:.0f} ms first exceeded at ~{size} rows.", COLOR_FAIL)
+
+def run_bench_sessions(sizes=DEFAULT_SIZES, json_path=None, **kwargs):
+    """Entry point for `run_tests.py bench-sessions`, returns True if every size met the budget."""
+    report = SessionScalingBench(sizes, **kwargs).run()
+    print_curve(report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        printc(f"Session scaling report written to {json_path}", COLOR_SECONDARY)
+    return report["first_over_budget"] is None
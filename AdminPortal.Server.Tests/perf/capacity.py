@@ -0,0 +1,167 @@
+import json
+
+from utils import COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, COLOR_WARN, printc, login_via_api
+from user_tests import update_user_via_api
+from sessions_tests import get_current_driver_via_api, logout_with_id_via_api
+from loadgen import DEFAULT_MIX, LoadRun, _create_user
+from journeys import JOURNEYS, journey_mix
+
+''' Capacity search: step the arrival rate up until the latency/error curve bends, report the knee '''
+
+# --- SCENARIOS ---
+
+def _own_user(ctx):
+    """A user this worker created for itself (deleted by WorkerContext.close), None if creating it failed."""
+    user = getattr(ctx, "own_user", None)
+    if user is None:
+        user = ctx.next_user()
+        if _create_user(ctx, user).status_code != 201:
+            return None
+        ctx.own_user = user
+    return user
+
+def _admin_session(ctx):
+    """dev-login -> GET /sessions/me -> PUT /users/{username} -> POST /sessions/logout/{userId}, as one request."""
+    user = _own_user(ctx)
+    if user is None:
+        raise Exception("Could not create the scenario's user.")
+    session = login_via_api()
+    if session is None:
+        raise Exception("Dev login failed.")
+    me = get_current_driver_via_api(session)
+    if me.status_code != 200:
+        return me
+    try:
+        # rotate the active company so every update is a real write...
+        companies = user["Companies"]
+        user["ActiveCompany"] = companies[(companies.index(user["ActiveCompany"]) + 1) % len(companies)]
+        return update_user_via_api(session, user["Username"], user)
+    finally:
+        logout_with_id_via_api(session, me.json()["userId"])
+
+# name -> (load mix, extra route callables)
+SCENARIOS = {
+    "admin-session": ({"admin-session": 1}, {"admin-session": _admin_session}),
+    "read-mostly": ({"GET /sessions/me": 5, "GET /users/{username}": 3, "POST /sessions/return/{userId}": 1}, {}),
+    "default-mix": (DEFAULT_MIX, {}),
+    "journeys": journey_mix(JOURNEYS),
+}
+
+# --- SEARCH ---
+
+class CapacitySearch:
+    """
+    Runs open-loop load steps (see loadgen.LoadRun) at geometrically increasing arrival
+    rates until a step breaks the SLO (p99 from the scheduled send time, or error rate) or
+    stops keeping up (achieved throughput under `min_efficiency` of the offered rate). The
+    rate between the last good and first bad step is then bisected `refine` times.
+
+    The capacity is the achieved throughput of the best step that met the SLO. Steps that
+    fell behind schedule with low service times are flagged: there the workers, not the
+    server, ran out, and --concurrency must go up for the result to mean anything.
+    """
+
+    def __init__(self, scenario="admin-session", start_rate=5.0, growth=1.5, max_rate=5000.0, step_duration=20.0,
+                 concurrency=32, slo_p99_ms=500.0, slo_error_rate=0.01, min_efficiency=0.95, refine=2,
+                 arrival="poisson", seed=None):
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{scenario}', expected one of: {', '.join(SCENARIOS)}")
+        self.scenario = scenario
+        self.start_rate = start_rate
+        self.growth = growth
+        self.max_rate = max_rate
+        self.step_duration = step_duration
+        self.concurrency = concurrency
+        self.slo_p99_ms = slo_p99_ms
+        self.slo_error_rate = slo_error_rate
+        self.min_efficiency = min_efficiency
+        self.refine = refine
+        self.arrival = arrival
+        self.seed = seed
+        self.steps = []
+
+    def _step(self, rate):
+        mix, routes = SCENARIOS[self.scenario]
+        run = LoadRun(mix=mix, routes=routes, rate=rate, duration=self.step_duration,
+                      concurrency=self.concurrency, seed=self.seed, arrival=self.arrival)
+        report = run.run()
+        overall = report["overall"]
+        step = {
+            "offered_rate": rate,
+            "throughput": overall["throughput"],
+            "p99_ms": overall["p99_ms"],
+            "service_p99_ms": overall["service_p99_ms"],
+            "error_rate": overall["error_rate"],
+            "max_send_lag_ms": report["max_send_lag_ms"],
+        }
+        step["meets_slo"] = step["p99_ms"] <= self.slo_p99_ms and step["error_rate"] <= self.slo_error_rate
+        step["keeps_up"] = step["throughput"] >= self.min_efficiency * rate
+        # behind schedule although the server answered quickly: out of workers...
+        step["client_bound"] = not step["keeps_up"] and step["service_p99_ms"] <= self.slo_p99_ms
+        self.steps.append(step)
+        print_step(step)
+        return step
+
+    def run(self):
+        good, bad = None, None
+        rate = self.start_rate
+        while rate <= self.max_rate:
+            step = self._step(rate)
+            if step["meets_slo"] and step["keeps_up"]:
+                good = step
+                rate *= self.growth
+            else:
+                bad = step
+                break
+
+        if good is not None and bad is not None:
+            low, high = good["offered_rate"], bad["offered_rate"]
+            for _ in range(self.refine):
+                step = self._step((low + high) / 2)
+                if step["meets_slo"] and step["keeps_up"]:
+                    good, low = step, step["offered_rate"]
+                else:
+                    high = step["offered_rate"]
+
+        return {
+            "scenario": self.scenario,
+            "slo": {"p99_ms": self.slo_p99_ms, "error_rate": self.slo_error_rate},
+            "concurrency": self.concurrency,
+            "capacity": good["throughput"] if good else 0.0,
+            "capacity_offered_rate": good["offered_rate"] if good else None,
+            "knee_reached": bad is not None,
+            "client_bound": any(step["client_bound"] for step in self.steps),
+            "steps": self.steps,
+        }
+
+def print_step(step):
+    status = "ok" if step["meets_slo"] and step["keeps_up"] else ("slo" if not step["meets_slo"] else "behind")
+    printc(
+        f"Capacity step: offered {step['offered_rate']:.1f}/s -> {step['throughput']:.1f}/s, "
+        f"p99 {step['p99_ms']:.1f} ms (svc {step['service_p99_ms']:.1f}), errors {step['error_rate']:.2%} [{status}]",
+        COLOR_SUCCESS if status == "ok" else COLOR_WARN
+    )
+
+def print_capacity_report(report):
+    printc(f"\n--- Capacity: {report['scenario']} (p99 <= {report['slo']['p99_ms']:.0f} ms, "
+           f"errors <= {report['slo']['error_rate']:.1%}) ---", COLOR_SECONDARY)
+    if report["capacity_offered_rate"] is None:
+        printc("Not even the first step met the SLO, lower --start-rate.", COLOR_FAIL)
+    else:
+        printc(f"Highest sustainable throughput: {report['capacity']:.1f} {report['scenario']}/s "
+               f"(offered {report['capacity_offered_rate']:.1f}/s)", COLOR_SUCCESS)
+    if not report["knee_reached"]:
+        printc("The knee was not reached before --max-rate, capacity is a lower bound.", COLOR_WARN)
+    if report["client_bound"]:
+        printc(f"Some steps fell behind with fast responses: the {report['concurrency']} workers were the limit, "
+               f"raise --concurrency.", COLOR_WARN)
+
+def run_capacity(json_path=None, **kwargs):
+    """Entry point for `run_tests.py capacity`, returns True if some step met the SLO."""
+    report = CapacitySearch(**kwargs).run()
+    print_capacity_report(report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        printc(f"Capacity report written to {json_path}", COLOR_SECONDARY)
+    return report["capacity_offered_rate"] is not None
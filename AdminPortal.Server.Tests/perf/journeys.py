@@ -0,0 +1,195 @@
+import random
+import runpy
+import time
+
+from utils import (
+    BASE_API_URL, DEV_USERNAME, DEV_COMPANY,
+    new_session, api_request
+)
+from user_tests import create_user_via_api, get_user_via_api, update_user_via_api, delete_user_via_api
+from sessions_tests import get_current_driver_via_api, return_session_via_api, logout_with_id_via_api
+from company_tests import update_company_via_api
+
+''' Weighted user journeys: the *_via_api helpers composed into multi-step scenarios for load runs '''
+
+# --- DSL ---
+
+class JourneyStepFailed(Exception):
+    """A step answered with a status its journey didn't expect."""
+
+class JourneyVars:
+    """
+    What the steps of one journey run share: the worker context (`ctx`), the session the
+    steps use (the worker's own unless a step logs in) and whatever earlier steps saved.
+    """
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.session = ctx.session
+        self.session_id = ctx.session_id
+
+    def has(self, *names):
+        return all(getattr(self, name, None) is not None for name in names)
+
+    def new_user(self):
+        """Next generated user payload of the run (see datagen), kept as `user` for later steps."""
+        self.user = self.ctx.next_user()
+        return self.user
+
+class Step:
+    """
+    One request of a journey.
+
+        step("GET /sessions/me", lambda v: get_current_driver_via_api(v.session),
+             save={"session_id": json_field("userId")})
+
+    `call(v)` sends the request through a helper and returns its response; a status outside
+    `expect` ends the journey. `save` maps variable names to extractors `(response) -> value`
+    stored on the journey's vars. Steps marked `always` still run after a failure (logout,
+    deletes), but only once the variables in `needs` exist.
+    """
+
+    def __init__(self, route, call, expect=(200,), save=None, always=False, needs=()):
+        self.route = route
+        self.call = call
+        self.expect = (expect,) if isinstance(expect, int) else tuple(expect)
+        self.save = save or {}
+        self.always = always
+        self.needs = tuple(needs)
+
+step = Step
+
+def json_field(name):
+    """Extractor for `save`: a top-level field of the JSON response body."""
+    return lambda response: response.json()[name]
+
+class Journey:
+    """
+    A named, weighted sequence of steps. Journeys are picked by weight like load mix routes
+    and each pick runs every step in order on one worker, optionally pausing `think`
+    seconds (a number or a (min, max) range) between steps like an admin reading the page.
+    """
+
+    def __init__(self, name, steps, weight=1.0, think=0.0):
+        self.name = name
+        self.steps = list(steps)
+        self.weight = weight
+        self.think = think if isinstance(think, tuple) else (think, think)
+        self._random = random.Random()
+
+    @property
+    def route(self):
+        return f"journey:{self.name}"
+
+    def run(self, ctx):
+        """Runs the journey for a loadgen.WorkerContext; the journey's overall result is its last response."""
+        v = JourneyVars(ctx)
+        record = getattr(ctx, "record_step", None)
+        failed, result = False, None
+        for index, s in enumerate(self.steps):
+            if failed and not s.always:
+                continue
+            if s.needs and not v.has(*s.needs):
+                continue
+            if index and self.think[1] > 0:
+                time.sleep(self._random.uniform(*self.think))
+
+            start, error = time.perf_counter(), None
+            try:
+                response = s.call(v)
+                status = response.status_code
+            except Exception as e:
+                response, status = None, "EXC"
+                error = e
+            if record:
+                record(s.route, status, time.perf_counter() - start)
+
+            if response is None:
+                if not failed:
+                    failed, result = True, error
+                continue
+            if status not in s.expect:
+                if not failed:
+                    failed, result = True, response
+                continue
+            for name, extract in s.save.items():
+                setattr(v, name, extract(response))
+            if not failed:
+                result = response
+
+        if isinstance(result, Exception):
+            raise result
+        if failed and result.status_code < 400:
+            raise JourneyStepFailed(f"{self.name}: unexpected {result.status_code} from {result.request.method} {result.url}")
+        return result, self.route
+
+def journey_mix(journeys):
+    """(load mix, route callables) to hand to loadgen.LoadRun."""
+    return {j.route: j.weight for j in journeys}, {j.route: j.run for j in journeys}
+
+def load_journeys(path):
+    """The JOURNEYS list defined by a Python scenario file."""
+    namespace = runpy.run_path(path)
+    if "JOURNEYS" not in namespace:
+        raise ValueError(f"{path} does not define JOURNEYS.")
+    return namespace["JOURNEYS"]
+
+# --- BUILDING BLOCKS ---
+
+def _dev_login(v, username=None, company=None):
+    # a fresh session (and SESSIONS row), like an admin opening the portal...
+    v.session, v.session_id = new_session(), None # the worker's session id isn't this session's
+    username = username or getattr(v.ctx, "username", DEV_USERNAME)
+    company = company or getattr(v.ctx, "company", DEV_COMPANY)
+    url = f"{BASE_API_URL}/sessions/dev-login?username={username}&company={company}"
+    return api_request(v.session, "GET", url, route="/sessions/dev-login", allow_redirects=False)
+
+def login(username=None, company=None):
+    """Dev-login into a new session that the following steps use (as the worker's tenant by default)."""
+    return step("GET /sessions/dev-login", lambda v: _dev_login(v, username, company), expect=(302, 303, 307, 308))
+
+def me():
+    """GET /sessions/me, saves `session_id` for return/logout."""
+    return step("GET /sessions/me", lambda v: get_current_driver_via_api(v.session), save={"session_id": json_field("userId")})
+
+def logout():
+    """Ends the session a login() step opened (runs even if the journey failed)."""
+    return step("POST /sessions/logout/{userId}", lambda v: logout_with_id_via_api(v.session, v.session_id),
+                always=True, needs=("session_id",))
+
+# --- DEFAULT JOURNEYS ---
+
+def _renamed(v):
+    # a real write that keeps the generated username/powerunit unique...
+    companies = v.user["Companies"]
+    v.user["ActiveCompany"] = companies[(companies.index(v.user["ActiveCompany"]) + 1) % len(companies)]
+    return v.user
+
+JOURNEYS = [
+    # an admin opens the portal, checks who's logged in and leaves...
+    Journey("sign-in", weight=2, steps=[
+        login(),
+        me(),
+        step("POST /sessions/return/{userId}", lambda v: return_session_via_api(v.session, v.session_id)),
+        logout(),
+    ]),
+    # the common case: look someone up from an open session...
+    Journey("look-up-user", weight=6, steps=[
+        me(),
+        step("GET /users/{username}", lambda v: get_user_via_api(v.session, DEV_USERNAME)),
+    ]),
+    # onboard a driver, fix their record, offboard them...
+    Journey("edit-user", weight=2, steps=[
+        step("POST /users", lambda v: create_user_via_api(v.session, v.new_user()), expect=201,
+             save={"username": json_field("Username")}),
+        step("GET /users/{username}", lambda v: get_user_via_api(v.session, v.username)),
+        step("PUT /users/{prevUsername}", lambda v: update_user_via_api(v.session, v.username, _renamed(v))),
+        step("DELETE /users/{username}", lambda v: delete_user_via_api(v.session, v.username), expect=204,
+             always=True, needs=("username",)),
+    ]),
+    # rare: a company display name edit (to its current name, so the data stays put)...
+    Journey("rename-company", weight=0.2, steps=[
+        me(),
+        step("PUT /companies/{newName}", lambda v: update_company_via_api(v.session, v.ctx.company_name)),
+    ]),
+]
@@ -0,0 +1,373 @@
+import itertools
+import json
+import queue
+import random
+import threading
+import time
+from collections import Counter
+
+from utils import (
+    COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, COLOR_WARN,
+    DEV_USERNAME, DEV_COMPANY, DEV_COMPANY_NAME,
+    printc, get_authenticated_session, release_session, login_via_api, mapping_from_cookie
+)
+from user_tests import create_user_via_api, get_user_via_api, delete_user_via_api
+from sessions_tests import get_current_driver_via_api, return_session_via_api, logout_with_id_via_api
+from company_tests import update_company_via_api
+from datagen import UserDataGenerator, mappings_from_session
+from latency import LatencyHistogram
+from token_refresh import TOKEN_REFRESHER
+
+''' Rate-driven load generation against the v1 API using the existing endpoint helpers '''
+
+# --- LATENCY/ERROR BOOKKEEPING ---
+
+class RouteStats:
+    """
+    Latency histograms and status codes collected for one route, safe to update from worker threads.
+
+    `latencies` are measured from when the request was due to be sent (its place in the arrival
+    schedule), `service` from when it actually went out. In an open-loop run a slow response
+    delays the requests queued behind it; measuring from the due time keeps that wait in the
+    numbers instead of silently omitting it (coordinated omission). Closed-loop callers pass
+    no due time and both histograms hold the same samples.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.statuses = Counter()
+
+    def record(self, status, seconds, corrected=None):
+        with self._lock:
+            self.latencies.record(seconds if corrected is None else corrected)
+            self.service.record(seconds)
+            self.statuses[status] += 1
+
+    def summary(self, elapsed):
+        with self._lock:
+            latencies = LatencyHistogram().merge(self.latencies)
+            service = LatencyHistogram().merge(self.service)
+            statuses = dict(self.statuses)
+        count = latencies.count
+        errors = {str(code): n for code, n in statuses.items() if code == "EXC" or code >= 400}
+        return {
+            "count": count,
+            "throughput": count / elapsed if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": sum(errors.values()) / count if count else 0.0,
+            "p50_ms": latencies.percentile(50) * 1000,
+            "p95_ms": latencies.percentile(95) * 1000,
+            "p99_ms": latencies.percentile(99) * 1000,
+            "max_ms": latencies.max_us / 1000,
+            "service_p50_ms": service.percentile(50) * 1000,
+            "service_p99_ms": service.percentile(99) * 1000,
+        }
+
+# --- ROUTES ---
+
+class WorkerContext:
+    """
+    Per-thread state: the tenant (username, company) it works for, an authenticated session,
+    its SESSIONS id, users it created and the run's shared source of new user payloads.
+    The session is handed to TOKEN_REFRESHER, so runs longer than the 15 minute access
+    token life keep going instead of hitting a wall of 401s.
+    """
+
+    def __init__(self, next_user, username=DEV_USERNAME, company=DEV_COMPANY):
+        self.next_user = next_user
+        self.username = username
+        self.company = company
+        self.session = get_authenticated_session(username, company)
+        if self.session is None:
+            raise Exception(f"Dev login failed for {username} ({company}), cannot generate load.")
+        # the tenant's current display name, renaming the company to it leaves the data as it was...
+        self.company_name = (mapping_from_cookie(self.session, "company_mapping") or {}).get(company, DEV_COMPANY_NAME)
+        me = get_current_driver_via_api(self.session)
+        self.session_id = me.json().get("userId") if me.status_code == 200 else 0
+        TOKEN_REFRESHER.watch(self.session, username, company, on_refresh=self._refreshed)
+        self.created_users = []
+
+    def _refreshed(self, session_id):
+        # a refresh is a new login, return/logout must address its row from now on...
+        self.session_id = session_id
+
+    def close(self):
+        TOKEN_REFRESHER.unwatch(self.session)
+        for username in self.created_users:
+            delete_user_via_api(self.session, username)
+        self.created_users.clear()
+        if self.session_id:
+            logout_with_id_via_api(self.session, self.session_id)
+        release_session(self.session, dirty=True)
+
+def _create_user(ctx, user_data=None):
+    user_data = user_data or ctx.next_user()
+    response = create_user_via_api(ctx.session, user_data)
+    if response.status_code == 201:
+        ctx.created_users.append(user_data["Username"])
+    return response
+
+def _delete_user(ctx):
+    if not ctx.created_users:
+        return _create_user(ctx), "POST /users" # nothing to delete yet, create instead...
+    return delete_user_via_api(ctx.session, ctx.created_users.pop())
+
+# route template -> callable(ctx) returning a response (or (response, actual route))
+ROUTES = {
+    "GET /sessions/me": lambda ctx: get_current_driver_via_api(ctx.session),
+    "POST /sessions/return/{userId}": lambda ctx: return_session_via_api(ctx.session, ctx.session_id),
+    "GET /users/{username}": lambda ctx: get_user_via_api(ctx.session, DEV_USERNAME),
+    "POST /users": _create_user,
+    "DELETE /users/{username}": _delete_user,
+    # renames the worker's company to its current name, exercises the write path without changing data...
+    "PUT /companies/{newName}": lambda ctx: update_company_via_api(ctx.session, ctx.company_name),
+}
+
+DEFAULT_MIX = {
+    "GET /sessions/me": 5,
+    "GET /users/{username}": 3,
+    "POST /sessions/return/{userId}": 1,
+    "POST /users": 1,
+    "DELETE /users/{username}": 1,
+    "PUT /companies/{newName}": 1,
+}
+
+# --- ENGINE ---
+
+class LoadRun:
+    """
+    Issues requests at a target rate for a fixed duration, open loop. A pacer thread
+    releases tickets on an arrival schedule, either every 1/rate seconds ("fixed") or with
+    exponential gaps averaging 1/rate ("poisson"), whether or not earlier requests have
+    completed. `concurrency` worker threads (each with its own dev-login session) turn
+    tickets into helper calls, picking routes by weight.
+
+    With several `tenants` ((username, company) pairs) the workers are split evenly between
+    them and tickets go to each tenant in turn through its own queue, so every tenant is
+    offered the same rate and a slow one can't hand its share to the others; latencies
+    are then also reported per tenant.
+
+    Each ticket carries its due time and latencies are reported from it (see RouteStats),
+    so when the server stalls, the requests piling up behind the stall are counted as
+    slow rather than as never sent. `late_requests`/`max_send_lag_ms` show how far sending
+    fell behind schedule; a large lag with low service times means the worker pool, not
+    the server, was the bottleneck and --concurrency should go up.
+    """
+
+    ARRIVALS = ("fixed", "poisson")
+    LATE_AFTER = 0.010 # seconds behind schedule before a send counts as late
+
+    def __init__(self, mix=None, rate=20.0, duration=30.0, concurrency=16, seed=None, arrival="fixed", routes=None,
+                 tenants=None):
+        if arrival not in self.ARRIVALS:
+            raise ValueError(f"Unknown arrival schedule '{arrival}', expected one of: {', '.join(self.ARRIVALS)}")
+        self.routes = {**ROUTES, **(routes or {})} # extra callables, eg: capacity.SCENARIOS
+        self.mix = dict(mix or DEFAULT_MIX)
+        unknown = set(self.mix) - set(self.routes)
+        if unknown:
+            raise ValueError(f"Unknown route(s) in load mix: {', '.join(sorted(unknown))}")
+        self.rate = rate
+        self.duration = duration
+        self.tenants = list(tenants or [(DEV_USERNAME, DEV_COMPANY)])
+        self.concurrency = max(concurrency, len(self.tenants)) # at least one worker per tenant
+        self.arrival = arrival
+        self.stats = {route: RouteStats() for route in self.mix}
+        self._routes = list(self.mix)
+        self._weights = [self.mix[route] for route in self._routes]
+        self._random = random.Random(seed)
+        # one generator for all workers, the same seed creates the same users in the same order...
+        self.users = UserDataGenerator(seed=self._random.getrandbits(32), prefix="load")
+        self._user_index = itertools.count() # next() on a count is atomic under the GIL
+        self._tickets = {tenant: queue.Queue() for tenant in self.tenants}
+        self.tenant_stats = {tenant: RouteStats() for tenant in self.tenants}
+        self.mapping_bytes = {}
+        self._lag_lock = threading.Lock()
+        self.late_requests = 0
+        self.max_send_lag = 0.0
+        self.elapsed = 0.0
+
+    def _next_gap(self):
+        if self.arrival == "poisson":
+            return self._random.expovariate(self.rate)
+        return 1.0 / self.rate
+
+    def _pace(self, stop_at):
+        # the schedule advances from due times, never from "now", so a late pacer catches up...
+        next_at = time.perf_counter()
+        tenants = itertools.cycle(self.tenants)
+        while next_at < stop_at:
+            now = time.perf_counter()
+            if next_at > now:
+                time.sleep(next_at - now)
+            self._tickets[next(tenants)].put((self._random.choices(self._routes, self._weights)[0], next_at))
+            next_at += self._next_gap()
+        for i in range(self.concurrency):
+            self._tickets[self._tenant_of(i)].put(None)
+
+    def _tenant_of(self, worker):
+        return self.tenants[worker % len(self.tenants)]
+
+    def _work(self, worker, ready):
+        tenant = self._tenant_of(worker)
+        tickets = self._tickets[tenant]
+        try:
+            ctx = WorkerContext(lambda: self.users.user(next(self._user_index)), *tenant)
+            ctx.record_step = self._record_step # multi-request routes (journeys) time their own steps...
+            self.mapping_bytes[tenant] = len(ctx.session.cookies.get("company_mapping") or "")
+        except Exception as e:
+            printc(f"Load worker failed to start: {e}", COLOR_FAIL)
+            ready.wait()
+            return
+        ready.wait()
+        try:
+            while True:
+                ticket = tickets.get()
+                if ticket is None:
+                    break
+                route, due = ticket
+                start = time.perf_counter()
+                self._note_lag(start - due)
+                try:
+                    result = self.routes[route](ctx)
+                    response, actual_route = result if isinstance(result, tuple) else (result, route)
+                    status = response.status_code
+                except Exception:
+                    actual_route, status = route, "EXC"
+                end = time.perf_counter()
+                self.stats.setdefault(actual_route, RouteStats()).record(status, end - start, corrected=end - due)
+                self.tenant_stats[tenant].record(status, end - start, corrected=end - due)
+        finally:
+            ctx.close()
+
+    def _record_step(self, route, status, seconds):
+        self.stats.setdefault(route, RouteStats()).record(status, seconds)
+
+    def _note_lag(self, lag):
+        with self._lag_lock:
+            self.max_send_lag = max(self.max_send_lag, lag)
+            self.late_requests += lag > self.LATE_AFTER
+
+    def run(self):
+        ready = threading.Barrier(self.concurrency + 1)
+        workers = [threading.Thread(target=self._work, args=(i, ready), daemon=True) for i in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        ready.wait() # all workers logged in, start the clock...
+
+        start = time.perf_counter()
+        self._pace(start + self.duration)
+        for worker in workers:
+            worker.join()
+        self.elapsed = time.perf_counter() - start
+        return self.report()
+
+    def overall(self):
+        """The mix's routes (the units tickets are issued for, eg: whole journeys) folded into one RouteStats."""
+        merged = RouteStats()
+        for stats in [stats for route, stats in list(self.stats.items()) if route in self.mix]:
+            with stats._lock:
+                merged.latencies.merge(stats.latencies)
+                merged.service.merge(stats.service)
+                merged.statuses.update(stats.statuses)
+        return merged
+
+    def report(self):
+        routes = {route: stats.summary(self.elapsed) for route, stats in self.stats.items() if stats.latencies.count}
+        # journeys' own entries time their steps, which are counted already...
+        total = sum(r["count"] for route, r in routes.items() if not route.startswith("journey:"))
+        return {
+            "target_rate": self.rate,
+            "arrival": self.arrival,
+            "duration": self.elapsed,
+            "concurrency": self.concurrency,
+            "total_requests": total,
+            "throughput": total / self.elapsed if self.elapsed else 0.0,
+            "tenants": {
+                f"{username}@{company}": {
+                    **self.tenant_stats[(username, company)].summary(self.elapsed),
+                    "company_mapping_bytes": self.mapping_bytes.get((username, company)),
+                }
+                for username, company in self.tenants
+            },
+            "late_requests": self.late_requests,
+            "max_send_lag_ms": self.max_send_lag * 1000,
+            "token_refreshes": TOKEN_REFRESHER.refreshes,
+            "token_refresh_failures": TOKEN_REFRESHER.failures,
+            "overall": self.overall().summary(self.elapsed),
+            "routes": routes,
+        }
+
+def print_load_report(report):
+    """Prints the per-route table for a load report."""
+    printc(
+        f"\n--- Load: {report['total_requests']} requests in {report['duration']:.1f}s "
+        f"({report['throughput']:.1f} req/s, target {report['target_rate']:.1f} {report['arrival']}) ---",
+        COLOR_SECONDARY
+    )
+    # p50..max from the scheduled send time, "svc p99" from the actual send...
+    header = f"{'route':<34}{'count':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'svc p99':>9}  errors"
+    printc(header, COLOR_SECONDARY)
+    for route, r in sorted(report["routes"].items()):
+        errors = ", ".join(f"{code}x{n}" for code, n in sorted(r["errors"].items())) or "-"
+        line = (f"{route:<34}{r['count']:>8}{r['throughput']:>9.1f}{r['p50_ms']:>9.1f}"
+                f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}{r['service_p99_ms']:>9.1f}  {errors}")
+        printc(line, COLOR_WARN if r["errors"] else COLOR_SUCCESS)
+    if len(report["tenants"]) > 1:
+        printc(f"\n{'tenant':<34}{'count':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'mapping':>9}  errors", COLOR_SECONDARY)
+        for tenant, t in sorted(report["tenants"].items(), key=lambda item: -item[1]["p99_ms"]): # slowest first
+            errors = ", ".join(f"{code}x{n}" for code, n in sorted(t["errors"].items())) or "-"
+            line = (f"{tenant:<34}{t['count']:>8}{t['throughput']:>9.1f}{t['p50_ms']:>9.1f}{t['p95_ms']:>9.1f}"
+                    f"{t['p99_ms']:>9.1f}{t['max_ms']:>9.1f}{t['company_mapping_bytes'] or 0:>8}B  {errors}")
+            printc(line, COLOR_WARN if t["errors"] else COLOR_SUCCESS)
+    if report["late_requests"]:
+        printc(
+            f"{report['late_requests']} requests went out late (up to {report['max_send_lag_ms']:.1f} ms behind schedule), "
+            f"their wait is included above",
+            COLOR_WARN
+        )
+    if report["token_refreshes"] or report["token_refresh_failures"]:
+        printc(
+            f"Token refreshes: {report['token_refreshes']} ({report['token_refresh_failures']} failed)",
+            COLOR_WARN if report["token_refresh_failures"] else COLOR_SECONDARY
+        )
+
+def parse_mix(text):
+    """Parses 'GET /sessions/me=5,GET /users/{username}=2' into a weight dict (weight defaults to 1)."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        route, _, weight = part.partition("=")
+        mix[route.strip()] = float(weight) if weight else 1.0
+    return mix
+
+def parse_tenants(text):
+    """
+    Tenants for a multi-tenant run: a count takes the first N companies of the dev user's
+    company_mapping, otherwise a comma list of 'COMPANY' or 'username@COMPANY' entries.
+    """
+    if text.strip().isdigit():
+        session = login_via_api()
+        if session is None:
+            raise Exception("Dev login failed, cannot read the company mapping.")
+        companies, _ = mappings_from_session(session)
+        me = get_current_driver_via_api(session)
+        if me.status_code == 200:
+            logout_with_id_via_api(session, me.json()["userId"])
+        return [(DEV_USERNAME, company) for company in companies[:int(text)]]
+    tenants = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        username, _, company = part.rpartition("@")
+        tenants.append((username or DEV_USERNAME, company))
+    return tenants
+
+def run_load(rate, duration, concurrency, mix=None, json_path=None, seed=None, arrival="fixed", routes=None, tenants=None):
+    """Entry point for `run_tests.py load`, returns True if no request errored."""
+    report = LoadRun(mix=mix, rate=rate, duration=duration, concurrency=concurrency, seed=seed,
+                     arrival=arrival, routes=routes, tenants=tenants).run()
+    print_load_report(report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        printc(f"Load report written to {json_path}", COLOR_SECONDARY)
+    return report["total_requests"] > 0 and all(not r["errors"] for r in report["routes"].values())
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+import time
+
+from utils import COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, COLOR_WARN, printc
+from async_client import AsyncApiClient, AsyncSession, gather_limited
+from datagen import UserDataGenerator, DEFAULT_COMPANIES, DEFAULT_MODULES
+
+''' Bulk seeding of USERS and SESSIONS to production-like sizes, resumable, with a matching teardown '''
+
+CHECKPOINT_PATH = os.environ.get(
+    "API_TEST_SEED_CHECKPOINT",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".seed.jsonl")
+)
+
+# --- CHECKPOINT ---
+
+class SeedCheckpoint:
+    """
+    Append-only record of a seeding run: the generator settings, which user index ranges
+    were started/finished and the SESSIONS ids created. Users are addressed by index
+    (see datagen.UserDataGenerator), so the file stays small however many rows it covers
+    and an interrupted run resumes at the first unfinished batch.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self.settings = None # {"seed", "prefix", "users"}
+        self.users_done = 0
+        self.users_started = 0
+        self.session_ids = []
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # torn final line of an interrupted run
+                op = entry["op"]
+                if op == "settings":
+                    self.settings = entry["settings"]
+                elif op == "users_started":
+                    self.users_started = max(self.users_started, entry["end"])
+                elif op == "users_done":
+                    self.users_done = max(self.users_done, entry["end"])
+                elif op == "sessions":
+                    self.session_ids.extend(entry["ids"])
+
+    def _append(self, entry):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def begin(self, seed, prefix, users):
+        """Starts (or resumes) a run; resuming with other generator settings is refused."""
+        settings = {"seed": seed, "prefix": prefix, "users": users}
+        if self.settings is None:
+            self.settings = settings
+            self._append({"op": "settings", "settings": settings})
+        elif (self.settings["seed"], self.settings["prefix"]) != (seed, prefix):
+            raise ValueError(
+                f"{self.path} belongs to a run with seed {self.settings['seed']} and prefix '{self.settings['prefix']}', "
+                f"unseed it first or pass the same --seed/--prefix."
+            )
+        elif users > self.settings["users"]:
+            self.settings = settings # growing the table is just another resume...
+            self._append({"op": "settings", "settings": settings})
+
+    def users_batch_started(self, end):
+        self.users_started = max(self.users_started, end)
+        self._append({"op": "users_started", "end": end})
+
+    def users_batch_done(self, end):
+        self.users_done = max(self.users_done, end)
+        self._append({"op": "users_done", "end": end})
+
+    def add_sessions(self, ids):
+        self.session_ids.extend(ids)
+        self._append({"op": "sessions", "ids": ids})
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+# --- SEEDING ---
+
+class _AdminSession:
+    """Dev-login session the users are created/deleted with, re-issued well before its 15 minute token expires."""
+
+    MAX_AGE = 600
+
+    def __init__(self, client):
+        self.client = client
+        self.session = None
+        self.session_id = None
+        self.created_at = 0.0
+
+    async def get(self):
+        if self.session is None or time.monotonic() - self.created_at > self.MAX_AGE:
+            await self.close()
+            self.session = await self.client.login()
+            if self.session is None:
+                raise Exception("Dev login failed, cannot seed.")
+            me = await self.client.get_current_driver(self.session)
+            self.session_id = me.json().get("userId") if me.status_code == 200 else None
+            self.created_at = time.monotonic()
+        return self.session
+
+    async def close(self):
+        if self.session is not None and self.session_id is not None:
+            await self.client.logout_with_id(self.session, self.session_id)
+        self.session = None
+
+def _rate(count, start):
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed else 0.0
+
+async def _seed_users(client, admin, checkpoint, generator, users, batch_size, concurrency):
+    start, created, existing = time.perf_counter(), 0, 0
+    for batch_start in range(checkpoint.users_done, users, batch_size):
+        batch_end = min(batch_start + batch_size, users)
+        checkpoint.users_batch_started(batch_end)
+        session = await admin.get()
+        payloads = generator.batch(batch_start, batch_end - batch_start)
+        responses = await gather_limited((client.create_user(session, p) for p in payloads), concurrency)
+
+        failed = []
+        for payload, response in zip(payloads, responses):
+            if isinstance(response, Exception):
+                failed.append(f"{payload['Username']} ({response})")
+            elif response.status_code == 201:
+                created += 1
+            elif response.status_code == 409:
+                existing += 1 # created before an interruption, the batch just wasn't marked done
+            else:
+                failed.append(f"{payload['Username']} ({response.status_code})")
+        if failed:
+            for item in failed[:10]:
+                printc(f"  < SEED: Failed to create user {item}", COLOR_FAIL)
+            printc(f"Seed: stopped at users {batch_start}..{batch_end} ({len(failed)} failed), rerun to resume.", COLOR_FAIL)
+            return False
+
+        checkpoint.users_batch_done(batch_end)
+        printc(f"Seed: users {batch_end}/{users} ({_rate(created + existing, start):.0f} users/s)", COLOR_SECONDARY)
+    if created or existing:
+        printc(f"Seed: created {created} users ({existing} already present)", COLOR_SUCCESS)
+    return True
+
+async def _seed_session(client, generator, index, user_count):
+    """Dev-login as a seeded user (a SESSIONS row), returns its session id."""
+    user = generator.user(index % user_count)
+    session = await client.login(user["Username"], user["ActiveCompany"])
+    if session is None:
+        raise Exception(f"dev-login as {user['Username']} failed")
+    me = await client.get_current_driver(session)
+    if me.status_code != 200:
+        raise Exception(f"GET /sessions/me as {user['Username']} returned {me.status_code}")
+    return me.json()["userId"]
+
+async def _seed_sessions(client, checkpoint, generator, sessions, batch_size, concurrency):
+    if not checkpoint.users_done:
+        return sessions <= 0
+    start, done = time.perf_counter(), len(checkpoint.session_ids)
+    for batch_start in range(done, sessions, batch_size):
+        batch_end = min(batch_start + batch_size, sessions)
+        results = await gather_limited(
+            (_seed_session(client, generator, i, checkpoint.users_done) for i in range(batch_start, batch_end)),
+            concurrency
+        )
+        ids = [r for r in results if not isinstance(r, Exception)]
+        checkpoint.add_sessions(ids)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            for error in errors[:10]:
+                printc(f"  < SEED: {error}", COLOR_FAIL)
+            printc(f"Seed: stopped at sessions {batch_start}..{batch_end} ({len(errors)} failed), rerun to resume.", COLOR_FAIL)
+            return False
+        printc(f"Seed: sessions {batch_end}/{sessions} ({_rate(batch_end - done, start):.0f} sessions/s)", COLOR_SECONDARY)
+    return True
+
+async def seed_tables(users, sessions, seed=0, prefix="seed", batch_size=500, concurrency=64, checkpoint_path=CHECKPOINT_PATH):
+    checkpoint = SeedCheckpoint(checkpoint_path)
+    checkpoint.begin(seed, prefix, users)
+    if checkpoint.users_done or checkpoint.session_ids:
+        printc(
+            f"Seed: resuming from {checkpoint_path} ({checkpoint.users_done} users, "
+            f"{len(checkpoint.session_ids)} sessions done)", COLOR_WARN
+        )
+    async with AsyncApiClient(max_connections=concurrency) as client:
+        admin = _AdminSession(client)
+        companies, modules = await client.mapping_keys(await admin.get())
+        generator = UserDataGenerator(seed, prefix, companies or DEFAULT_COMPANIES, modules or DEFAULT_MODULES)
+        try:
+            ok = await _seed_users(client, admin, checkpoint, generator, users, batch_size, concurrency)
+        finally:
+            await admin.close()
+        return ok and await _seed_sessions(client, checkpoint, generator, sessions, batch_size, concurrency)
+
+# --- TEARDOWN ---
+
+async def unseed_tables(batch_size=500, concurrency=64, checkpoint_path=CHECKPOINT_PATH):
+    """Logs out every recorded session, deletes every user a (possibly interrupted) seed run may have created."""
+    checkpoint = SeedCheckpoint(checkpoint_path)
+    if checkpoint.settings is None:
+        printc(f"Unseed: nothing to remove, no checkpoint at {checkpoint_path}", COLOR_SECONDARY)
+        return True
+    generator = UserDataGenerator(seed=checkpoint.settings["seed"], prefix=checkpoint.settings["prefix"])
+    start, failed, deleted = time.perf_counter(), 0, 0
+
+    async with AsyncApiClient(max_connections=concurrency) as client:
+        admin = _AdminSession(client)
+        try:
+            for i in range(0, len(checkpoint.session_ids), batch_size):
+                session = await admin.get()
+                # logout clears the caller's cookies, give every call its own copy...
+                results = await gather_limited(
+                    (client.logout_with_id(AsyncSession(session.cookies), session_id)
+                     for session_id in checkpoint.session_ids[i:i + batch_size]),
+                    concurrency
+                )
+                failed += sum(isinstance(r, Exception) or r.status_code != 200 for r in results)
+
+            for i in range(0, checkpoint.users_started, batch_size):
+                session = await admin.get()
+                usernames = [generator.username(j) for j in range(i, min(i + batch_size, checkpoint.users_started))]
+                results = await gather_limited((client.delete_user(session, u) for u in usernames), concurrency)
+                for result in results:
+                    if isinstance(result, Exception) or result.status_code not in (204, 404):
+                        failed += 1
+                    else:
+                        deleted += result.status_code == 204
+        finally:
+            await admin.close()
+
+    printc(
+        f"Unseed: logged out {len(checkpoint.session_ids)} sessions, deleted {deleted} users "
+        f"in {time.perf_counter() - start:.1f}s" + (f", {failed} failed (kept {checkpoint_path})" if failed else ""),
+        COLOR_FAIL if failed else COLOR_SUCCESS
+    )
+    if not failed:
+        checkpoint.remove()
+    return not failed
+
+def run_seed(users, sessions, seed=0, prefix="seed", batch_size=500, concurrency=64):
+    """Entry point for `run_tests.py seed`, returns True once the target sizes are reached."""
+    try:
+        return asyncio.run(seed_tables(users, sessions, seed, prefix, batch_size, concurrency))
+    except ImportError as e:
+        printc(str(e), COLOR_FAIL)
+        return False
+
+def run_unseed(batch_size=500, concurrency=64):
+    """Entry point for `run_tests.py unseed`."""
+    try:
+        return asyncio.run(unseed_tables(batch_size, concurrency))
+    except ImportError as e:
+        printc(str(e), COLOR_FAIL)
+        return False
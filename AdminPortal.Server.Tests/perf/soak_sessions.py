@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import (
+    BASE_API_URL, DEV_USERNAME, DEV_COMPANY, COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, COLOR_WARN,
+    printc, new_session, api_request
+)
+from sessions_tests import get_current_driver_via_api, logout_with_id_via_api
+
+''' Session soak: constant login churn against SESSIONS, sampling its size and the background sweeper '''
+
+# The server only sweeps rows past EXPIRYTIME (a day after login) by default. To see the
+# table level off within a soak, start it with a short idle timeout and interval, eg:
+#
+#   SessionSweeper__IdleMinutes=1 SessionSweeper__IntervalSeconds=10 dotnet run
+#   SessionSweeper__IdleMinutes=1 SessionSweeper__IntervalSeconds=10 python run_tests.py --fake soak-sessions
+
+def get_sweeper_via_api(session):
+    """GET /v1/sessions/dev-sweeper (Development only): SESSIONS row count and sweeper counters."""
+    url = f"{BASE_API_URL}/sessions/dev-sweeper"
+    return api_request(session, "GET", url, route="/sessions/dev-sweeper")
+
+def _churn_once(username, company, logout):
+    """One admin visit: dev-login, then either log out properly or abandon the tab."""
+    session = new_session()
+    url = f"{BASE_API_URL}/sessions/dev-login?username={username}&company={company}"
+    response = api_request(session, "GET", url, route="/sessions/dev-login", allow_redirects=False)
+    if response.status_code not in (302, 303, 307, 308):
+        return False
+    if logout:
+        me = get_current_driver_via_api(session)
+        if me.status_code != 200:
+            return False
+        logout_with_id_via_api(session, me.json()["userId"])
+    return True
+
+class SessionSoak:
+    """
+    Logs in `rate` times a second for `duration` seconds; every `logout_every`-th visit logs
+    out, the rest are abandoned like closed tabs and left to the sweeper. SESSIONS is sampled
+    every `sample_every` seconds through the dev-sweeper endpoint.
+
+    The table counts as bounded when the largest sample of the last third of the run is no
+    more than `tolerance` above the largest of the middle third (plus one sampling period of
+    logins): growth has to stop, not just slow down. Give the run a few sweeper intervals
+    past the idle timeout, or there's nothing to level off yet.
+    """
+
+    def __init__(self, rate=10.0, duration=300.0, sample_every=5.0, logout_every=2, tolerance=0.1,
+                 concurrency=16, username=DEV_USERNAME, company=DEV_COMPANY):
+        self.rate = rate
+        self.duration = duration
+        self.sample_every = sample_every
+        self.logout_every = logout_every
+        self.tolerance = tolerance
+        self.concurrency = concurrency
+        self.username = username
+        self.company = company
+
+    def _sample(self, session, start, samples, stop):
+        while True:
+            try:
+                response = get_sweeper_via_api(session)
+                if response.status_code == 200:
+                    samples.append({"t": time.perf_counter() - start, **response.json()})
+                elif not samples:
+                    printc(f"dev-sweeper answered {response.status_code}, is the server in Development?", COLOR_FAIL)
+            except Exception as e:
+                printc(f"Sampling SESSIONS failed: {e}", COLOR_WARN)
+            if stop.wait(self.sample_every):
+                return
+
+    def run(self):
+        samples, stop = [], threading.Event()
+        failures = 0
+        start = time.perf_counter()
+        sampler = threading.Thread(target=self._sample, args=(new_session(), start, samples, stop), daemon=True)
+        sampler.start()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = []
+            visit = 0
+            while True:
+                due = start + visit / self.rate
+                if due - start >= self.duration:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                logout = self.logout_every > 0 and visit % self.logout_every == 0
+                futures.append(pool.submit(_churn_once, self.username, self.company, logout))
+                visit += 1
+            for future in futures:
+                try:
+                    failures += not future.result()
+                except Exception:
+                    failures += 1
+
+        stop.set()
+        sampler.join()
+        return self._report(visit, failures, samples)
+
+    def _report(self, visits, failures, samples):
+        sizes = [s["sessions"] for s in samples]
+        third = len(sizes) // 3
+        bounded = None
+        if third:
+            middle, last = max(sizes[third:2 * third]), max(sizes[2 * third:])
+            slack = self.rate * self.sample_every
+            bounded = last <= middle * (1 + self.tolerance) + slack
+        final = samples[-1] if samples else {}
+        return {
+            "rate": self.rate,
+            "duration": self.duration,
+            "visits": visits,
+            "failed_visits": failures,
+            "bounded": bounded,
+            "peak_sessions": max(sizes) if sizes else None,
+            "final_sessions": final.get("sessions"),
+            "rows_swept": final.get("rowsSwept", 0) - (samples[0].get("rowsSwept", 0) if samples else 0),
+            "sweep_time_ms": final.get("timeSpentMs", 0.0) - (samples[0].get("timeSpentMs", 0.0) if samples else 0.0),
+            "budget_exhausted": final.get("budgetExhausted", 0) - (samples[0].get("budgetExhausted", 0) if samples else 0),
+            "samples": samples,
+        }
+
+def print_soak_report(report, rows=12):
+    printc(f"\n--- Session soak: {report['rate']:.1f} logins/s for {report['duration']:.0f}s ---", COLOR_SECONDARY)
+    samples = report["samples"]
+    step = max(1, len(samples) // rows)
+    printc(f"{'t (s)':>8}{'SESSIONS':>11}{'swept':>9}{'sweep ms':>11}", COLOR_SECONDARY)
+    for s in samples[::step] + ([samples[-1]] if samples and (len(samples) - 1) % step else []):
+        printc(f"{s['t']:>8.0f}{s['sessions']:>11}{s['rowsSwept']:>9}{s['timeSpentMs']:>11.1f}")
+    printc(f"Visits: {report['visits']} ({report['failed_visits']} failed), peak SESSIONS {report['peak_sessions']}, "
+           f"swept {report['rows_swept']} rows in {report['sweep_time_ms']:.1f} ms"
+           + (f", budget hit {report['budget_exhausted']}x" if report["budget_exhausted"] else ""), COLOR_SECONDARY)
+    if report["bounded"] is None:
+        printc("Too few samples to judge, run longer or sample more often.", COLOR_WARN)
+    elif report["bounded"]:
+        printc("SESSIONS stayed bounded under churn.", COLOR_SUCCESS)
+    else:
+        printc("SESSIONS kept growing through the last third of the run.", COLOR_FAIL)
+    if not report["rows_swept"]:
+        printc("The sweeper removed nothing, check SessionSweeper__IdleMinutes/IntervalSeconds (see perf/soak_sessions.py).", COLOR_WARN)
+
+def run_soak_sessions(json_path=None, **kwargs):
+    """Entry point for `run_tests.py soak-sessions`, returns True if SESSIONS stayed bounded and no visit failed."""
+    report = SessionSoak(**kwargs).run()
+    print_soak_report(report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        printc(f"Soak report written to {json_path}", COLOR_SECONDARY)
+    return bool(report["bounded"]) and not report["failed_visits"]
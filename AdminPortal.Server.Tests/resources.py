@@ -0,0 +1,97 @@
+from utils import DEV_USERNAME
+
+''' Shared-resource declarations for tests, and the reader/writer table the parallel scheduler keeps '''
+
+# --- RESOURCE NAMES ---
+
+EVERYTHING = "*"                    # held exclusively by tests that declare nothing
+DEV_USER = f"user:{DEV_USERNAME}"   # the dev-login user itself (its row, its sessions)
+USER_NAMESPACE = "users"            # the USERS table as a whole (tests creating throwaway users)
+
+def company(key):
+    """The company row for `key`, whose display name lands in every company_mapping cookie."""
+    return f"company:{key}"
+
+# --- DECLARATIONS ---
+
+def uses_resources(reads=(), writes=()):
+    """
+    Declares what shared server state a test method (or every test of a TestCase class)
+    reads or writes. Class and method declarations add up. Tests that declare nothing
+    are treated as writing EVERYTHING, so they never overlap another test.
+
+        @uses_resources(reads=[company(DEV_COMPANY)])
+        class CompanyApiTests(unittest.TestCase):
+
+            @uses_resources(writes=[company(DEV_COMPANY)])
+            def test_1_update_company_success(self): ...
+    """
+    def decorate(target):
+        # a class attribute would leak into the methods below, keep the class's own under another name...
+        attr = "__class_resources__" if isinstance(target, type) else "__test_resources__"
+        prev_reads, prev_writes = getattr(target, attr, (frozenset(), frozenset()))
+        setattr(target, attr, (prev_reads | frozenset(reads), prev_writes | frozenset(writes)))
+        return target
+    return decorate
+
+def resources_of(test):
+    """(reads, writes) for a TestCase instance, see uses_resources()."""
+    class_reads, class_writes = getattr(type(test), "__class_resources__", (frozenset(), frozenset()))
+    method = getattr(test, getattr(test, "_testMethodName", ""), None)
+    method_reads, method_writes = getattr(method, "__test_resources__", (frozenset(), frozenset()))
+    reads, writes = class_reads | method_reads, class_writes | method_writes
+    if not reads and not writes:
+        return frozenset(), frozenset([EVERYTHING])
+    return (reads | {EVERYTHING}) - writes, writes
+
+# --- SCHEDULING ---
+
+class ResourceTable:
+    """
+    Reader/writer bookkeeping for the tests currently running. A test may start when none
+    of its writes is held by anyone and none of its reads is held by a writer. Writers
+    take precedence: once a writer is waiting on a resource, new readers of it hold off,
+    so a long stream of readers can't starve the one test that mutates shared data.
+    """
+
+    def __init__(self):
+        self._readers = {} # resource -> count
+        self._writers = set()
+        self._waiting_writers = set()
+
+    def can_start(self, reads, writes):
+        if any(r in self._writers or self._readers.get(r) for r in writes):
+            return False
+        return not any(r in self._writers or r in self._waiting_writers for r in reads)
+
+    def wait_for(self, writes):
+        """Marks `writes` as wanted by a writer that couldn't start yet."""
+        self._waiting_writers.update(writes)
+
+    def acquire(self, reads, writes):
+        for r in reads:
+            self._readers[r] = self._readers.get(r, 0) + 1
+        self._writers.update(writes)
+
+    def release(self, reads, writes):
+        for r in reads:
+            self._readers[r] -= 1
+            if not self._readers[r]:
+                del self._readers[r]
+        self._writers.difference_update(writes)
+
+    def pick(self, pending, limit):
+        """
+        Chooses up to `limit` of `pending` [(test_id, reads, writes), ...] that can start
+        now, writers first, and acquires their resources. Returns the started entries.
+        """
+        self._waiting_writers.clear()
+        started = []
+        for entry in sorted(pending, key=lambda e: not e[2]): # stable: writers first, then discovery order
+            _, reads, writes = entry
+            if len(started) < limit and self.can_start(reads, writes):
+                self.acquire(reads, writes)
+                started.append(entry)
+            elif writes:
+                self.wait_for(writes)
+        return started
@@ -1,22 +1,204 @@
 import unittest
 import os
 import sys
+import io
+import time
 import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 # set sys path...
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.join(current_dir, 'tests'))
+sys.path.insert(0, os.path.join(current_dir, 'perf'))
 
 # import log formatting helpers...
 from utils import (
-    COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, printc
+    COLOR_SUCCESS, COLOR_FAIL, COLOR_SECONDARY, COLOR_WARN, printc,
+    transport_stats, set_base_api_url, REQUEST_LOG, SESSION_POOL,
+    use_cassette, current_cassette, set_test_scope
 )
+from latency import LATENCY
+from cleanup import CLEANUP
+from resources import ResourceTable, resources_of
 
 # import unittest classes...
 #from tests.company_tests import CompanyApiTests
 #from tests.user_tests import UserApiTests
 
-def run_all_tests_with_unittest(verbose=False):
+# --- RESULT REPORTING ---
+
+class RecentRequestsTestResult(unittest.TextTestResult):
+    """
+    TextTestResult that starts every test with an empty REQUEST_LOG and appends the
+    requests it made to the report of any test that fails or errors. Passing tests
+    never format anything, so the detail is free unless it's needed. It also scopes
+    cassette recordings and unique_id()s to the running test.
+    """
+
+    def startTest(self, test):
+        REQUEST_LOG.clear()
+        set_test_scope(test.id())
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        set_test_scope(None)
+
+    def _attach_recent_requests(self, outcomes):
+        recent = REQUEST_LOG.format()
+        if recent:
+            test, trace = outcomes[-1]
+            outcomes[-1] = (test, f"{trace}\n{recent}\n")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._attach_recent_requests(self.failures)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._attach_recent_requests(self.errors)
+
+# --- PARALLEL (RESOURCE-SCHEDULED) EXECUTION HELPERS ---
+
+def _iter_tests(suite):
+    """Flattens a (nested) unittest suite into its individual test cases."""
+    for item in suite:
+        if isinstance(item, unittest.TestSuite):
+            yield from _iter_tests(item)
+        else:
+            yield item
+
+_DISCOVERED = None
+
+def _discovered_tests():
+    """Test id -> TestCase, discovered once per (worker) process."""
+    global _DISCOVERED
+    if _DISCOVERED is None:
+        discovered = unittest.TestLoader().discover(start_dir='tests', pattern='*_tests.py')
+        _DISCOVERED = {test.id(): test for test in _iter_tests(discovered)}
+    return _DISCOVERED
+
+def _run_batch(test_ids, flush_cleanup=True):
+    """
+    Runs a batch of tests inside a worker process and returns a picklable summary.
+    Tests are discovered in the worker so import failures surface exactly as they
+    would in a sequential run; everything printed by the batch is captured and
+    handed back so the parent can print it as one contiguous block.
+    """
+    cassette = current_cassette() # inherited via API_TEST_CASSETTE...
+    transport_before = transport_stats() # worker processes are reused across batches...
+    LATENCY.reset()
+    tests = _discovered_tests()
+    batch_suite = unittest.TestSuite(tests[test_id] for test_id in test_ids)
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            runner = unittest.TextTestRunner(stream=output, verbosity=2, resultclass=RecentRequestsTestResult)
+            results = runner.run(batch_suite)
+            cleaned = CLEANUP.flush() if flush_cleanup else True
+        finally:
+            # pool workers exit without running atexit handlers, log the pooled sessions out now...
+            SESSION_POOL.close()
+
+    return {
+        "output": output.getvalue(),
+        "tests_run": results.testsRun,
+        "failures": [(test.id(), trace) for test, trace in results.failures],
+        "errors": [(test.id(), trace) for test, trace in results.errors],
+        "skipped": len(results.skipped),
+        "unexpected_successes": len(results.unexpectedSuccesses),
+        "cleaned": cleaned,
+        "transport": transport_stats(since=transport_before),
+        "latency": LATENCY.to_dict(),
+        "recorded": cassette.drain() if cassette and cassette.mode == "record" else [],
+    }
+
+def _merge_transport_stats(stats_list):
+    """Sums per-batch transport counters and recomputes the reuse rate."""
+    requests = sum(s["requests"] for s in stats_list)
+    opened = sum(s["connections_opened"] for s in stats_list)
+    reused = max(0, requests - opened)
+    return {
+        "requests": requests,
+        "connections_opened": opened,
+        "connections_reused": reused,
+        "reuse_rate": reused / requests if requests else 0.0,
+    }
+
+def print_transport_stats(stats):
+    """Prints the shared transport's connection reuse summary."""
+    printc(
+        f"Transport: {stats['requests']} requests, {stats['connections_opened']} connections opened, "
+        f"{stats['connections_reused']} reused (reuse rate {stats['reuse_rate']:.1%})",
+        COLOR_SECONDARY
+    )
+
+def run_tests_in_parallel(test_suite, workers):
+    """
+    Runs the discovered tests one per task across a process pool, as many at once as
+    their declared shared resources allow (see resources.uses_resources): readers of a
+    resource overlap freely, a writer runs alone on it. Prints one combined report and
+    returns (passed, transport stats); latency histograms are merged into LATENCY and
+    cassette recordings into the active cassette as tasks complete.
+    """
+    pending = [(test.id(), *resources_of(test)) for test in _iter_tests(test_suite)]
+    writers = sum(1 for _, _, writes in pending if writes)
+    printc(f"Running {len(pending)} tests across {workers} workers ({writers} hold shared resources exclusively)...\n", COLOR_SECONDARY)
+
+    start = time.perf_counter()
+    summaries = []
+    table = ResourceTable()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            for entry in table.pick(pending, workers - len(running)):
+                pending.remove(entry)
+                # cleanup is left to the per-worker journals, adopted once the pool is down...
+                running[pool.submit(_run_batch, [entry[0]], False)] = entry
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                _, reads, writes = running.pop(future)
+                table.release(reads, writes)
+                summary = future.result()
+                summaries.append(summary)
+                LATENCY.merge_dict(summary["latency"])
+                if summary["recorded"]:
+                    current_cassette().extend(summary["recorded"])
+                print(summary["output"], end="")
+    cleaned = CLEANUP.recover_abandoned(source="the worker processes")
+    elapsed = time.perf_counter() - start
+
+    tests_run = sum(s["tests_run"] for s in summaries)
+    failures = [f for s in summaries for f in s["failures"]]
+    errors = [e for s in summaries for e in s["errors"]]
+    skipped = sum(s["skipped"] for s in summaries)
+    unexpected_successes = sum(s["unexpected_successes"] for s in summaries)
+
+    printc("=" * 70, COLOR_SECONDARY)
+    printc(f"Ran {tests_run} tests in {elapsed:.3f}s across {workers} workers", COLOR_SECONDARY)
+    for test_id, _ in failures:
+        printc(f"  FAIL: {test_id}", COLOR_FAIL)
+    for test_id, _ in errors:
+        printc(f"  ERROR: {test_id}", COLOR_FAIL)
+    if skipped:
+        printc(f"  skipped={skipped}", COLOR_WARN)
+
+    if not cleaned:
+        printc("  some test data could not be cleaned up, see the cleanup output above", COLOR_WARN)
+
+    passed = not failures and not errors and not unexpected_successes
+    return passed, _merge_transport_stats([s["transport"] for s in summaries])
+
+def report_latency(json_path=None):
+    """Prints the per-route latency table collected by the helpers and optionally writes it as JSON."""
+    LATENCY.print_table()
+    if json_path:
+        LATENCY.write_json(json_path)
+        printc(f"Latency profile written to {json_path}", COLOR_SECONDARY)
+
+def run_all_tests_with_unittest(verbose=False, workers=1, min_connection_reuse=None, latency_json=None):
     printc("\n--- Starting all tests using unittest discovery ---\n", COLOR_SECONDARY)
 
     #CompanyApiTests._global_verbose = verbose
@@ -38,11 +220,32 @@ def run_all_tests_with_unittest(verbose=False):
     # suite.addTest(unittest.FunctionTestCase(run_company_tests))
     # suite.addTest(unittest.FunctionTestCase(run_another_tests))
 
-    # Run the discovered tests
-    runner = unittest.TextTestRunner(verbosity=2) # verbosity=2 for more detailed output
-    results = runner.run(test_suite)
+    # Run the discovered tests, scheduled across a process pool when requested...
+    if workers > 1:
+        success, stats = run_tests_in_parallel(test_suite, workers)
+    else:
+        runner = unittest.TextTestRunner(verbosity=2, resultclass=RecentRequestsTestResult) # verbosity=2 for more detailed output
+        results = runner.run(test_suite)
+        CLEANUP.flush()
+        SESSION_POOL.close()
+        success = results.wasSuccessful()
+        stats = transport_stats()
+
+    cassette = current_cassette()
+    if cassette is not None and cassette.mode == "record":
+        printc(f"Recorded {cassette.save()} responses to {cassette.path}", COLOR_SECONDARY)
 
-    if results.wasSuccessful():
+    # replayed responses never touch the network, their timings and reuse say nothing about the server...
+    replaying = cassette is not None and cassette.mode == "replay"
+    report_latency(None if replaying else latency_json)
+    print_transport_stats(stats)
+    if replaying:
+        printc("Replay run: latency profile not written, connection reuse not checked.", COLOR_SECONDARY)
+    elif min_connection_reuse is not None and stats["reuse_rate"] < min_connection_reuse:
+        printc(f"Connection reuse rate {stats['reuse_rate']:.1%} is below the required {min_connection_reuse:.1%}!", COLOR_FAIL)
+        success = False
+
+    if success:
         printc("All tests passed successfully!", COLOR_SUCCESS)
     else:
         printc("Some tests failed!", COLOR_FAIL)
@@ -62,6 +265,124 @@ if __name__ == "__main__":
         action='store_true',
         help='Enable verbose output for API requests and responses within test files. Use -v for unittest verbosity'
     )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=1,
+        help='Run tests in parallel across N worker processes, kept apart by their declared shared resources (default: 1, sequential)'
+    )
+    parser.add_argument(
+        '--min-connection-reuse',
+        type=float,
+        default=None,
+        help='Fail the run if the shared transport reused fewer than this fraction of connections (eg: 0.9)'
+    )
+
+    parser.add_argument(
+        '--latency-json',
+        default='latency_profile.json',
+        help="Where to write the per-route latency histograms of the functional run (default: latency_profile.json, '' to skip)"
+    )
+
+    parser.add_argument(
+        '--request-log-size',
+        type=int,
+        default=None,
+        help='How many recent requests to keep and print for a failing test (default: 50)'
+    )
+
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        '--record',
+        metavar='CASSETTE',
+        default=None,
+        help='Record every request/response of the functional run to this cassette file'
+    )
+    cassette_group.add_argument(
+        '--replay',
+        metavar='CASSETTE',
+        default=None,
+        help='Replay the functional run from a recorded cassette, without any network'
+    )
+
+    parser.add_argument(
+        '--fake',
+        action='store_true',
+        help='Run against the in-memory fake_api stand-in instead of the real server (fast pre-check, no DB needed)'
+    )
+
+    # Optional subcommands, running with none keeps the default (functional test) behavior...
+    subparsers = parser.add_subparsers(dest='command')
+
+    load_parser = subparsers.add_parser('load', help='Drive a target request rate against the v1 API and report latency percentiles per route.')
+    load_parser.add_argument('--rate', type=float, default=20.0, help='Target requests per second (default: 20)')
+    load_parser.add_argument('--duration', type=float, default=30.0, help='Seconds to generate load for (default: 30)')
+    load_parser.add_argument('--concurrency', type=int, default=16, help='Worker threads, each with its own dev-login session (default: 16)')
+    load_parser.add_argument('--mix', default=None, help="Weighted routes, eg: 'GET /sessions/me=5,GET /users/{username}=2' (default: built-in mix)")
+    load_parser.add_argument('--journeys', nargs='?', const='', default=None, metavar='FILE', help='Run weighted user journeys instead of single routes: the built-in ones, or JOURNEYS from a Python file (see perf/journeys.py)')
+    load_parser.add_argument('--tenants', default=None, help="Spread load over tenants: a count (first N companies of the dev user's mapping) or 'BRAUNS,NTS,user@TCS', reports latency per tenant")
+    load_parser.add_argument('--arrival', choices=['fixed', 'poisson'], default='fixed', help='Arrival schedule, evenly spaced or Poisson (default: fixed)')
+    load_parser.add_argument('--seed', type=int, default=None, help='Seed for route selection and the generated users (see datagen.py)')
+    load_parser.add_argument('--json', dest='json_path', default=None, help='Also write the report as JSON to this path')
+
+    seed_parser = subparsers.add_parser('seed', help='Fill USERS and SESSIONS with generated rows (resumes an interrupted run, see perf/seed.py). Needs aiohttp (pip install aiohttp).')
+    seed_parser.add_argument('--users', type=int, required=True, help='Target number of seeded users')
+    seed_parser.add_argument('--sessions', type=int, default=0, help='Target number of seeded sessions, dev-logins spread over the seeded users (default: 0)')
+    seed_parser.add_argument('--seed', type=int, default=0, help='Seed for the generated users (default: 0)')
+    seed_parser.add_argument('--prefix', default='seed', help="Username prefix of the seeded users (default: 'seed')")
+    seed_parser.add_argument('--batch-size', type=int, default=500, help='Rows submitted and checkpointed together (default: 500)')
+    seed_parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight at once (default: 64)')
+
+    unseed_parser = subparsers.add_parser('unseed', help='Remove everything the last seed run created. Needs aiohttp (pip install aiohttp).')
+    unseed_parser.add_argument('--batch-size', type=int, default=500, help='Rows removed per batch (default: 500)')
+    unseed_parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight at once (default: 64)')
+
+    capacity_parser = subparsers.add_parser('capacity', help='Step the arrival rate up until p99/errors break the SLO and report the highest sustainable throughput.')
+    capacity_parser.add_argument('--scenario', default='admin-session', help="Scenario from perf/capacity.py SCENARIOS (default: admin-session)")
+    capacity_parser.add_argument('--start-rate', type=float, default=5.0, help='Offered rate of the first step, per second (default: 5)')
+    capacity_parser.add_argument('--growth', type=float, default=1.5, help='Rate multiplier between steps (default: 1.5)')
+    capacity_parser.add_argument('--max-rate', type=float, default=5000.0, help='Stop stepping past this rate (default: 5000)')
+    capacity_parser.add_argument('--step-duration', type=float, default=20.0, help='Seconds per step (default: 20)')
+    capacity_parser.add_argument('--concurrency', type=int, default=32, help='Worker threads, each with its own dev-login session (default: 32)')
+    capacity_parser.add_argument('--slo-p99-ms', type=float, default=500.0, help='p99 latency SLO in ms, from the scheduled send time (default: 500)')
+    capacity_parser.add_argument('--slo-error-rate', type=float, default=0.01, help='Error rate SLO (default: 0.01)')
+    capacity_parser.add_argument('--refine', type=int, default=2, help='Bisection steps between the last good and first bad rate (default: 2)')
+    capacity_parser.add_argument('--seed', type=int, default=None, help='Seed for arrivals, route selection and generated users')
+    capacity_parser.add_argument('--json', dest='json_path', default=None, help='Also write the report as JSON to this path')
+
+    bench_contention_parser = subparsers.add_parser('bench-contention', help='Race concurrent PUT /users/{prevUsername} writers for the same names/powerunits and count wrong outcomes.')
+    bench_contention_parser.add_argument('--levels', default='1,2,4,8,16', help='Comma separated writer counts (default: 1,2,4,8,16)')
+    bench_contention_parser.add_argument('--rounds', type=int, default=20, help='Rounds of every race per level (default: 20)')
+    bench_contention_parser.add_argument('--races', default=None, help='Comma separated races from perf/bench_contention.py RACES (default: all)')
+    bench_contention_parser.add_argument('--seed', type=int, default=0, help='Seed for the generated users (default: 0)')
+    bench_contention_parser.add_argument('--json', dest='json_path', default=None, help='Also write the report as JSON to this path')
+
+    bench_login_parser = subparsers.add_parser('bench-login', help='Measure dev-login and /sessions/return/{userId} throughput and latency with back to back calls (see perf/bench_login.py).')
+    bench_login_parser.add_argument('--duration', type=float, default=20.0, help='Seconds measured per route (default: 20)')
+    bench_login_parser.add_argument('--concurrency', type=int, default=8, help='Clients logging in back to back (default: 8)')
+    bench_login_parser.add_argument('--routes', default=None, help='Comma separated routes from perf/bench_login.py ROUTES (default: all)')
+    bench_login_parser.add_argument('--baseline', dest='baseline_path', default=None, help='JSON report of an earlier run to compare against')
+    bench_login_parser.add_argument('--json', dest='json_path', default=None, help='Also write the report as JSON to this path')
+
+    bench_headers_parser = subparsers.add_parser('bench-headers', help='Measure header and body bytes per request with the server\'s mapping cookie format (see perf/bench_headers.py).')
+    bench_headers_parser.add_argument('--samples', type=int, default=20, help='Calls measured per route (default: 20)')
+    bench_headers_parser.add_argument('--baseline', dest='baseline_path', default=None, help='JSON report of a run in the other mode to compare against')
+    bench_headers_parser.add_argument('--json', dest='json_path', default=None, help='Also write the report as JSON to this path')
+
+    bench_sessions_parser = subparsers.add_parser('bench-sessions', help='Measure /sessions/me and /sessions/return latency as SESSIONS grows (seeds the rows, see perf/bench_sessions.py).')
+    bench_sessions_parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma separated SESSIONS sizes to measure at (default: 10000,100000,1000000)')
+    bench_sessions_parser.add_argument('--users', type=int, default=1000, help='Seeded users the sessions are spread over (default: 1000)')
+    bench_sessions_parser.add_argument('--duration', type=float, default=20.0, help='Seconds measured per route and size (default: 20)')
+    bench_sessions_parser.add_argument('--concurrency', type=int, default=8, help='Logged-in clients calling back to back (default: 8)')
+    bench_sessions_parser.add_argument('--budget-ms', type=float, default=None, help='p99 budget, reports the first size exceeding it and fails if one does')
+    bench_sessions_parser.add_argument('--json', dest='json_path', default=None, help='Also write the report as JSON to this path')
+
+    soak_sessions_parser = subparsers.add_parser('soak-sessions', help='Churn logins at a constant rate and check that SESSIONS stays bounded (see perf/soak_sessions.py).')
+    soak_sessions_parser.add_argument('--rate', type=float, default=10.0, help='Logins per second (default: 10)')
+    soak_sessions_parser.add_argument('--duration', type=float, default=300.0, help='Seconds of churn (default: 300)')
+    soak_sessions_parser.add_argument('--sample-every', type=float, default=5.0, help='Seconds between SESSIONS samples (default: 5)')
+    soak_sessions_parser.add_argument('--logout-every', type=int, default=2, help='Every Nth visit logs out, the rest are abandoned (default: 2, 0 = none)')
+    soak_sessions_parser.add_argument('--json', dest='json_path', default=None, help='Also write the report as JSON to this path')
 
     args = parser.parse_args()
 
@@ -72,4 +393,129 @@ if __name__ == "__main__":
         os.environ['API_TEST_VERBOSE'] = '0'
         #print("DEBUG: run_tests.py - API_TEST_VERBOSE environment variable set to '0'")
 
-    run_all_tests_with_unittest()
\ No newline at end of file
+    if args.request_log_size is not None:
+        os.environ['API_TEST_REQUEST_LOG_SIZE'] = str(args.request_log_size) # for spawned workers...
+        REQUEST_LOG.resize(args.request_log_size)
+
+    if args.record:
+        use_cassette("record", args.record)
+    elif args.replay:
+        use_cassette("replay", args.replay)
+        printc(f"Replaying {len(current_cassette())} recorded responses from {args.replay}", COLOR_SECONDARY)
+
+    # Start the stand-in before any test/perf module copies BASE_API_URL...
+    if args.fake:
+        from fake_api import FakeApiServer
+        fake_server = FakeApiServer().start()
+        set_base_api_url(fake_server.base_url)
+        printc(f"Using in-memory API stand-in at {fake_server.base_url}", COLOR_SECONDARY)
+
+    # Remove whatever an interrupted earlier run left behind before it can collide with this one...
+    if not args.replay:
+        CLEANUP.recover_abandoned()
+
+    if args.command == 'load':
+        from loadgen import run_load, parse_mix, parse_tenants
+        mix, routes = parse_mix(args.mix) if args.mix else None, None
+        if args.journeys is not None:
+            from journeys import JOURNEYS, journey_mix, load_journeys
+            mix, routes = journey_mix(load_journeys(args.journeys) if args.journeys else JOURNEYS)
+        success = run_load(
+            rate=args.rate,
+            duration=args.duration,
+            concurrency=args.concurrency,
+            mix=mix,
+            routes=routes,
+            tenants=parse_tenants(args.tenants) if args.tenants else None,
+            json_path=args.json_path,
+            seed=args.seed,
+            arrival=args.arrival
+        )
+        sys.exit(0 if success else 1)
+
+    if args.command == 'seed':
+        from seed import run_seed
+        success = run_seed(args.users, args.sessions, args.seed, args.prefix, args.batch_size, args.concurrency)
+        sys.exit(0 if success else 1)
+
+    if args.command == 'unseed':
+        from seed import run_unseed
+        sys.exit(0 if run_unseed(args.batch_size, args.concurrency) else 1)
+
+    if args.command == 'capacity':
+        from capacity import run_capacity
+        success = run_capacity(
+            scenario=args.scenario,
+            start_rate=args.start_rate,
+            growth=args.growth,
+            max_rate=args.max_rate,
+            step_duration=args.step_duration,
+            concurrency=args.concurrency,
+            slo_p99_ms=args.slo_p99_ms,
+            slo_error_rate=args.slo_error_rate,
+            refine=args.refine,
+            seed=args.seed,
+            json_path=args.json_path
+        )
+        sys.exit(0 if success else 1)
+
+    if args.command == 'bench-contention':
+        from bench_contention import RACES, run_bench_contention
+        success = run_bench_contention(
+            levels=[int(level) for level in args.levels.split(',') if level.strip()],
+            rounds=args.rounds,
+            races=[race.strip() for race in args.races.split(',')] if args.races else list(RACES),
+            seed=args.seed,
+            json_path=args.json_path
+        )
+        sys.exit(0 if success else 1)
+
+    if args.command == 'bench-login':
+        from bench_login import ROUTES, run_bench_login
+        success = run_bench_login(
+            duration=args.duration,
+            concurrency=args.concurrency,
+            routes=[route.strip() for route in args.routes.split(',')] if args.routes else ROUTES,
+            baseline_path=args.baseline_path,
+            json_path=args.json_path
+        )
+        sys.exit(0 if success else 1)
+
+    if args.command == 'bench-headers':
+        from bench_headers import run_bench_headers
+        success = run_bench_headers(
+            samples=args.samples,
+            baseline_path=args.baseline_path,
+            json_path=args.json_path
+        )
+        sys.exit(0 if success else 1)
+
+    if args.command == 'bench-sessions':
+        from bench_sessions import run_bench_sessions
+        success = run_bench_sessions(
+            sizes=[int(size) for size in args.sizes.split(',') if size.strip()],
+            users=args.users,
+            duration=args.duration,
+            concurrency=args.concurrency,
+            budget_ms=args.budget_ms,
+            json_path=args.json_path
+        )
+        sys.exit(0 if success else 1)
+
+    if args.command == 'soak-sessions':
+        from soak_sessions import run_soak_sessions
+        success = run_soak_sessions(
+            rate=args.rate,
+            duration=args.duration,
+            sample_every=args.sample_every,
+            logout_every=args.logout_every,
+            json_path=args.json_path
+        )
+        sys.exit(0 if success else 1)
+
+    run_all_tests_with_unittest(
+        verbose=args.verbose,
+        workers=max(1, args.workers),
+        min_connection_reuse=args.min_connection_reuse,
+        latency_json=args.latency_json or None
+    )
\ No newline at end of file
@@ -11,9 +11,13 @@ import os
 from utils import (
     COLOR_DEFAULT, COLOR_SUCCESS, COLOR_FAIL, COLOR_PRIMARY, COLOR_SECONDARY, COLOR_WARN,
     BASE_API_URL, DEV_USERNAME, DEV_COMPANY, DEV_COMPANY_NAME,
-    printc, printv, print_header, # print_header might be less useful in unittest, but keep for now
-    get_authenticated_session, logout_via_api # Assuming logout_via_api is now in utils
+    printc, printv, print_header, log_request, log_response, # print_header might be less useful in unittest, but keep for now
+    get_authenticated_session, release_session, unique_id, # pooled sessions, see utils.SessionPool
+    mapping_from_cookie, is_mapping_version, # company_mapping is full JSON or a version, see utils
+    new_session, api_request # shared keep-alive transport...
 )
+from cleanup import CLEANUP
+from resources import uses_resources, company
 
 # --- Company-Specific API Helper Functions ---
 
@@ -26,8 +30,9 @@ def update_company_via_api(session, new_company_name, verbose=False,
     """
     url = f"{BASE_API_URL}/companies/{new_company_name}"
     
-    current_company_key = session.cookies.get("company", "N/A (cookie missing)")
-    printv(f"   > PUT {url} - Updating company (cookie: '{current_company_key}') to '{new_company_name}'", verbose)
+    if verbose:
+        current_company_key = session.cookies.get("company", "N/A (cookie missing)")
+        log_request("PUT", url, verbose, "Updating company (cookie: '%s') to '%s'", current_company_key, new_company_name)
     
     # --- Start Manual Cookie Header Construction ---
     headers_to_send = {**session.headers} # Start with any default session headers (e.g., User-Agent)
@@ -53,18 +58,15 @@ def update_company_via_api(session, new_company_name, verbose=False,
     # --- End Manual Cookie Header Construction ---
 
     # Make the request with the meticulously crafted headers
-    response = session.put(url, headers=headers_to_send, verify=False)
+    response = api_request(session, "PUT", url, route="/companies/{newName}", headers=headers_to_send)
     
-    printv(f"   < Status: {response.status_code}", verbose)
-    if verbose and response.status_code >= 400 and response.text:
-        try:
-            printv(f"   < Response: {json.dumps(response.json(), indent=2)}", verbose)
-        except json.JSONDecodeError:
-            printv(f"   < Response (text): {response.text}", verbose)
+    log_response(response, verbose, show_body=response.status_code >= 400)
     return response
 
 # --- unittest.TestCase Class ---
 
+# every test logs into DEV_COMPANY and checks responses against its display name...
+@uses_resources(reads=[company(DEV_COMPANY)])
 class CompanyApiTests(unittest.TestCase):
     #_global_verbose = False
 
@@ -97,16 +99,20 @@ class CompanyApiTests(unittest.TestCase):
     def tearDown(self):
         """Runs after each test method."""
         if self.session:
-            logout_via_api(self.session, verbose=False) # Silent cleanup
+            release_session(self.session) # Discarded by the pool if company_mapping changed
 
     # Test 1: Update Company (Success)
+    @uses_resources(writes=[company(DEV_COMPANY)]) # renames the shared company until the finally below
     def test_1_update_company_success(self):
         # We will update DEV_COMPANY, so get a session authenticated for it.
         # Session is already created in setUp.
         
         company_key_in_cookie = DEV_COMPANY # e.g., "BRAUNS"
-        temp_display_name = f"{self.original_dev_company_display_name}_TEMP_{time.time_ns() % 1000}" # Ensure unique temp name
+        temp_display_name = f"{self.original_dev_company_display_name}_TEMP_{unique_id(3)}" # Ensure unique temp name
 
+        # journal the original name first, so a crash before the revert below is undone by the next run...
+        CLEANUP.guard_company(company_key_in_cookie, self.original_dev_company_display_name)
+        original_company_mapping_cookie = self.session.cookies.get("company_mapping")
         try:
             printv("\n--- Attempting To Valid Update (Ok [200]) ---", self.verbose, color=COLOR_SECONDARY)
             # Perform the update
@@ -120,9 +126,14 @@ class CompanyApiTests(unittest.TestCase):
             # Verify the cookie 'company_mapping' was updated (optional, but good)
             updated_company_mapping_cookie = self.session.cookies.get("company_mapping")
             self.assertIsNotNone(updated_company_mapping_cookie, "company_mapping cookie not found after update")
+
+            # JSON or version alike, a renamed company must change the cookie...
+            self.assertNotEqual(updated_company_mapping_cookie, original_company_mapping_cookie,
+                                "company_mapping cookie unchanged after the update")
             try:
-                decoded_cookie_value = urllib.parse.unquote(updated_company_mapping_cookie)
-                mapping = json.loads(decoded_cookie_value)
+                mapping = mapping_from_cookie(self.session, "company_mapping")
+                if is_mapping_version(updated_company_mapping_cookie):
+                    printv(f"  company_mapping is version {urllib.parse.unquote(updated_company_mapping_cookie)}", self.verbose)
             
                 # It updates the value, not the key. The key (DEV_COMPANY) stays the same.
                 self.assertEqual(mapping.get(company_key_in_cookie), temp_display_name, 
@@ -140,23 +151,18 @@ class CompanyApiTests(unittest.TestCase):
             # This cleanup MUST be robust, as subsequent tests might depend on original company name
             printv(f"\n*** CLEANUP: Reverting company from '{temp_display_name}' back to '{self.original_dev_company_display_name}' ***", self.verbose, COLOR_PRIMARY)
             
-            # The session used in the test might have its 'company_mapping' cookie updated locally,
-            # but the actual API call needs the original 'company' key in its cookie for the PUT to work correctly.
-            # get_authenticated_session will ensure the 'company' cookie is correct for the DEV_COMPANY.
-            cleanup_session = get_authenticated_session(company=DEV_COMPANY, verbose=self.verbose) 
-            if cleanup_session:
-                printv("\n--- Attempting To Reset Company (Ok [200]) ---", self.verbose, color=COLOR_SECONDARY)
-                revert_response = update_company_via_api(cleanup_session, self.original_dev_company_display_name, self.verbose)
-                if revert_response.status_code == 200:
-                    printv("  < CLEANUP: Company name reverted successfully.", self.verbose, COLOR_SUCCESS)
-                else:
-                    printc(f"  < CLEANUP: Failed to revert company name. Status: {revert_response.status_code}. Response: {revert_response.text}", COLOR_FAIL)
-                    # If cleanup fails, raise an error to indicate a critical issue
-                    self.fail(f"Critical Cleanup Failure: Could not revert company name for {DEV_COMPANY}")
-                logout_via_api(cleanup_session, verbose=False) # Logout cleanup session
+            # The test's own session only had its 'company_mapping' cookie updated, its 'company'
+            # key cookie (what the PUT resolves the company by) is unchanged, so it can revert
+            # directly instead of logging in a separate cleanup session.
+            printv("\n--- Attempting To Reset Company (Ok [200]) ---", self.verbose, color=COLOR_SECONDARY)
+            revert_response = update_company_via_api(self.session, self.original_dev_company_display_name, self.verbose)
+            if revert_response.status_code == 200:
+                CLEANUP.release_company(company_key_in_cookie)
+                printv("  < CLEANUP: Company name reverted successfully.", self.verbose, COLOR_SUCCESS)
             else:
-                printc("  < CLEANUP: Failed to get cleanup session. Company name may not be reverted.", COLOR_FAIL)
-                self.fail("Critical Cleanup Failure: Could not get cleanup session to revert company name.")
+                printc(f"  < CLEANUP: Failed to revert company name. Status: {revert_response.status_code}. Response: {revert_response.text}", COLOR_FAIL)
+                # If cleanup fails, raise an error to indicate a critical issue (CLEANUP retries the revert at the end of the run)
+                self.fail(f"Critical Cleanup Failure: Could not revert company name for {DEV_COMPANY}")
 
     # Test 2: Update Company (Invalid New Name)
     def test_2_update_company_invalid_new_name(self):
@@ -235,7 +241,7 @@ class CompanyApiTests(unittest.TestCase):
     # Test 5: Update Company (Unauthorized)
     def test_5_update_company_unauthorized(self):
         # Create a session with no authentication
-        session_unauth = requests.Session()
+        session_unauth = new_session()
         session_unauth.cookies.clear() # Ensure no residual cookies
 
         try:
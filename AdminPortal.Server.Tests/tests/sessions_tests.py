@@ -9,9 +9,11 @@ import jwt
 from utils import (
     COLOR_DEFAULT, COLOR_SUCCESS, COLOR_FAIL, COLOR_PRIMARY, COLOR_SECONDARY, COLOR_WARN,
     BASE_API_URL, DEV_USERNAME, DEV_COMPANY,
-    printc, printv, # print_header is less common in unittest methods
-    get_authenticated_session, logout_via_api # Ensure logout_via_api is in utils and works as expected
+    printc, printv, log_request, log_response, # print_header is less common in unittest methods
+    get_authenticated_session, release_session, login_via_api, logout_via_api, # Ensure logout_via_api is in utils and works as expected
+    new_session, api_request # shared keep-alive transport...
 )
+from resources import uses_resources, DEV_USER
 
 # --- API HELPER FUNCTIONS FOR SESSIONS CONTROLLER ---
 
@@ -20,14 +22,9 @@ def get_current_driver_via_api(session, verbose=False):
     Helper to call GET /v1/sessions/me and return the response.
     """
     url = f"{BASE_API_URL}/sessions/me"
-    printv(f"  > GET {url} - Getting current driver session", verbose)
-    response = session.get(url, verify=False)
-    printv(f"  < Status: {response.status_code}", verbose)
-    try:
-        printv(f"  < Response: {json.dumps(response.json(), indent=2)}", verbose)
-    except json.JSONDecodeError:
-        if response.text:
-            printv(f"  < Response (text): {response.text}", verbose)
+    log_request("GET", url, verbose, "Getting current driver session")
+    response = api_request(session, "GET", url, route="/sessions/me")
+    log_response(response, verbose)
     return response
 
 # Note: logout_via_api is assumed to be in utils.py and imported.
@@ -39,14 +36,9 @@ def return_session_via_api(session, session_id, verbose=False):
     The userId parameter is expected to be the sessionId.
     """
     url = f"{BASE_API_URL}/sessions/return/{session_id}"
-    printv(f"  > POST {url} - Initializing return session", verbose)
-    response = session.post(url, verify=False)
-    printv(f"  < Status: {response.status_code}", verbose)
-    try:
-        printv(f"  < Response: {json.dumps(response.json(), indent=2)}", verbose)
-    except json.JSONDecodeError:
-        if response.text:
-            printv(f"  < Response (text): {response.text}", verbose)
+    log_request("POST", url, verbose, "Initializing return session")
+    response = api_request(session, "POST", url, route="/sessions/return/{userId}")
+    log_response(response, verbose)
     return response
 
 def post_credentials_via_api(session, verbose=False):
@@ -54,14 +46,9 @@ def post_credentials_via_api(session, verbose=False):
     Helper to call POST /v1/sessions/me and return the response.
     """
     url = f"{BASE_API_URL}/sessions/me"
-    printv(f"  > POST {url} - Attempting credentials refresh", verbose)
-    response = session.post(url, verify=False)
-    printv(f"  < Status: {response.status_code}", verbose)
-    try:
-        printv(f"  < Response: {json.dumps(response.json(), indent=2)}", verbose)
-    except json.JSONDecodeError:
-        if response.text:
-            printv(f"  < Response (text): {response.text}", verbose)
+    log_request("POST", url, verbose, "Attempting credentials refresh")
+    response = api_request(session, "POST", url, route="/sessions/me")
+    log_response(response, verbose)
     return response
 
 def logout_with_id_via_api(session, session_id, verbose=False, session_body=None):
@@ -70,22 +57,30 @@ def logout_with_id_via_api(session, session_id, verbose=False, session_body=None
     with the userId parameter being the session ID.
     """
     url = f"{BASE_API_URL}/sessions/logout/{session_id}"
-    printv(f"  > POST {url} - Logging out session with ID {session_id}", verbose)
+    log_request("POST", url, verbose, "Logging out session with ID %s", session_id)
     
     headers = {'Content-Type': 'application/json'}
     body = session_body if session_body is not None else {}
     
-    response = session.post(url, json=body, headers=headers, verify=False)
-    printv(f"  < Status: {response.status_code}", verbose)
-    try:
-        printv(f"  < Response: {json.dumps(response.json(), indent=2)}", verbose)
-    except json.JSONDecodeError:
-        if response.text:
-            printv(f"  < Response (text): {response.text}", verbose)
+    response = api_request(session, "POST", url, route="/sessions/logout/{userId}", json=body, headers=headers)
+    log_response(response, verbose)
+    return response
+
+def get_token_cache_via_api(session, verbose=False):
+    """
+    Helper to call GET /v1/sessions/dev-token-cache (Development only): token cache
+    counters and whether the session's access token is currently cached.
+    """
+    url = f"{BASE_API_URL}/sessions/dev-token-cache"
+    log_request("GET", url, verbose, "Reading token cache diagnostics")
+    response = api_request(session, "GET", url, route="/sessions/dev-token-cache")
+    log_response(response, verbose)
     return response
 
 # --- unittest.TestCase Class ---
 
+# each test only touches its own dev-login session row...
+@uses_resources(reads=[DEV_USER])
 class SessionApiTests(unittest.TestCase):
     # No _global_verbose class variable needed, as it's read from env var in setUp
 
@@ -112,30 +107,15 @@ class SessionApiTests(unittest.TestCase):
 
     def tearDown(self):
         """Runs after each test method."""
-        # Ensure the session is logged out, especially if the test itself didn't log out
-        # or if it failed before logging out.
+        # Hand the session back to the pool. Sessions that a test logged out or whose
+        # cookies changed (return, refresh, etc.) are logged out and discarded there,
+        # untouched sessions are reused by the next setUp instead of logging in again.
         if self.session:
-            printv(f"\n--- CLEANUP: Logging out session for {self.session.cookies.get('username', 'N/A')} ---", self.verbose, COLOR_SECONDARY)
+            printv(f"\n--- CLEANUP: Releasing session for {self.session.cookies.get('username', 'N/A')} ---", self.verbose, COLOR_SECONDARY)
             try:
-                # Use a fresh session for cleanup if self.session might be compromised
-                # For logout, it's often fine to use the existing session unless the test
-                # explicitly invalidates it in a way that prevents subsequent logout calls.
-                # However, for maximum robustness, you could get a new auth session here.
-                # For simplicity, we'll use the existing self.session.
-                logout_response = logout_via_api(self.session, verbose=self.verbose)
-                if logout_response.status_code == 200:
-                    printv("  < CLEANUP: Session logged out successfully.", self.verbose, COLOR_SUCCESS)
-                else:
-                    # If logout fails (e.g., already logged out, invalid session), log a warning.
-                    # Don't fail the tearDown unless it's a critical issue preventing further tests.
-                    printc(f"  < CLEANUP: Failed to logout session. Status: {logout_response.status_code}", COLOR_WARN)
+                release_session(self.session)
             except Exception as e:
-                printc(f"  < CLEANUP ERROR: Exception during session logout: {e}", COLOR_FAIL)
-        
-        # Clear cookies locally to ensure absolute isolation for the next setUp,
-        # even if logout API didn't clear them from the session object.
-        if self.session:
-            self.session.cookies.clear()
+                printc(f"  < CLEANUP ERROR: Exception during session release: {e}", COLOR_FAIL)
 
 
     # Test 1: Get Current Driver (Success)
@@ -160,7 +140,7 @@ class SessionApiTests(unittest.TestCase):
     # Test 2: Get Current Driver (Missing Cookie - Unauthorized/BadRequest)
     def test_2_get_current_driver_missing_cookie(self):
         # Create a session with no cookies for this specific test
-        session_no_cookies = requests.Session()
+        session_no_cookies = new_session()
         session_no_cookies.cookies.clear()
 
         try:
@@ -259,7 +239,7 @@ class SessionApiTests(unittest.TestCase):
     # Test 5: Return Session (Unauthorized)
     def test_5_return_session_unauthorized(self):
         # Create a session with no cookies (unauthenticated) for this test
-        session_no_cookies = requests.Session()
+        session_no_cookies = new_session()
         session_no_cookies.cookies.clear()
 
         try:
@@ -276,6 +256,50 @@ class SessionApiTests(unittest.TestCase):
             printc(f"Test Return Session (Unauthorized) FAILED: {e}", COLOR_FAIL)
             raise
 
+    # Test 6: Repeat /me calls are served from the token cache, logout revokes right away
+    def test_6_token_cache_and_logout_revocation(self):
+        # a session of its own, the pooled one's token may already be cached by an earlier test...
+        session = login_via_api(verbose=self.verbose)
+        if session is None:
+            self.fail("Dev login failed, cannot test the token cache.")
+        self.addCleanup(release_session, session) # logs it out if the test stops early
+
+        before = get_token_cache_via_api(session, self.verbose)
+        if before.status_code == 404:
+            self.skipTest("Token cache diagnostics are only served in the Development environment.")
+        self.assertEqual(before.status_code, 200, f"Expected 200 OK, got {before.status_code}. Response: {before.text}")
+
+        try:
+            self.assertFalse(before.json()["cached"], "Access token is cached before its first /me call.")
+
+            # server-wide counters move with every concurrent test, so probe this token instead...
+            printv("\n--- Attempting Get Current Driver twice ---", self.verbose, COLOR_SECONDARY)
+            response = get_current_driver_via_api(session, self.verbose)
+            self.assertEqual(response.status_code, 200, f"Expected 200 OK, got {response.status_code}. Response: {response.text}")
+            session_id = response.json()["userId"]
+            self.assertTrue(get_token_cache_via_api(session, self.verbose).json()["cached"], "Access token is not cached after its first /me call.")
+
+            # the repeat call is served from the cache...
+            response = get_current_driver_via_api(session, self.verbose)
+            self.assertEqual(response.status_code, 200, f"Expected 200 OK, got {response.status_code}. Response: {response.text}")
+            self.assertEqual(response.json()["userId"], session_id, "Cached /me call resolved a different session.")
+
+            # keep the cookies, log out, then replay them...
+            stale = new_session()
+            stale.cookies.update(session.cookies)
+            printv(f"\n--- Attempting Logout, then Get Current Driver with the old cookies ---", self.verbose, COLOR_SECONDARY)
+            response = logout_with_id_via_api(session, session_id, self.verbose)
+            self.assertEqual(response.status_code, 200, f"Expected 200 OK, got {response.status_code}. Response: {response.text}")
+
+            response = get_current_driver_via_api(stale, self.verbose)
+            self.assertEqual(response.status_code, 401, f"Expected 401 after logout, got {response.status_code}. Response: {response.text}")
+            self.assertFalse(get_token_cache_via_api(stale, self.verbose).json()["cached"], "Logged out token is still cached.")
+
+            printc("Test Token Cache and Logout Revocation PASSED.", COLOR_SUCCESS)
+        except Exception as e:
+            printc(f"Test Token Cache and Logout Revocation FAILED: {e}", COLOR_FAIL)
+            raise
+
 # --- MAIN EXECUTION BLOCK ---
 if __name__ == "__main__":
     # 1. Parse custom arguments first
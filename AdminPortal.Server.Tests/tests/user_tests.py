@@ -9,65 +9,49 @@ import os
 from utils import (
     COLOR_DEFAULT, COLOR_SUCCESS, COLOR_FAIL, COLOR_PRIMARY, COLOR_SECONDARY, COLOR_WARN,
     BASE_API_URL, DEV_USERNAME, DEV_COMPANY, DEV_COMPANY_NAME, # api/user presets...
-    printc, printv, print_header,
-    get_authenticated_session, generate_unique_user_data, logout_via_api # log and session helpers...
+    printc, printv, print_header, log_request, log_response,
+    get_authenticated_session, release_session, generate_unique_user_data, unique_id, # log and session helpers...
+    new_session, api_request # shared keep-alive transport...
 )
+from cleanup import CLEANUP
+from resources import uses_resources, DEV_USER, USER_NAMESPACE
 
 ''' User-Specific API Helper Functions (kept as standalone functions) '''
 
 def create_user_via_api(session, user_data, verbose=False):
     """Helper to call POST /v1/users and return the response."""
     url = f"{BASE_API_URL}/users"
-    printv(f"  > POST {url} - Creating user: {user_data['Username']}", verbose)
-    response = session.post(url, json=user_data, verify=False)
-    printv(f"  < Status: {response.status_code}", verbose)
-    if verbose and response.status_code >= 400 and response.text:
-        try:
-            printv(f"  < Response: {json.dumps(response.json(), indent=2)}", verbose)
-        except json.JSONDecodeError:
-            printv(f"  < Response (text): {response.text}", verbose)
+    log_request("POST", url, verbose, "Creating user: %s", user_data['Username'])
+    response = api_request(session, "POST", url, route="/users", json=user_data)
+    log_response(response, verbose, show_body=response.status_code >= 400)
     return response
 
 def get_user_via_api(session, username, verbose=False):
     """Helper to call GET /v1/users/{username} and return the response."""
     url = f"{BASE_API_URL}/users/{username}"
-    printv(f"  > GET {url} - Getting user: {username}", verbose)
-    response = session.get(url, verify=False)
-    printv(f"  < Status: {response.status_code}", verbose)
-    if verbose and response.status_code >= 400 and response.text:
-        try:
-            printv(f"  < Response: {json.dumps(response.json(), indent=2)}", verbose)
-        except json.JSONDecodeError:
-            printv(f"  < Response (text): {response.text}", verbose)
+    log_request("GET", url, verbose, "Getting user: %s", username)
+    response = api_request(session, "GET", url, route="/users/{username}")
+    log_response(response, verbose, show_body=response.status_code >= 400)
     return response
 
 def update_user_via_api(session, prev_username, new_user_data, verbose=False):
     """Helper to call PUT /v1/users/{username} and return the response."""
     url = f"{BASE_API_URL}/users/{prev_username}"
-    printv(f"  > PUT {url} - Updating user '{prev_username}' to '{new_user_data['Username']}'", verbose)
-    response = session.put(url, json=new_user_data, verify=False)
-    printv(f"  < Status: {response.status_code}", verbose)
-    if verbose and response.status_code >= 400 and response.text:
-        try:
-            printv(f"  < Response: {json.dumps(response.json(), indent=2)}", verbose)
-        except json.JSONDecodeError:
-            printv(f"  < Response (text): {response.text}", verbose)
+    log_request("PUT", url, verbose, "Updating user '%s' to '%s'", prev_username, new_user_data['Username'])
+    response = api_request(session, "PUT", url, route="/users/{prevUsername}", json=new_user_data)
+    log_response(response, verbose, show_body=response.status_code >= 400)
     return response
 
 def delete_user_via_api(session, username, verbose=False, expect_fail=False):
     """Helper to call DELETE /v1/users/{username} and return the response."""
     url = f"{BASE_API_URL}/users/{username}"
-    printv(f"  > DELETE {url} - Deleting user: {username}", verbose)
-    response = session.delete(url, verify=False)
-    printv(f"  < Status: {response.status_code}", verbose)
-    if verbose and response.status_code != 204: # Delete usually returns 204 No Content
-        if not expect_fail or verbose: # Only print response body if not expecting failure or if verbose
-            try:
-                printv(f"  < Response: {json.dumps(response.json(), indent=2)}", verbose)
-            except json.JSONDecodeError:
-                printv(f"  < Response (text): {response.text}", verbose)
+    log_request("DELETE", url, verbose, "Deleting user: %s", username)
+    response = api_request(session, "DELETE", url, route="/users/{username}")
+    log_response(response, verbose, show_body=response.status_code != 204) # Delete usually returns 204 No Content
     return response
 
+# tests create uniquely named throwaway users, so they share the namespace rather than own it...
+@uses_resources(reads=[USER_NAMESPACE])
 class UserApiTests(unittest.TestCase):
     #_global_verbose = False
 
@@ -93,68 +77,36 @@ class UserApiTests(unittest.TestCase):
         if not self.session:
             self.skipTest("Setup failed: Could not get authenticated session for DEV_COMPANY.")
 
-        self.users_to_cleanup = set() # sets cleanly handle duplicates...
-
     def tearDown(self):
         """Runs after each test method."""
-        cleanup_session = None
-        try:
-            cleanup_session = get_authenticated_session(company=DEV_COMPANY, verbose=False)
-            if not cleanup_session:
-                printc("WARNING: Failed to get cleanup session. Lingering users may remain.", COLOR_WARN)
-                return # Can't clean up without a session
-        except Exception as e:
-            printc(f"WARNING: Exception getting cleanup session: {e}. Lingering users may remain.", COLOR_WARN)
-            return
-
-        for username in list(self.users_to_cleanup): # Iterate over a copy, as items might be removed
-            printv(f"\n--- CLEANUP: Attempting to delete user '{username}' ---", self.verbose, COLOR_SECONDARY)
-            try:
-                # Use expect_fail=True in cleanup if you anticipate 404 for already deleted users
-                delete_response = delete_user_via_api(cleanup_session, username, verbose=self.verbose, expect_fail=True)
-                if delete_response.status_code == 204: # No Content - successful delete
-                    printv(f"  < CLEANUP: User '{username}' deleted successfully.", self.verbose, COLOR_SUCCESS)
-                elif delete_response.status_code == 404: # Not Found - user already gone
-                    printv(f"  < CLEANUP: User '{username}' not found (likely already deleted).", self.verbose, COLOR_WARN)
-                else:
-                    printc(f"  < CLEANUP: Failed to delete user '{username}'. Status: {delete_response.status_code}. Response: {delete_response.text}", COLOR_FAIL)
-            except Exception as e:
-                printc(f"  < CLEANUP ERROR: Exception while deleting user '{username}': {e}", COLOR_FAIL)
-        
-        if cleanup_session: # Logout the cleanup session
-            logout_via_api(cleanup_session, verbose=False)
-
-        # Always logout the main test session at the end of tearDown
+        # Users created by the test are deleted in one concurrent batch at the end of
+        # the run (or shard), see cleanup.CLEANUP; only the session goes back here.
         if self.session:
-            logout_via_api(self.session, verbose=False) # Silent cleanup
+            release_session(self.session) # Discarded by the pool if the test changed it
 
-    # Helper to create user and track in cleanup list...
+    # Helper to create user and track in cleanup registry...
     def _create_and_track_user(self, user_data):
+        # journaled before the request, so a crash mid-create still gets cleaned up...
+        newly_tracked = CLEANUP.track_user(user_data["Username"])
         response = create_user_via_api(self.session, user_data, self.verbose)
-        if response.status_code == 201:
-            self.users_to_cleanup.add(user_data["Username"])
+        if response.status_code != 201 and newly_tracked:
+            CLEANUP.forget_user(user_data["Username"])
         return response
     
-    # Helper to update user and track in cleanup list...
+    # Helper to update user and track in cleanup registry...
     def _update_and_track_user(self, prev_username, new_user_data):
         response = update_user_via_api(self.session, prev_username, new_user_data, self.verbose)
         if response.status_code == 200: # Assuming 200 OK for successful update
-            # If the username was changed, remove old and add new to cleanup list
-            if prev_username in self.users_to_cleanup and prev_username != new_user_data["Username"]:
-                self.users_to_cleanup.remove(prev_username)
-                self.users_to_cleanup.add(new_user_data["Username"])
-            elif prev_username not in self.users_to_cleanup:
-                # If for some reason prev_username wasn't tracked, but update succeeded, track the new one
-                self.users_to_cleanup.add(new_user_data["Username"])
+            # If the username was changed (or wasn't tracked at all), the new name is what needs deleting
+            CLEANUP.rename_user(prev_username, new_user_data["Username"])
         return response
     
-    # Helper to delete user and remove from cleanup list...
+    # Helper to delete user and remove from cleanup registry...
     def _delete_and_untrack_user(self, username, expect_fail=False):
         response = delete_user_via_api(self.session, username, self.verbose, expect_fail)
         if response.status_code == 204 or (expect_fail and response.status_code == 404):
             # Only remove from tracking if deletion was expected to succeed or user was already not found
-            if username in self.users_to_cleanup:
-                self.users_to_cleanup.remove(username)
+            CLEANUP.forget_user(username)
         return response
 
     # Test 1: Create a new user (Success)
@@ -306,11 +258,11 @@ class UserApiTests(unittest.TestCase):
         self.assertEqual(create_response.status_code, 201, f"Expected 201 Created, got {create_response.status_code}. Response: {create_response.text}")
 
         # init update data...
-        unique_id = uuid.uuid4().hex[:8]
+        suffix = unique_id()
         updated_user_data = {
             **user_data, 
-            "Username": f"{user_data['Username']}_{unique_id}",
-            "Powerunit": f"{unique_id[:3]}"
+            "Username": f"{user_data['Username']}_{suffix}",
+            "Powerunit": f"{suffix[:3]}"
         }
         updated_user_data["Companies"].append("TCS")
         updated_user_data["Modules"].remove("admin")
@@ -347,8 +299,8 @@ class UserApiTests(unittest.TestCase):
             get_response_json = get_response.json()
 
             # assert updates were correctly set...
-            self.assertEqual(get_response_json["Username"], f"{user_data['Username']}_{unique_id}", "Username not updated")
-            self.assertEqual(get_response_json["Powerunit"], f"{unique_id[:3]}", "Powerunit not updated")
+            self.assertEqual(get_response_json["Username"], f"{user_data['Username']}_{suffix}", "Username not updated")
+            self.assertEqual(get_response_json["Powerunit"], f"{suffix[:3]}", "Powerunit not updated")
             self.assertIn("TCS", get_response_json["Companies"], "Updated companies list mismatch")
             self.assertNotIn("admin", get_response_json["Modules"], "Updated modules list mismatch")
             
@@ -452,6 +404,7 @@ class UserApiTests(unittest.TestCase):
             raise
 
     # Test 11: Delete Self (Conflict)
+    @uses_resources(reads=[DEV_USER]) # relies on DEV_USERNAME existing and being logged in
     def test_11_delete_current_user_conflict(self):
         try:
             # attempt to delete the user whose cookie is currently active...
@@ -472,7 +425,7 @@ class UserApiTests(unittest.TestCase):
 
     def test_12_unauthorized_access(self):
         # Create a session with no authentication
-        session_unauth = requests.Session()
+        session_unauth = new_session()
         session_unauth.cookies.clear() # Ensure no residual cookies
 
         try:
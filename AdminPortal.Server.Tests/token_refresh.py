@@ -0,0 +1,149 @@
+import heapq
+import random
+import threading
+import time
+import weakref
+
+import jwt
+
+from utils import COLOR_WARN, DEV_USERNAME, DEV_COMPANY, printc, login_via_api, new_session
+from sessions_tests import get_current_driver_via_api, logout_with_id_via_api
+
+''' Background refresh of access tokens shortly before they expire, for long-lived sessions '''
+
+def token_expiry(session):
+    """Unix time the session's access_token expires at (from its `exp` claim), None if unknown."""
+    token = session.cookies.get("access_token")
+    if not token:
+        return None
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        return None
+    return claims.get("exp")
+
+class TokenRefresher:
+    """
+    Keeps watched sessions authenticated by re-issuing their tokens before `exp`.
+
+    One daemon thread sleeps on a heap of refresh deadlines; each deadline is `lead`
+    seconds before the token's expiry minus a random jitter (up to `jitter` seconds),
+    so sessions that logged in together don't all refresh in the same instant. A refresh
+    runs dev-login for the session's (username, company) and copies the new cookies into
+    the watched session in place, callers keep using the same requests.Session.
+
+    Every dev-login inserts a SESSIONS row, so once the new cookies are in place the old
+    row is logged out and `on_refresh(session_id)` (if given to watch()) learns the new
+    row's id, for callers that post return/{userId} or logout/{userId} with it.
+
+    The API has no endpoint that mints a new access token for an existing session:
+    return/{userId} only re-appends the cookies with a later cookie expiry while the
+    JWT inside keeps its original 15 minute `exp`, so a fresh dev-login is the refresh.
+    """
+
+    def __init__(self, lead=60.0, jitter=30.0):
+        self.lead = lead
+        self.jitter = jitter
+        self.refreshes = 0
+        self.failures = 0
+        self._heap = [] # (refresh_at, seq, session id)
+        self._watched = {} # session id -> (weakref to session, username, company, on_refresh)
+        self._seq = 0
+        self._random = random.Random()
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+    def watch(self, session, username=DEV_USERNAME, company=DEV_COMPANY, on_refresh=None):
+        """Starts refreshing `session` ahead of its token expiry, returns the session."""
+        expires_at = token_expiry(session)
+        if expires_at is None:
+            return session
+        with self._wakeup:
+            self._watched[id(session)] = (weakref.ref(session), username, company, on_refresh)
+            self._schedule(id(session), expires_at)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="token-refresh", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return session
+
+    def unwatch(self, session):
+        self._unwatch_key(id(session))
+
+    def _unwatch_key(self, key):
+        with self._wakeup:
+            self._watched.pop(key, None) # stale heap entries are skipped when they come due
+
+    def _schedule(self, key, expires_at):
+        now = time.time()
+        # short-lived tokens refresh halfway through their remaining life instead...
+        ahead = min(self.lead + self._random.uniform(0, self.jitter), max(0.0, expires_at - now) / 2)
+        refresh_at = expires_at - ahead
+        self._seq += 1
+        heapq.heappush(self._heap, (refresh_at, self._seq, key))
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._heap or self._heap[0][0] > time.time():
+                    self._wakeup.wait(timeout=self._heap[0][0] - time.time() if self._heap else None)
+                _, _, key = heapq.heappop(self._heap)
+                watched = self._watched.get(key)
+            if watched is not None:
+                self._refresh(key, *watched)
+
+    @staticmethod
+    def _session_id(session):
+        me = get_current_driver_via_api(session)
+        return me.json().get("userId") if me.status_code == 200 else None
+
+    def _logout(self, session, session_id, what):
+        try:
+            session_id = session_id if session_id is not None else self._session_id(session)
+            if session_id is not None:
+                logout_with_id_via_api(session, session_id)
+        except Exception as e:
+            printc(f"Logging out {what} failed: {e}", COLOR_WARN)
+
+    def _refresh(self, key, session_ref, username, company, on_refresh):
+        session = session_ref()
+        if session is None:
+            self._unwatch_key(key)
+            return
+        # the old cookies on a session of their own, logging that out mustn't clear the new ones...
+        old = new_session()
+        old.cookies.update(session.cookies)
+        fresh = fresh_id = old_id = None
+        adopted = False
+        try:
+            try:
+                fresh = login_via_api(username, company)
+                if fresh is not None:
+                    fresh_id = self._session_id(fresh)
+                    old_id = self._session_id(old)
+            except Exception as e:
+                printc(f"Token refresh for {username} ({company}) failed: {e}", COLOR_WARN)
+            with self._wakeup:
+                if key not in self._watched:
+                    return # unwatched while logging in, the owner logs out the session it kept
+                if fresh_id is None:
+                    self.failures += 1
+                    self._seq += 1 # retry shortly instead of waiting for the next deadline...
+                    heapq.heappush(self._heap, (time.time() + 5.0, self._seq, key))
+                    return
+                session.cookies.update(fresh.cookies)
+                adopted = True
+                self.refreshes += 1
+                self._schedule(key, token_expiry(session) or time.time() + self.lead)
+        finally:
+            # a login nobody adopted is a SESSIONS row nobody would ever log out...
+            if fresh is not None and not adopted:
+                self._logout(fresh, fresh_id, f"an unused refresh login of {username} ({company})")
+
+        if on_refresh is not None:
+            on_refresh(fresh_id)
+        if old_id is not None:
+            self._logout(old, old_id, f"the pre-refresh session of {username} ({company})")
+
+# process-wide refresher, see loadgen.WorkerContext...
+TOKEN_REFRESHER = TokenRefresher()
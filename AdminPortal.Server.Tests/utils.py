@@ -1,8 +1,21 @@
 import requests
+import os
 import json
 import uuid
+import hashlib
+import time
+import atexit
+import socket
+import threading
 import urllib3
 import urllib.parse # For unquoting cookie values
+from collections import deque
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from latency import LATENCY
+from cassette import Cassette
 
 # Suppress the InsecureRequestWarning that comes with verify=False
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -17,11 +30,21 @@ COLOR_SECONDARY = "\033[96m" # Cyan
 COLOR_WARN = "\033[93m"    # Yellow
 
 # --- CONFIGURATION ---
-BASE_API_URL = "https://localhost:7242/v1"
+BASE_API_URL = os.environ.get("API_TEST_BASE_URL", "https://localhost:7242/v1") # eg: the fake_api stand-in
 DEV_USERNAME = "cbraatz" # Ensure this user exists in your local DB for dev-login
 DEV_COMPANY = "BRAUNS" # Default company for dev login
 DEV_COMPANY_NAME = "Brauns Express Inc"
 
+def set_base_api_url(url):
+    """
+    Points the harness at another API root (eg: a FakeApiServer). Must be called before
+    the test modules are imported, since they copy BASE_API_URL at import time; the
+    environment variable carries the choice into spawned worker processes.
+    """
+    global BASE_API_URL
+    BASE_API_URL = url
+    os.environ["API_TEST_BASE_URL"] = url
+
 # --- SHARED HELPER FUNCTIONS ---
 
 def printc(message, color=COLOR_DEFAULT):
@@ -33,13 +56,250 @@ def printv(message, verbose=False, color=COLOR_DEFAULT):
     if verbose:
         printc(message, color)
 
+def log_request(method, url, verbose, description="", *args):
+    """Helper-side '> METHOD url - description' line, %-formatted with args only when it will be shown."""
+    if verbose:
+        printc(f"  > {method} {url} - {description % args if args else description}")
+
+def log_response(response, verbose, show_body=True):
+    """Helper-side '< Status' line (plus the pretty-printed body), only decoded when it will be shown."""
+    if not verbose:
+        return
+    printc(f"  < Status: {response.status_code}")
+    if show_body and response.text:
+        printc(f"  < Response: {_format_body(response)}")
+
+def _format_body(response, limit=None):
+    try:
+        text = json.dumps(response.json(), indent=2)
+    except ValueError:
+        text = response.text
+    if limit and len(text) > limit:
+        text = f"{text[:limit]}... ({len(text) - limit} more chars)"
+    return text
+
+# --- RECENT REQUEST LOG (dumped for failing tests) ---
+
+class RequestLog:
+    """
+    Ring buffer of the last `size` API calls made through api_request. Appending only keeps
+    references to the request/response objects, nothing is formatted unless format() is
+    called, which the test runner does for failing/erroring tests only.
+    """
+
+    def __init__(self, size=50):
+        self._records = deque(maxlen=size)
+
+    def resize(self, size):
+        self._records = deque(self._records, maxlen=size)
+
+    def clear(self):
+        self._records.clear()
+
+    def record(self, method, url, route, elapsed, response=None, error=None):
+        self._records.append((method, url, route, elapsed, response, error))
+
+    def __len__(self):
+        return len(self._records)
+
+    def format(self, body_limit=2000):
+        records = list(self._records)
+        if not records:
+            return ""
+        lines = [f"--- Last {len(records)} API request(s), oldest first ---"]
+        for method, url, route, elapsed, response, error in records:
+            lines.append(f"  > {method} {url}" + (f"  [{route}]" if route else ""))
+            if response is None:
+                lines.append(f"  < {type(error).__name__}: {error} after {elapsed * 1000:.1f} ms")
+                continue
+            sent = response.request
+            if sent.headers.get("Cookie"):
+                lines.append(f"    Cookie: {sent.headers['Cookie']}")
+            if sent.body:
+                body = sent.body.decode("utf-8", errors="replace") if isinstance(sent.body, bytes) else str(sent.body)
+                lines.append(f"    Body: {body[:body_limit]}")
+            lines.append(f"  < {response.status_code} {response.reason} in {elapsed * 1000:.1f} ms")
+            if response.headers.get("Location"):
+                lines.append(f"    Location: {response.headers['Location']}")
+            if response.content:
+                lines.extend(f"    {line}" for line in _format_body(response, body_limit).splitlines())
+        return "\n".join(lines)
+
+REQUEST_LOG = RequestLog(int(os.environ.get("API_TEST_REQUEST_LOG_SIZE", "50")))
+
 def print_header(test_number, test_name, test_scenario, color=COLOR_PRIMARY):
     """Prints a standardized test header."""
     header_text = f"\n--- Test {test_number}: {test_name} ({test_scenario}) ---"
     printc(header_text, color)
     printc("-" * len(header_text), color) # Match length of header
 
+# --- SHARED KEEP-ALIVE TRANSPORT ---
+
+class TransportStats:
+    """Thread-safe counters for requests sent vs. connections opened by the shared transport."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_connection(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"requests": self.requests, "connections_opened": self.connections_opened}
+
+TRANSPORT_STATS = TransportStats()
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        TRANSPORT_STATS.count_connection()
+        return super()._new_conn()
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        TRANSPORT_STATS.count_connection()
+        return super()._new_conn()
+
+class KeepAliveAdapter(HTTPAdapter):
+    """
+    One connection pool shared by every session the harness creates. Cookies live on
+    the requests.Session, not on the connection, so sessions for different users can
+    safely share sockets; new sessions (logins, cleanup, unauthenticated checks) then
+    reuse warm keep-alive connections instead of paying a new TCP + TLS handshake.
+    """
+
+    def __init__(self, pool_maxsize=64):
+        super().__init__(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        # enable TCP keep-alive so idle pooled sockets survive between tests...
+        pool_kwargs.setdefault("socket_options", HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ])
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        if CASSETTE is not None and CASSETTE.mode == "replay":
+            return CASSETTE.replay(self, request) # no socket involved, nothing to count...
+        TRANSPORT_STATS.count_request()
+        response = super().send(request, **kwargs)
+        if CASSETTE is not None:
+            CASSETTE.record(request, response)
+        return response
+
+    def close(self):
+        # shared across sessions, a single Session.close() must not tear it down...
+        pass
+
+SHARED_ADAPTER = KeepAliveAdapter()
+
+def new_session():
+    """Returns an empty requests.Session bound to the shared keep-alive transport."""
+    session = requests.Session()
+    session.verify = False
+    session.mount("https://", SHARED_ADAPTER)
+    session.mount("http://", SHARED_ADAPTER)
+    return session
+
+# --- RECORD/REPLAY CASSETTES ---
+
+CASSETTE = None # set by use_cassette(), consulted by KeepAliveAdapter.send
+_TEST_SCOPE = None
+_TEST_SCOPE_COUNTER = 0
+
+def use_cassette(mode, path, salt=None):
+    """
+    Records every request/response of the shared transport to `path` ("record") or serves
+    them back from it without any network ("replay"). The setting is mirrored into the
+    environment so worker processes of a sharded run pick up the same cassette.
+    """
+    global CASSETTE
+    CASSETTE = Cassette(path, mode, salt)
+    os.environ["API_TEST_CASSETTE"] = json.dumps({"mode": mode, "path": path, "salt": CASSETTE.salt})
+    return CASSETTE
+
+def current_cassette():
+    """The active Cassette, or None when talking to the server directly."""
+    return CASSETTE
+
+def set_test_scope(test_id):
+    """Marks requests and unique_id()s as belonging to test_id (None between tests)."""
+    global _TEST_SCOPE, _TEST_SCOPE_COUNTER
+    _TEST_SCOPE, _TEST_SCOPE_COUNTER = test_id, 0
+    if CASSETTE is not None:
+        CASSETTE.set_scope(test_id)
+
+def unique_id(length=8):
+    """
+    Random hex id for test data. With a cassette active the ids are derived from the
+    current test and a per-test counter instead, so a replayed test asks for the very
+    same /users/{username} paths it recorded.
+    """
+    global _TEST_SCOPE_COUNTER
+    if CASSETTE is None:
+        return uuid.uuid4().hex[:length]
+    _TEST_SCOPE_COUNTER += 1
+    seed = f"{CASSETTE.salt}:{_TEST_SCOPE}:{_TEST_SCOPE_COUNTER}"
+    return hashlib.sha1(seed.encode("utf-8")).hexdigest()[:length]
+
+if os.environ.get("API_TEST_CASSETTE"):
+    _cassette_settings = json.loads(os.environ["API_TEST_CASSETTE"])
+    use_cassette(_cassette_settings["mode"], _cassette_settings["path"], _cassette_settings["salt"])
+
+def api_request(session, method, url, route=None, **kwargs):
+    """
+    Sends one API request through the shared transport (binding the session to it if needed).
+    Every call lands in REQUEST_LOG; when a route template (eg: "/users/{username}") is given
+    the round trip is also timed into LATENCY.
+    """
+    if session.get_adapter(url) is not SHARED_ADAPTER:
+        session.mount("https://", SHARED_ADAPTER)
+        session.mount("http://", SHARED_ADAPTER)
+    kwargs.setdefault("verify", False)
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, **kwargs)
+    except Exception as e:
+        REQUEST_LOG.record(method, url, route, time.perf_counter() - start, error=e)
+        raise
+    elapsed = time.perf_counter() - start
+    REQUEST_LOG.record(method, url, route, elapsed, response)
+    if route is not None:
+        LATENCY.record(method, route, response.status_code, elapsed)
+    return response
+
+def transport_stats(since=None):
+    """
+    Returns request/connection counters for the shared transport, optionally as the
+    delta from an earlier snapshot. Every request that didn't open a connection reused one.
+    """
+    stats = TRANSPORT_STATS.snapshot()
+    if since:
+        stats = {key: stats[key] - since.get(key, 0) for key in stats}
+    stats["connections_reused"] = max(0, stats["requests"] - stats["connections_opened"])
+    stats["reuse_rate"] = stats["connections_reused"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
+
 def get_authenticated_session(username=DEV_USERNAME, company=DEV_COMPANY, verbose=False):
+    """
+    Returns an authenticated requests.Session for username/company, reusing an
+    idle one from SESSION_POOL when available. Pass the session back with
+    release_session() when done so it can be reused (or discarded if changed).
+    """
+    return SESSION_POOL.acquire(username, company, verbose)
+
+def login_via_api(username=DEV_USERNAME, company=DEV_COMPANY, verbose=False):
     """
     Logs in via dev-login endpoint and returns a requests.Session
     configured with the necessary cookies for authentication.
@@ -48,14 +308,13 @@ def get_authenticated_session(username=DEV_USERNAME, company=DEV_COMPANY, verbos
     dev_login_url = f"{BASE_API_URL}/sessions/dev-login?username={username}&company={company}"
     #printv(f"\n--- Attempting Dev Login for {username} (Company: {company}) ---", verbose, COLOR_SECONDARY) # Changed to secondary color
     try:
-        response = requests.get(dev_login_url, allow_redirects=False, verify=False)
+        session = new_session()
+        response = api_request(session, "GET", dev_login_url, route="/sessions/dev-login", allow_redirects=False)
         #printv(f"  > Dev Login Request: GET {dev_login_url}", verbose) # Added verbose detail
         #printv(f"  < Dev Login Status: {response.status_code}", verbose)
 
         if response.status_code in [302, 303, 307, 308]:
-            session = requests.Session()
-            session.cookies.update(response.cookies)
-            
+            # cookies from the redirect are already in the session's jar...
             access_token = session.cookies.get("access_token")
             if not access_token:
                 #printc("Warning: access_token not found in dev-login response cookies.", COLOR_WARN)
@@ -73,13 +332,126 @@ def get_authenticated_session(username=DEV_USERNAME, company=DEV_COMPANY, verbos
         #printc(f"Network error during dev login: {e}", COLOR_FAIL)
         raise
 
+# --- AUTHENTICATED SESSION POOL ---
+
+class SessionPool:
+    """
+    Hands out already-authenticated sessions keyed by (username, company) so tests
+    don't pay a dev-login round trip (and a new SESSIONS row) in every setUp.
+
+    Sessions are checked back in with release(); a session is only reused when its
+    cookies are exactly as they were at checkout (ie: read-only use). Sessions that
+    were logged out, had cookies rewritten (company rename, return, etc.) or have
+    aged past max_age are thrown away instead.
+    """
+
+    def __init__(self, max_age=600, max_idle_per_key=4):
+        self.max_age = max_age # access cookies live 15 mins, retire well before that...
+        self.max_idle_per_key = max_idle_per_key
+        self._idle = {}        # (username, company) -> [(session, created_at), ...]
+        self._checked_out = {} # id(session) -> (key, created_at, cookie fingerprint)
+        self._lock = threading.Lock()
+        self.logins = 0
+        self.reuses = 0
+
+    @staticmethod
+    def _fingerprint(session):
+        return tuple(sorted((cookie.name, cookie.value) for cookie in session.cookies))
+
+    def acquire(self, username=DEV_USERNAME, company=DEV_COMPANY, verbose=False):
+        """Returns an idle authenticated session for (username, company), logging in if none is available."""
+        key = (username, company)
+        now = time.monotonic()
+        session, stale = None, []
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, created_at = idle.pop()
+                if now - created_at < self.max_age:
+                    session = candidate
+                    self.reuses += 1
+                    break
+                stale.append(candidate)
+        # logouts are round trips, other threads shouldn't queue on the lock behind them...
+        for candidate in stale:
+            _discard_session(candidate)
+
+        if session is None:
+            session = login_via_api(username, company, verbose)
+            if session is None:
+                return None
+            created_at = now
+            with self._lock:
+                self.logins += 1
+
+        with self._lock:
+            self._checked_out[id(session)] = (key, created_at, self._fingerprint(session))
+        return session
+
+    def release(self, session, dirty=False):
+        """Checks a session back in, discarding it if it was logged out, changed or marked dirty."""
+        if session is None:
+            return
+        with self._lock:
+            checkout = self._checked_out.pop(id(session), None)
+        if checkout is None:
+            # not a pooled session, treat as a one-off...
+            _discard_session(session)
+            return
+
+        key, created_at, fingerprint = checkout
+        reusable = (
+            not dirty
+            and session.cookies.get("access_token")
+            and self._fingerprint(session) == fingerprint
+            and time.monotonic() - created_at < self.max_age
+        )
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_key:
+                    idle.append((session, created_at))
+                    return
+        _discard_session(session)
+
+    def close(self):
+        """Logs out every idle session held by the pool."""
+        with self._lock:
+            idle = [session for sessions in self._idle.values() for session, _ in sessions]
+            self._idle.clear()
+        for session in idle:
+            _discard_session(session)
+
+def _discard_session(session):
+    """
+    Logs out a session that is leaving the pool (silently, as in the original tearDowns),
+    so its SESSIONS row and cached token go with it. Only logout/{userId} exists on the
+    server, the id comes from /sessions/me.
+    """
+    try:
+        if session.cookies.get("access_token"):
+            me = api_request(session, "GET", f"{BASE_API_URL}/sessions/me", route="/sessions/me")
+            if me.status_code == 200:
+                url = f"{BASE_API_URL}/sessions/logout/{me.json()['userId']}"
+                api_request(session, "POST", url, route="/sessions/logout/{userId}", json={})
+    except requests.exceptions.RequestException:
+        pass
+    session.cookies.clear()
+
+SESSION_POOL = SessionPool()
+atexit.register(SESSION_POOL.close)
+
+def release_session(session, dirty=False):
+    """Returns a pooled session; it is discarded unless it was only used read-only."""
+    SESSION_POOL.release(session, dirty)
+
 def generate_unique_user_data(prefix="testuser"):
     """Generates unique user data for testing."""
-    unique_id = uuid.uuid4().hex[:8] # Short unique ID
+    suffix = unique_id() # Short unique ID
     return {
-        "Username": f"{prefix}_{unique_id}",
+        "Username": f"{prefix}_{suffix}",
         "Password": "TestPassword123!",
-        "Powerunit": f"{unique_id[:3]}", # Assuming 3 chars fit your DB
+        "Powerunit": f"{suffix[:3]}", # Assuming 3 chars fit your DB
         "ActiveCompany": "BRAUNS", # Default to DEV_COMPANY
         "Companies": ["BRAUNS", "NTS"], # Example list
         "Modules": ["admin", "deliverymanager"]
@@ -90,6 +462,42 @@ def logout_via_api(session, verbose=False):
     url = f"{BASE_API_URL}/sessions/logout"
     # Keeping cleanup silent in verbose mode too, as per original intention
     # printv(f"  > POST {url} - Logging out current session (cleanup)", verbose)
-    response = session.post(url, verify=False)
+    response = api_request(session, "POST", url, route="/sessions/logout")
     # printv(f"  < Status: {response.status_code} (cleanup)", verbose)
-    return response
\ No newline at end of file
+    return response
+
+# --- MAPPING COOKIES ---
+# company_mapping/module_mapping hold the full JSON mapping (Mappings:CookieFormat "json") or a
+# short "v1:<hash>" version of it ("ref") that GET /sessions/mappings resolves.
+
+MAPPING_VERSION_PREFIX = "v1:"
+_MAPPINGS_BY_VERSION = {} # versions are content hashes, so a resolved one never goes stale...
+
+def get_mappings_via_api(session, etag=None):
+    """Helper to call GET /v1/sessions/mappings, conditionally when an ETag is given."""
+    url = f"{BASE_API_URL}/sessions/mappings"
+    headers = {"If-None-Match": etag} if etag else None
+    return api_request(session, "GET", url, route="/sessions/mappings", headers=headers)
+
+def is_mapping_version(value):
+    return value is not None and urllib.parse.unquote(value).startswith(MAPPING_VERSION_PREFIX)
+
+def mapping_from_cookie(session, name):
+    """The dict behind a session's company_mapping/module_mapping cookie in either format, None without the cookie."""
+    raw = session.cookies.get(name)
+    if not raw:
+        return None
+    value = urllib.parse.unquote(raw)
+    if not value.startswith(MAPPING_VERSION_PREFIX):
+        return json.loads(value)
+    if value not in _MAPPINGS_BY_VERSION:
+        response = get_mappings_via_api(session)
+        if response.status_code != 200:
+            raise Exception(f"Could not resolve {name} version {value}: {response.status_code}")
+        body = response.json()
+        _MAPPINGS_BY_VERSION[body["companiesVersion"]] = body["companies"]
+        _MAPPINGS_BY_VERSION[body["modulesVersion"]] = body["modules"]
+        if value not in _MAPPINGS_BY_VERSION:
+            # renamed since this session's cookie was issued, the current mapping is all there is...
+            return body["companies" if name == "company_mapping" else "modules"]
+    return dict(_MAPPINGS_BY_VERSION[value])
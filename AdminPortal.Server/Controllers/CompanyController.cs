@@ -63,7 +63,7 @@ namespace AdminPortal.Server.Controllers
             {
                 // fetch company and module mappings...
                 IDictionary<string, string> companies = await _mappingService.GetCompaniesAsync();
-                Response.Cookies.Append("company_mapping", JsonSerializer.Serialize(companies), _cookieService.AccessOptions());
+                Response.Cookies.Append("company_mapping", _mappingService.ToCookieValue(companies), _cookieService.AccessOptions());
 
                 return Ok(new { message = message });
             }
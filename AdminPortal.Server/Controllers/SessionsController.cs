@@ -4,6 +4,7 @@ using AdminPortal.Server.Services.Interfaces;
 using Microsoft.AspNetCore.Authentication;
 using Microsoft.AspNetCore.Authorization;
 using Microsoft.AspNetCore.Mvc;
+using Microsoft.Net.Http.Headers;
 using System.IdentityModel.Tokens.Jwt;
 using System.Text.Json;
 
@@ -18,6 +19,8 @@ namespace AdminPortal.Server.Controllers
         private readonly ICookieService _cookieService;
         private readonly IMappingService _mappingService;
         private readonly ISessionService _sessionService;
+        private readonly ITokenCache _tokenCache;
+        private readonly ISessionSweeper _sessionSweeper;
         private readonly ILogger<SessionsController> _logger;
         private readonly IWebHostEnvironment _env;
 
@@ -27,6 +30,8 @@ namespace AdminPortal.Server.Controllers
             ICookieService cookieService, 
             IMappingService mappingService,
             ISessionService sessionService,
+            ITokenCache tokenCache,
+            ISessionSweeper sessionSweeper,
             ILogger<SessionsController> logger,
             IWebHostEnvironment env)
         {
@@ -35,6 +40,8 @@ namespace AdminPortal.Server.Controllers
             _cookieService = cookieService;
             _mappingService = mappingService;
             _sessionService = sessionService;
+            _tokenCache = tokenCache;
+            _sessionSweeper = sessionSweeper;
             _logger = logger;
             _env = env;
         }
@@ -81,8 +88,8 @@ namespace AdminPortal.Server.Controllers
             Response.Cookies.Append("access_token", access, _cookieService.AccessOptions());
             Response.Cookies.Append("refresh_token", refresh, _cookieService.RefreshOptions());
 
-            Response.Cookies.Append("company_mapping", JsonSerializer.Serialize(companies), _cookieService.AccessOptions());
-            Response.Cookies.Append("module_mapping", JsonSerializer.Serialize(modules), _cookieService.AccessOptions());
+            Response.Cookies.Append("company_mapping", _mappingService.ToCookieValue(companies), _cookieService.AccessOptions());
+            Response.Cookies.Append("module_mapping", _mappingService.ToCookieValue(modules), _cookieService.AccessOptions());
 
             return Redirect("https://localhost:5173/");
         }
@@ -141,15 +148,108 @@ namespace AdminPortal.Server.Controllers
                 Modules = user.Modules
             };
 
-            SessionModel? session = await _sessionService.GetSessionAsync(username, accessToken, refreshToken);
-            if (session != null)
+            long? sessionId = await FindSessionIdAsync(username, accessToken, refreshToken);
+            if (sessionId != null)
             {
-                return Ok(new { user = user, companies = companyMapping, modules = moduleMapping, userId = session.Id });
+                return Ok(new { user = user, companies = companyMapping, modules = moduleMapping, userId = sessionId });
             }
 
             return Unauthorized(new { message = "Session cookies are missing. Please log in again." });
         }
 
+        // full company + module mappings behind the mapping cookies, revalidated by ETag...
+        [HttpGet]
+        [Route("mappings")]
+        [Authorize]
+        public async Task<IActionResult> GetMappings()
+        {
+            IDictionary<string, string> companies = await _mappingService.GetCompaniesAsync();
+            IDictionary<string, string> modules = await _mappingService.GetModulesAsync();
+            string companiesVersion = _mappingService.Version(companies);
+            string modulesVersion = _mappingService.Version(modules);
+
+            // clients keep the mappings per version, so an unchanged pair costs a 304 and no body...
+            var etag = new EntityTagHeaderValue($"\"{companiesVersion.Substring(MappingService.RefPrefix.Length)}-{modulesVersion.Substring(MappingService.RefPrefix.Length)}\"");
+            Response.Headers.ETag = etag.ToString();
+            Response.Headers.CacheControl = "private, no-cache";
+
+            // If-None-Match may list several tags (or "*") and compares weakly, W/"x" matches "x"...
+            IList<EntityTagHeaderValue> ifNoneMatch = Request.GetTypedHeaders().IfNoneMatch;
+            if (ifNoneMatch.Any(tag => tag.Equals(EntityTagHeaderValue.Any) || tag.Compare(etag, useStrongComparison: false)))
+            {
+                return StatusCode(StatusCodes.Status304NotModified);
+            }
+
+            return Ok(new { companies = companies, modules = modules, companiesVersion = companiesVersion, modulesVersion = modulesVersion });
+        }
+
+        // HELPER: session ID for the token pair, from the token cache inside the token's lifetime...
+        private async Task<long?> FindSessionIdAsync(string username, string accessToken, string refreshToken)
+        {
+            if (_tokenCache.TryGet(accessToken, out CachedToken? cached) && cached!.Username == username)
+            {
+                return cached.SessionId;
+            }
+
+            long generation = _tokenCache.Generation;
+            SessionModel? session = await _sessionService.GetSessionAsync(username, accessToken, refreshToken);
+            if (session == null)
+            {
+                return null;
+            }
+
+            _tokenCache.Set(accessToken, session.Id, username, generation);
+            return session.Id;
+        }
+
+        // development only: token cache counters, and whether the caller's token is cached...
+        [HttpGet]
+        [Route("dev-token-cache")]
+        public IActionResult DevTokenCache()
+        {
+            if (!_env.IsDevelopment())
+            {
+                return NotFound("This endpoint is only available in the Development environment.");
+            }
+
+            TokenCacheStats stats = _tokenCache.Stats();
+            long lookups = stats.Hits + stats.Misses;
+            string? accessToken = Request.Cookies["access_token"];
+            return Ok(new
+            {
+                entries = stats.Entries,
+                hits = stats.Hits,
+                misses = stats.Misses,
+                evictions = stats.Evictions,
+                hitRate = lookups > 0 ? (double)stats.Hits / lookups : 0.0,
+                cached = !string.IsNullOrEmpty(accessToken) && _tokenCache.Contains(accessToken)
+            });
+        }
+
+        // development only: session sweeper counters and the current SESSIONS row count...
+        [HttpGet]
+        [Route("dev-sweeper")]
+        public async Task<IActionResult> DevSweeper()
+        {
+            if (!_env.IsDevelopment())
+            {
+                return NotFound("This endpoint is only available in the Development environment.");
+            }
+
+            SessionSweepStats stats = _sessionSweeper.Stats();
+            return Ok(new
+            {
+                sessions = await _sessionService.CountSessionsAsync(),
+                sweeps = stats.Sweeps,
+                batches = stats.Batches,
+                rowsSwept = stats.RowsSwept,
+                timeSpentMs = stats.TimeSpentMs,
+                budgetExhausted = stats.BudgetExhausted,
+                lastSwept = stats.LastSwept,
+                lastSweepUtc = stats.LastSweepUtc
+            });
+        }
+
         // terminates existing user session by scrubbing cookies...
         /*[HttpPost]
         [Route("logout")]
@@ -195,6 +295,9 @@ namespace AdminPortal.Server.Controllers
                 _logger.LogWarning($"Invalidate by session ID {userId}");
                 sessionCleared = await _sessionService.DeleteUserSessionByIdAsync(userId);
 
+                // revoke right away, not when the cached tokens expire...
+                _tokenCache.EvictSession(userId);
+
                 // stale session, clean expired sessions...
                 if (!sessionCleared)
                 {
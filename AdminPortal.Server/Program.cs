@@ -179,6 +179,17 @@ builder.Services.AddSwaggerGen();
 
 // var app = builder.Build();
 
+// company/module mappings are cached in memory across requests (see MappingService)...
+builder.Services.AddMemoryCache();
+
+// validated access tokens -> session IDs, shared by every request (see TokenCache)...
+builder.Services.AddSingleton<ITokenCache, TokenCache>();
+
+// deletes expired SESSIONS rows in the background, one instance serves the hosted loop and its counters...
+builder.Services.AddSingleton<SessionSweeper>();
+builder.Services.AddSingleton<ISessionSweeper>(sp => sp.GetRequiredService<SessionSweeper>());
+builder.Services.AddHostedService(sp => sp.GetRequiredService<SessionSweeper>());
+
 builder.Services.AddScoped<ICookieService, CookieService>();
 builder.Services.AddScoped<IMappingService, MappingService>();
 builder.Services.AddScoped<ITokenService, TokenService>();
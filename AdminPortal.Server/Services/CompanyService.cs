@@ -8,13 +8,16 @@ namespace AdminPortal.Server.Services
     public class CompanyService : ICompanyService
     {
         private readonly IConfiguration _config;
+        private readonly IMappingService _mappingService;
         private readonly ILogger<CompanyService> _logger;
         private readonly string _connString;
 
         public CompanyService(IConfiguration config,
+            IMappingService mappingService,
             ILogger<CompanyService> logger)
         {
             _config = config;
+            _mappingService = mappingService;
             _logger = logger;
             _connString = _config.GetConnectionString("TCS") ??
                 throw new InvalidOperationException("TCS connection string is not configured.");
@@ -140,6 +143,9 @@ namespace AdminPortal.Server.Services
                     if (rowsAffected > 0)
                     {
                         _logger.LogInformation($"Company '{companyKey}' successfully updated to '{newName}'.");
+
+                        // cached mappings still hold the old name, next read goes to records...
+                        _mappingService.InvalidateCompanies();
                         return (true, $"Company '{companyKey}' updated to '{newName}' successfully.");
                     }
                     else
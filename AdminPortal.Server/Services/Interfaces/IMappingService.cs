@@ -4,5 +4,12 @@
     {
         Task<IDictionary<string, string>> GetCompaniesAsync();
         Task<IDictionary<string, string>> GetModulesAsync();
+        void InvalidateCompanies();
+
+        // mapping cookie value, the full JSON or (Mappings:CookieFormat = "ref") its version...
+        string ToCookieValue(IDictionary<string, string> mapping);
+
+        // short content hash of a mapping, changes whenever a key or name does...
+        string Version(IDictionary<string, string> mapping);
     }
 }
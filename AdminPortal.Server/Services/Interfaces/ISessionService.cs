@@ -10,5 +10,7 @@ namespace AdminPortal.Server.Services.Interfaces
         Task<SessionModel?> GetSessionAsync(string username, string accessToken, string refreshToken);
         Task<bool> DeleteUserSessionByIdAsync(long sessionId);
         Task CleanupExpiredSessionsAsync(TimeSpan idleTimeout);
+        Task<IReadOnlyList<long>> DeleteExpiredSessionsBatchAsync(int batchSize, TimeSpan? idleTimeout);
+        Task<long> CountSessionsAsync();
     }
 }
@@ -0,0 +1,19 @@
+﻿namespace AdminPortal.Server.Services.Interfaces
+{
+    public interface ISessionSweeper
+    {
+        // counters since startup, for diagnostics...
+        SessionSweepStats Stats();
+    }
+
+    public sealed record SessionSweepStats
+    (
+        long Sweeps,
+        long Batches,
+        long RowsSwept,
+        double TimeSpentMs,
+        long BudgetExhausted,
+        int LastSwept,
+        DateTime? LastSweepUtc
+    );
+}
@@ -0,0 +1,37 @@
+﻿namespace AdminPortal.Server.Services.Interfaces
+{
+    public interface ITokenCache
+    {
+        // bumped by every eviction, read before a session lookup and handed back to Set...
+        long Generation { get; }
+
+        // cached session for an access token, counts as a hit or miss...
+        bool TryGet(string accessToken, out CachedToken? entry);
+
+        // true if the access token is cached, without touching the hit/miss counters...
+        bool Contains(string accessToken);
+
+        // caches a validated token until it nears expiry, unless an eviction happened since generation...
+        bool Set(string accessToken, long sessionId, string username, long generation);
+
+        // drops every cached token of a session (logout, token refresh)...
+        void EvictSession(long sessionId);
+
+        TokenCacheStats Stats();
+    }
+
+    // stored in record for immutability + pattern-matching convenience...
+    public sealed record CachedToken
+    (
+        long SessionId,
+        string Username
+    );
+
+    public sealed record TokenCacheStats
+    (
+        long Entries,
+        long Hits,
+        long Misses,
+        long Evictions
+    );
+}
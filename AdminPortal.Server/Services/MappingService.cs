@@ -1,16 +1,32 @@
 ﻿using AdminPortal.Server.Services.Interfaces;
+using Microsoft.Extensions.Caching.Memory;
 using System.Data.SqlClient;
+using System.Security.Cryptography;
+using System.Text.Json;
 
 namespace AdminPortal.Server.Services
 {
     public sealed class MappingService : IMappingService
     {
+        // format version of mapping references, bump it if Version() ever hashes differently...
+        public const string RefPrefix = "v1:";
+
         private readonly string? _connString;
+        private readonly IMemoryCache _cache;
+        private readonly TimeSpan _ttl;
+        private readonly bool _refCookies;
         private readonly ILogger<MappingService> _logger;
 
-        public MappingService(IConfiguration config, ILogger<MappingService> logger)
+        // shared by every scoped instance, the cache itself is a singleton...
+        private static readonly SemaphoreSlim _fillLock = new(1, 1);
+        private static long _generation;
+
+        public MappingService(IConfiguration config, IMemoryCache cache, ILogger<MappingService> logger)
         {
             _connString = config.GetConnectionString("TCS");
+            _cache = cache;
+            _ttl = TimeSpan.FromSeconds(config.GetValue("MappingCache:TtlSeconds", 300));
+            _refCookies = string.Equals(config["Mappings:CookieFormat"], "ref", StringComparison.OrdinalIgnoreCase);
             _logger = logger;
         }
 
@@ -23,12 +39,75 @@ namespace AdminPortal.Server.Services
                 _ => throw new ArgumentOutOfRangeException(nameof(table)),
             };
 
+        // HELPER: cache entry name per table...
+        private static string CacheKey(string table) => $"mappings:{table}";
+
         // fetch company and module mapping dictionaries...
-        public async Task<IDictionary<string, string>> GetCompaniesAsync() { return await ReadAsync("COMPANY"); }
-        public async Task<IDictionary<string, string>> GetModulesAsync() { return await ReadAsync("MODULE"); }
+        public async Task<IDictionary<string, string>> GetCompaniesAsync() { return await GetCachedAsync("COMPANY"); }
+        public async Task<IDictionary<string, string>> GetModulesAsync() { return await GetCachedAsync("MODULE"); }
+
+        // drop cached company names, called once a rename is committed...
+        public void InvalidateCompanies()
+        {
+            // fills already reading the old names must not cache them...
+            Interlocked.Increment(ref _generation);
+            _cache.Remove(CacheKey("COMPANY"));
+            _logger.LogInformation("Company mapping cache invalidated.");
+        }
+
+        // full JSON goes out on every request, a reference is resolved once through GET /sessions/mappings...
+        public string ToCookieValue(IDictionary<string, string> mapping) =>
+            _refCookies ? Version(mapping) : JsonSerializer.Serialize(mapping);
+
+        public string Version(IDictionary<string, string> mapping)
+        {
+            // ordinal key order, so equal mappings hash alike whatever order they were read in...
+            var ordered = new SortedDictionary<string, string>(mapping, StringComparer.Ordinal);
+            byte[] hash = SHA256.HashData(JsonSerializer.SerializeToUtf8Bytes(ordered));
+            return RefPrefix + Convert.ToHexString(hash, 0, 8).ToLowerInvariant();
+        }
+
+        // serve mappings from memory, reading records at most once per TTL (a TTL <= 0 disables caching)...
+        private async Task<IDictionary<string, string>> GetCachedAsync(string table)
+        {
+            if (_ttl <= TimeSpan.Zero)
+            {
+                return await ReadAsync(table);
+            }
+
+            string key = CacheKey(table);
+            if (_cache.TryGetValue(key, out Dictionary<string, string>? cached) && cached != null)
+            {
+                return new Dictionary<string, string>(cached, StringComparer.OrdinalIgnoreCase);
+            }
+
+            // one reader refills an expired entry, concurrent logins wait for it instead of all querying...
+            await _fillLock.WaitAsync();
+            try
+            {
+                if (_cache.TryGetValue(key, out cached) && cached != null)
+                {
+                    return new Dictionary<string, string>(cached, StringComparer.OrdinalIgnoreCase);
+                }
+
+                long generation = Interlocked.Read(ref _generation);
+                Dictionary<string, string> dict = await ReadAsync(table);
+                if (Interlocked.Read(ref _generation) == generation)
+                {
+                    _cache.Set(key, dict, _ttl);
+                }
+                _logger.LogDebug("Mapping cache filled for {Table} ({Count} entries).", table, dict.Count);
+
+                return new Dictionary<string, string>(dict, StringComparer.OrdinalIgnoreCase);
+            }
+            finally
+            {
+                _fillLock.Release();
+            }
+        }
 
         // read dictionary values from records...
-        private async Task<IDictionary<string, string>> ReadAsync(string table)
+        private async Task<Dictionary<string, string>> ReadAsync(string table)
         {
             await using var conn = new SqlConnection(_connString);
             await conn.OpenAsync();
@@ -58,4 +137,4 @@ namespace AdminPortal.Server.Services
             return dict;
         }
     }
-}
\ No newline at end of file
+}
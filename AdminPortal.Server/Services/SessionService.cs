@@ -5,17 +5,72 @@ using System.Data.SqlClient;
 
 namespace AdminPortal.Server.Services
 {
-    public class SessionService : ISessionService
+    public class SessionService : ISessionService, IDisposable, IAsyncDisposable
     {
         private readonly string? _connString;
         private readonly ILogger<SessionService> _logger;
 
+        // scoped service: one connection per request, shared by every session call in it...
+        private SqlConnection? _conn;
+
+        private const string SessionColumns = "ID, USERNAME, ACCESSTOKEN, REFRESHTOKEN, EXPIRYTIME, LOGINTIME, LASTACTIVITY, POWERUNIT, MFSTDATE";
+
+        // HELPER: "ID, USERNAME" -> "inserted.ID, inserted.USERNAME" for OUTPUT clauses...
+        private static string Inserted(string columns) =>
+            string.Join(", ", columns.Split(',').Select(c => $"inserted.{c.Trim()}"));
+
         public SessionService(IConfiguration config, ILogger<SessionService> logger)
         {
             _connString = config.GetConnectionString("TCS");
             _logger = logger;
         }
 
+        // HELPER: open the request's connection on first use, reopen it if a failure closed it...
+        private async Task<SqlConnection> GetConnectionAsync()
+        {
+            if (_conn != null && _conn.State == ConnectionState.Open)
+            {
+                return _conn;
+            }
+
+            _conn?.Dispose();
+            _conn = new SqlConnection(_connString);
+            await _conn.OpenAsync();
+            return _conn;
+        }
+
+        // HELPER: map the current reader row (SessionColumns or OUTPUT inserted.*) to a session...
+        private static SessionModel ReadSession(SqlDataReader reader)
+        {
+            return new SessionModel
+            {
+                Id = reader.GetInt64(reader.GetOrdinal("ID")),
+                Username = reader.GetString(reader.GetOrdinal("USERNAME")),
+                AccessToken = reader.GetString(reader.GetOrdinal("ACCESSTOKEN")),
+                RefreshToken = reader.GetString(reader.GetOrdinal("REFRESHTOKEN")),
+                ExpiryTime = reader.GetDateTime(reader.GetOrdinal("EXPIRYTIME")),
+                LoginTime = reader.GetDateTime(reader.GetOrdinal("LOGINTIME")),
+                LastActivity = reader.GetDateTime(reader.GetOrdinal("LASTACTIVITY")),
+                PowerUnit = reader.IsDBNull(reader.GetOrdinal("POWERUNIT")) ? null : reader.GetString(reader.GetOrdinal("POWERUNIT")),
+                MfstDate = reader.IsDBNull(reader.GetOrdinal("MFSTDATE")) ? null : reader.GetString(reader.GetOrdinal("MFSTDATE"))
+            };
+        }
+
+        public void Dispose()
+        {
+            _conn?.Dispose();
+            _conn = null;
+        }
+
+        public async ValueTask DisposeAsync()
+        {
+            if (_conn != null)
+            {
+                await _conn.DisposeAsync();
+                _conn = null;
+            }
+        }
+
         public async Task<SessionModel?> AddOrUpdateSessionAsync(
             long userId,
             string username,
@@ -27,20 +82,17 @@ namespace AdminPortal.Server.Services
         {
             try
             {
+                // the written row comes back in the same statement, no re-read...
                 string sql;
-                long userId_DB = userId;
-                using (var conn = new SqlConnection(_connString))
+                if (userId == 0)
                 {
-                    await conn.OpenAsync();
-                    if (userId == 0)
-                    {
-                        sql = @"INSERT INTO dbo.SESSIONS (USERNAME, ACCESSTOKEN, REFRESHTOKEN, EXPIRYTIME, LOGINTIME, LASTACTIVITY, POWERUNIT, MFSTDATE)
-                        VALUES (@USERNAME, @ACCESSTOKEN, @REFRESHTOKEN, @EXPIRYTIME, @LOGINTIME, @LASTACTIVITY, @POWERUNIT, @MFSTDATE);
-                        SELECT SCOPE_IDENTITY();";
-                    }
-                    else
-                    {
-                        sql = @"UPDATE dbo.SESSIONS SET 
+                    sql = $@"INSERT INTO dbo.SESSIONS (USERNAME, ACCESSTOKEN, REFRESHTOKEN, EXPIRYTIME, LOGINTIME, LASTACTIVITY, POWERUNIT, MFSTDATE)
+                        OUTPUT {Inserted(SessionColumns)}
+                        VALUES (@USERNAME, @ACCESSTOKEN, @REFRESHTOKEN, @EXPIRYTIME, @LOGINTIME, @LASTACTIVITY, @POWERUNIT, @MFSTDATE);";
+                }
+                else
+                {
+                    sql = $@"UPDATE dbo.SESSIONS SET 
                                 USERNAME = @USERNAME,
                                 ACCESSTOKEN = @ACCESSTOKEN,                             
                                 REFRESHTOKEN = @REFRESHTOKEN, 
@@ -48,44 +100,51 @@ namespace AdminPortal.Server.Services
                                 LASTACTIVITY = @LASTACTIVITY, 
                                 POWERUNIT = @POWERUNIT, 
                                 MFSTDATE = @MFSTDATE 
+                            OUTPUT {Inserted(SessionColumns)}
                             WHERE ID = @ID;";
+                }
+
+                var conn = await GetConnectionAsync();
+                using (var command = new SqlCommand(sql, conn))
+                {
+                    command.Parameters.AddWithValue("@USERNAME", username);
+                    command.Parameters.AddWithValue("@ACCESSTOKEN", accessToken);
+                    command.Parameters.AddWithValue("@REFRESHTOKEN", refreshToken);
+                    command.Parameters.AddWithValue("@EXPIRYTIME", expiryTime);
+                    command.Parameters.AddWithValue("@LASTACTIVITY", DateTime.UtcNow); // Always update last activity
+                    command.Parameters.Add("@POWERUNIT", SqlDbType.NVarChar, 50).Value = (object?)powerUnit ?? DBNull.Value;
+                    command.Parameters.Add("@MFSTDATE", SqlDbType.NVarChar, 8).Value = (object?)mfstDate ?? DBNull.Value;
+
+                    if (userId == 0)
+                    {
+                        command.Parameters.AddWithValue("@LOGINTIME", DateTime.UtcNow); // Set login time only for new sessions
+                    }
+                    else
+                    {
+                        command.Parameters.AddWithValue("@ID", userId); // Add ID parameter for update
                     }
 
-                    using (var command = new SqlCommand(sql, conn))
+                    using (var reader = await command.ExecuteReaderAsync())
                     {
-                        command.Parameters.AddWithValue("@USERNAME", username);
-                        command.Parameters.AddWithValue("@ACCESSTOKEN", accessToken);
-                        command.Parameters.AddWithValue("@REFRESHTOKEN", refreshToken);
-                        command.Parameters.AddWithValue("@EXPIRYTIME", expiryTime);
-                        command.Parameters.AddWithValue("@LASTACTIVITY", DateTime.UtcNow); // Always update last activity
-                        command.Parameters.Add("@POWERUNIT", SqlDbType.NVarChar, 50).Value = (object?)powerUnit ?? DBNull.Value;
-                        command.Parameters.Add("@MFSTDATE", SqlDbType.NVarChar, 8).Value = (object?)mfstDate ?? DBNull.Value;
+                        if (!await reader.ReadAsync())
+                        {
+                            _logger.LogWarning("Session ID {SessionId} not found for update for user {Username}.", userId, username);
+                            // If update failed (e.g., ID not found), you might want to consider it a failure.
+                            return null;
+                        }
 
+                        SessionModel session = ReadSession(reader);
                         if (userId == 0)
                         {
-                            command.Parameters.AddWithValue("@LOGINTIME", DateTime.UtcNow); // Set login time only for new sessions
-                            // ExecuteScalarAsync returns the first column of the first row (SCOPE_IDENTITY())
-                            userId_DB = Convert.ToInt64(await command.ExecuteScalarAsync());
-                            _logger.LogInformation("New session created for user {Username} with ID: {SessionId}", username, userId_DB);
+                            _logger.LogInformation("New session created for user {Username} with ID: {SessionId}", username, session.Id);
                         }
                         else
                         {
-                            command.Parameters.AddWithValue("@ID", userId); // Add ID parameter for update
-                            var rowsAffected = await command.ExecuteNonQueryAsync();
-                            if (rowsAffected > 0)
-                            {
-                                _logger.LogInformation("Session ID {SessionId} updated for user {Username}.", userId, username);
-                            }
-                            else
-                            {
-                                _logger.LogWarning("Session ID {SessionId} not found for update for user {Username}.", userId, username);
-                                // If update failed (e.g., ID not found), you might want to consider it a failure.
-                                return null;
-                            }
+                            _logger.LogInformation("Session ID {SessionId} updated for user {Username}.", userId, username);
                         }
+                        return session;
                     }
                 }
-                return await GetSessionByIdAsync(userId_DB);
             }
             catch (Exception ex)
             {
@@ -102,20 +161,17 @@ namespace AdminPortal.Server.Services
             }
             try
             {
-                using (var conn = new SqlConnection(_connString))
+                var conn = await GetConnectionAsync();
+                var sql = @"
+                    UPDATE dbo.SESSIONS
+                    SET LASTACTIVITY = @LASTACTIVITY
+                    WHERE ID = @ID";
+                using (var cmd = new SqlCommand(sql, conn))
                 {
-                    await conn.OpenAsync();
-                    var sql = @"
-                        UPDATE dbo.SESSIONS
-                        SET LASTACTIVITY = @LASTACTIVITY
-                        WHERE ID = @ID";
-                    using (var cmd = new SqlCommand(sql, conn))
-                    {
-                        cmd.Parameters.AddWithValue("@LASTACTIVITY", DateTime.UtcNow);
-                        cmd.Parameters.AddWithValue("@ID", sessionId);
-                        var rowsAffected = await cmd.ExecuteNonQueryAsync();
-                        return rowsAffected > 0;
-                    }
+                    cmd.Parameters.AddWithValue("@LASTACTIVITY", DateTime.UtcNow);
+                    cmd.Parameters.AddWithValue("@ID", sessionId);
+                    var rowsAffected = await cmd.ExecuteNonQueryAsync();
+                    return rowsAffected > 0;
                 }
             }
             catch (Exception ex)
@@ -133,34 +189,16 @@ namespace AdminPortal.Server.Services
             }
             try
             {
-                using (var conn = new SqlConnection(_connString))
+                var conn = await GetConnectionAsync();
+                var query = $@"
+                    SELECT {SessionColumns} 
+                    FROM dbo.SESSIONS WHERE ID = @ID";
+                using (var comm = new SqlCommand(query, conn))
                 {
-                    await conn.OpenAsync();
-                    var query = @"
-                        SELECT ID, USERNAME, ACCESSTOKEN, REFRESHTOKEN, EXPIRYTIME, LOGINTIME, LASTACTIVITY, POWERUNIT, MFSTDATE 
-                        FROM dbo.SESSIONS WHERE ID = @ID";
-                    using (var comm = new SqlCommand(query, conn))
+                    comm.Parameters.AddWithValue("@ID", userId);
+                    using (var reader = await comm.ExecuteReaderAsync())
                     {
-                        comm.Parameters.AddWithValue("@ID", userId);
-                        using (var reader = await comm.ExecuteReaderAsync())
-                        {
-                            if (await reader.ReadAsync())
-                            {
-                                return new SessionModel
-                                {
-                                    Id = reader.GetInt64(reader.GetOrdinal("ID")),
-                                    Username = reader.GetString(reader.GetOrdinal("USERNAME")),
-                                    AccessToken = reader.GetString(reader.GetOrdinal("ACCESSTOKEN")),
-                                    RefreshToken = reader.GetString(reader.GetOrdinal("REFRESHTOKEN")),
-                                    ExpiryTime = reader.GetDateTime(reader.GetOrdinal("EXPIRYTIME")),
-                                    LoginTime = reader.GetDateTime(reader.GetOrdinal("LOGINTIME")),
-                                    LastActivity = reader.GetDateTime(reader.GetOrdinal("LASTACTIVITY")),
-                                    PowerUnit = reader.IsDBNull(reader.GetOrdinal("POWERUNIT")) ? null : reader.GetString(reader.GetOrdinal("POWERUNIT")),
-                                    MfstDate = reader.IsDBNull(reader.GetOrdinal("MFSTDATE")) ? null : reader.GetString(reader.GetOrdinal("MFSTDATE"))
-                                };
-                            }
-                            return null;
-                        }
+                        return await reader.ReadAsync() ? ReadSession(reader) : null;
                     }
                 }
             }
@@ -175,40 +213,22 @@ namespace AdminPortal.Server.Services
         {
             try
             {
-                using (var conn = new SqlConnection(_connString))
+                var conn = await GetConnectionAsync();
+                var query = $@"
+                    SELECT {SessionColumns} 
+                    FROM dbo.SESSIONS WHERE USERNAME = @USERNAME 
+                        AND ACCESSTOKEN = @ACCESSTOKEN 
+                        AND REFRESHTOKEN = @REFRESHTOKEN";
+
+                using (var comm = new SqlCommand(query, conn))
                 {
-                    await conn.OpenAsync();
-                    var query = @"
-                        SELECT ID, USERNAME, ACCESSTOKEN, REFRESHTOKEN, EXPIRYTIME, LOGINTIME, LASTACTIVITY, POWERUNIT, MFSTDATE 
-                        FROM dbo.SESSIONS WHERE USERNAME = @USERNAME 
-                            AND ACCESSTOKEN = @ACCESSTOKEN 
-                            AND REFRESHTOKEN = @REFRESHTOKEN";
+                    comm.Parameters.AddWithValue("@USERNAME", username);
+                    comm.Parameters.AddWithValue("@ACCESSTOKEN", accessToken);
+                    comm.Parameters.AddWithValue("@REFRESHTOKEN", refreshToken);
 
-                    using (var comm = new SqlCommand(query, conn))
+                    using (var reader = await comm.ExecuteReaderAsync())
                     {
-                        comm.Parameters.AddWithValue("@USERNAME", username);
-                        comm.Parameters.AddWithValue("@ACCESSTOKEN", accessToken);
-                        comm.Parameters.AddWithValue("@REFRESHTOKEN", refreshToken);
-
-                        using (var reader = await comm.ExecuteReaderAsync())
-                        {
-                            if (await reader.ReadAsync())
-                            {
-                                return new SessionModel
-                                {
-                                    Id = reader.GetInt64(reader.GetOrdinal("ID")),
-                                    Username = reader.GetString(reader.GetOrdinal("USERNAME")),
-                                    AccessToken = reader.GetString(reader.GetOrdinal("ACCESSTOKEN")),
-                                    RefreshToken = reader.GetString(reader.GetOrdinal("REFRESHTOKEN")),
-                                    ExpiryTime = reader.GetDateTime(reader.GetOrdinal("EXPIRYTIME")),
-                                    LoginTime = reader.GetDateTime(reader.GetOrdinal("LOGINTIME")),
-                                    LastActivity = reader.GetDateTime(reader.GetOrdinal("LASTACTIVITY")),
-                                    PowerUnit = reader.IsDBNull(reader.GetOrdinal("POWERUNIT")) ? null : reader.GetString(reader.GetOrdinal("POWERUNIT")),
-                                    MfstDate = reader.IsDBNull(reader.GetOrdinal("MFSTDATE")) ? null : reader.GetString(reader.GetOrdinal("MFSTDATE"))
-                                };
-                            }
-                            return null;
-                        }
+                        return await reader.ReadAsync() ? ReadSession(reader) : null;
                     }
                 }
             }
@@ -223,16 +243,13 @@ namespace AdminPortal.Server.Services
         {
             try
             {
-                using (var connection = new SqlConnection(_connString))
+                var connection = await GetConnectionAsync();
+                var sql = "DELETE FROM dbo.SESSIONS WHERE ID = @ID";
+                using (var command = new SqlCommand(sql, connection))
                 {
-                    await connection.OpenAsync();
-                    var sql = "DELETE FROM dbo.SESSIONS WHERE ID = @ID";
-                    using (var command = new SqlCommand(sql, connection))
-                    {
-                        command.Parameters.AddWithValue("@ID", sessionId);
-                        var rowsAffected = await command.ExecuteNonQueryAsync();
-                        return rowsAffected > 0;
-                    }
+                    command.Parameters.AddWithValue("@ID", sessionId);
+                    var rowsAffected = await command.ExecuteNonQueryAsync();
+                    return rowsAffected > 0;
                 }
             }
             catch (Exception ex)
@@ -246,27 +263,78 @@ namespace AdminPortal.Server.Services
         {
             try
             {
-                using (var connection = new SqlConnection(_connString))
+                var connection = await GetConnectionAsync();
+                var now = DateTime.UtcNow;
+                var idleThreshold = now.Subtract(idleTimeout);
+                var sql = @"
+                    DELETE FROM dbo.SESSIONS WHERE EXPIRYTIME <= @CURRTIME
+                    OR (LASTACTIVITY <= @CURRTIME AND LASTACTIVITY < @IDLETHRESHOLD)        
+                ";
+                using (var command = new SqlCommand(sql, connection))
                 {
-                    await connection.OpenAsync();
-                    var now = DateTime.UtcNow;
-                    var idleThreshold = now.Subtract(idleTimeout);
-                    var sql = @"
-                        DELETE FROM dbo.SESSIONS WHERE EXPIRYTIME <= @CURRTIME
-                        OR (LASTACTIVITY <= @CURRTIME AND LASTACTIVITY < @IDLETHRESHOLD)        
-                    ";
-                    using (var command = new SqlCommand(sql, connection))
+                    command.Parameters.AddWithValue("@CURRTIME", DateTime.UtcNow);
+                    command.Parameters.AddWithValue("@IDLETHRESHOLD", idleThreshold);
+                    var rowsAffected = await command.ExecuteNonQueryAsync();
+                    _logger.LogInformation("Cleaned up {RowsAffected} expired sessions.", rowsAffected);
+                }
+            }
+            catch (Exception ex)
+            {
+                _logger.LogError(ex, "Error during expired session cleanup. Error: {Message}", ex.Message);
+            }
+        }
+
+        // delete up to batchSize expired (or idle) sessions, skipping rows live requests hold locks on (READPAST), and return their IDs so cached tokens can be evicted...
+        public async Task<IReadOnlyList<long>> DeleteExpiredSessionsBatchAsync(int batchSize, TimeSpan? idleTimeout)
+        {
+            var deleted = new List<long>();
+            try
+            {
+                var connection = await GetConnectionAsync();
+                var now = DateTime.UtcNow;
+                var sql = @"
+                    DELETE TOP (@BATCH) FROM dbo.SESSIONS WITH (ROWLOCK, READPAST)
+                    OUTPUT deleted.ID
+                    WHERE EXPIRYTIME <= @CURRTIME
+                    OR (@IDLETHRESHOLD IS NOT NULL AND LASTACTIVITY < @IDLETHRESHOLD)
+                ";
+                using (var command = new SqlCommand(sql, connection))
+                {
+                    command.Parameters.AddWithValue("@BATCH", batchSize);
+                    command.Parameters.AddWithValue("@CURRTIME", now);
+                    command.Parameters.Add("@IDLETHRESHOLD", SqlDbType.DateTime).Value =
+                        idleTimeout.HasValue ? now.Subtract(idleTimeout.Value) : (object)DBNull.Value;
+                    using (var reader = await command.ExecuteReaderAsync())
                     {
-                        command.Parameters.AddWithValue("@CURRTIME", DateTime.UtcNow);
-                        command.Parameters.AddWithValue("@IDLETHRESHOLD", idleThreshold);
-                        var rowsAffected = await command.ExecuteNonQueryAsync();
-                        _logger.LogInformation("Cleaned up {RowsAffected} expired sessions.", rowsAffected);
+                        while (await reader.ReadAsync())
+                        {
+                            deleted.Add(reader.GetInt64(0));
+                        }
                     }
                 }
+                return deleted;
             }
             catch (Exception ex)
             {
-                _logger.LogError(ex, "Error during expired session cleanup. Error: {Message}", ex.Message);
+                _logger.LogError(ex, "Error deleting a batch of expired sessions. Error: {Message}", ex.Message);
+                return deleted;
+            }
+        }
+
+        public async Task<long> CountSessionsAsync()
+        {
+            try
+            {
+                var connection = await GetConnectionAsync();
+                using (var command = new SqlCommand("SELECT COUNT_BIG(*) FROM dbo.SESSIONS", connection))
+                {
+                    return Convert.ToInt64(await command.ExecuteScalarAsync());
+                }
+            }
+            catch (Exception ex)
+            {
+                _logger.LogError(ex, "Failed to count sessions. Error: {Message}", ex.Message);
+                return -1;
             }
         }
     }
@@ -0,0 +1,145 @@
+﻿using AdminPortal.Server.Services.Interfaces;
+using System.Diagnostics;
+
+namespace AdminPortal.Server.Services
+{
+    /* Expired Session Sweeper
+     *  deletes SESSIONS rows past their EXPIRYTIME (and, when SessionSweeper:IdleMinutes is
+     *  set, rows idle that long) every interval, in small batches with a pause in between,
+     *  until a batch comes back short or the sweep's time budget is spent. the rest waits
+     *  for the next sweep, so live session traffic never queues behind one long delete.
+     *  swept rows are evicted from the token cache like a logout, idle rows still hold
+     *  valid access tokens...
+     */
+    public sealed class SessionSweeper : BackgroundService, ISessionSweeper
+    {
+        private readonly IServiceScopeFactory _scopes;
+        private readonly ITokenCache _tokenCache;
+        private readonly ILogger<SessionSweeper> _logger;
+
+        private readonly TimeSpan _interval;
+        private readonly TimeSpan _budget;
+        private readonly TimeSpan _pause;
+        private readonly int _batchSize;
+        private readonly TimeSpan? _idleTimeout;
+
+        private long _sweeps;
+        private long _batches;
+        private long _rowsSwept;
+        private long _ticksSpent;
+        private long _budgetExhausted;
+        private int _lastSwept;
+        private long _lastSweepTicks;
+
+        public SessionSweeper(IConfiguration config, IServiceScopeFactory scopes, ITokenCache tokenCache, ILogger<SessionSweeper> logger)
+        {
+            _scopes = scopes;
+            _tokenCache = tokenCache;
+            _logger = logger;
+
+            var section = config.GetSection("SessionSweeper");
+            _interval = TimeSpan.FromSeconds(section.GetValue("IntervalSeconds", 60.0));
+            _budget = TimeSpan.FromMilliseconds(section.GetValue("BudgetMs", 2000.0));
+            _pause = TimeSpan.FromMilliseconds(section.GetValue("PauseMs", 50.0));
+            _batchSize = Math.Max(1, section.GetValue("BatchSize", 500));
+            double idleMinutes = section.GetValue("IdleMinutes", 0.0);
+            _idleTimeout = idleMinutes > 0 ? TimeSpan.FromMinutes(idleMinutes) : null;
+        }
+
+        protected override async Task ExecuteAsync(CancellationToken stoppingToken)
+        {
+            if (_interval <= TimeSpan.Zero)
+            {
+                _logger.LogInformation("Session sweeper disabled (SessionSweeper:IntervalSeconds <= 0).");
+                return;
+            }
+
+            using var timer = new PeriodicTimer(_interval);
+            try
+            {
+                do
+                {
+                    try
+                    {
+                        await SweepAsync(stoppingToken);
+                    }
+                    catch (Exception ex) when (ex is not OperationCanceledException)
+                    {
+                        _logger.LogError(ex, "Session sweep failed. Error: {Message}", ex.Message);
+                    }
+                }
+                while (await timer.WaitForNextTickAsync(stoppingToken));
+            }
+            catch (OperationCanceledException)
+            {
+                // host shutting down...
+            }
+        }
+
+        // one sweep: batches until a short batch or the budget runs out...
+        private async Task SweepAsync(CancellationToken stoppingToken)
+        {
+            var clock = Stopwatch.StartNew();
+            int swept = 0;
+            bool exhausted = false;
+
+            using (var scope = _scopes.CreateScope())
+            {
+                var sessions = scope.ServiceProvider.GetRequiredService<ISessionService>();
+                while (true)
+                {
+                    IReadOnlyList<long> deleted = await sessions.DeleteExpiredSessionsBatchAsync(_batchSize, _idleTimeout);
+                    foreach (long sessionId in deleted)
+                    {
+                        _tokenCache.EvictSession(sessionId);
+                    }
+
+                    int rows = deleted.Count;
+                    Interlocked.Increment(ref _batches);
+                    swept += rows;
+
+                    if (rows < _batchSize)
+                    {
+                        break;
+                    }
+                    if (clock.Elapsed >= _budget)
+                    {
+                        exhausted = true;
+                        break;
+                    }
+                    await Task.Delay(_pause, stoppingToken);
+                }
+            }
+
+            clock.Stop();
+            Interlocked.Increment(ref _sweeps);
+            Interlocked.Add(ref _rowsSwept, swept);
+            Interlocked.Add(ref _ticksSpent, clock.Elapsed.Ticks);
+            Interlocked.Exchange(ref _lastSwept, swept);
+            Interlocked.Exchange(ref _lastSweepTicks, DateTime.UtcNow.Ticks);
+
+            if (exhausted)
+            {
+                Interlocked.Increment(ref _budgetExhausted);
+                _logger.LogWarning("Session sweep hit its {BudgetMs} ms budget after {Rows} rows, the rest waits for the next sweep.", _budget.TotalMilliseconds, swept);
+            }
+            else if (swept > 0)
+            {
+                _logger.LogInformation("Session sweep removed {Rows} expired sessions in {ElapsedMs} ms.", swept, clock.ElapsedMilliseconds);
+            }
+        }
+
+        public SessionSweepStats Stats()
+        {
+            long lastTicks = Interlocked.Read(ref _lastSweepTicks);
+            return new(
+                Interlocked.Read(ref _sweeps),
+                Interlocked.Read(ref _batches),
+                Interlocked.Read(ref _rowsSwept),
+                TimeSpan.FromTicks(Interlocked.Read(ref _ticksSpent)).TotalMilliseconds,
+                Interlocked.Read(ref _budgetExhausted),
+                Volatile.Read(ref _lastSwept),
+                lastTicks > 0 ? new DateTime(lastTicks, DateTimeKind.Utc) : null);
+        }
+    }
+}
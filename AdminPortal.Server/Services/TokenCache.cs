@@ -0,0 +1,149 @@
+﻿using AdminPortal.Server.Services.Interfaces;
+using Microsoft.Extensions.Caching.Memory;
+using System.IdentityModel.Tokens.Jwt;
+using System.Security.Cryptography;
+using System.Text;
+
+namespace AdminPortal.Server.Services
+{
+    /* Validated Token Cache
+     *  remembers which session an access token belongs to, keyed by the token's SHA-256,
+     *  so repeat requests inside one token lifetime skip the SESSIONS lookup. entries stop
+     *  being served once the token enters its refresh window, and logout evicts them...
+     */
+    public sealed class TokenCache : ITokenCache, IDisposable
+    {
+        // matches the "expiring soon" window in TokenService.ValidateTokens...
+        public static readonly TimeSpan RefreshWindow = TimeSpan.FromMinutes(5);
+
+        private readonly MemoryCache _cache;
+        private readonly JwtSecurityTokenHandler _handler = new();
+        private readonly ILogger<TokenCache> _logger;
+
+        // session ID -> cached token keys, so logout can find them...
+        private readonly Dictionary<long, HashSet<string>> _index = new();
+        private readonly object _lock = new();
+        private long _generation;
+
+        private long _hits;
+        private long _misses;
+        private long _evictions;
+
+        public TokenCache(IConfiguration config, ILogger<TokenCache> logger)
+        {
+            _cache = new MemoryCache(new MemoryCacheOptions
+            {
+                SizeLimit = config.GetValue("TokenCache:MaxEntries", 10000)
+            });
+            _logger = logger;
+        }
+
+        // HELPER: never keep raw tokens as keys...
+        private static string Key(string accessToken) =>
+            Convert.ToHexString(SHA256.HashData(Encoding.UTF8.GetBytes(accessToken)));
+
+        public long Generation => Interlocked.Read(ref _generation);
+
+        public bool TryGet(string accessToken, out CachedToken? entry)
+        {
+            if (_cache.TryGetValue(Key(accessToken), out entry) && entry != null)
+            {
+                Interlocked.Increment(ref _hits);
+                return true;
+            }
+
+            Interlocked.Increment(ref _misses);
+            return false;
+        }
+
+        public bool Contains(string accessToken) => _cache.TryGetValue(Key(accessToken), out _);
+
+        public bool Set(string accessToken, long sessionId, string username, long generation)
+        {
+            DateTime expires;
+            try
+            {
+                expires = _handler.ReadJwtToken(accessToken).ValidTo - RefreshWindow;
+            }
+            catch (Exception ex)
+            {
+                _logger.LogWarning(ex, "Token for session {SessionId} could not be read, not cached.", sessionId);
+                return false;
+            }
+            if (expires <= DateTime.UtcNow)
+            {
+                return false;
+            }
+
+            string key = Key(accessToken);
+            lock (_lock)
+            {
+                // a logout since the caller's lookup began may have deleted the row it read...
+                if (_generation != generation)
+                {
+                    return false;
+                }
+
+                var options = new MemoryCacheEntryOptions
+                {
+                    AbsoluteExpiration = new DateTimeOffset(expires, TimeSpan.Zero),
+                    Size = 1
+                };
+                options.RegisterPostEvictionCallback(OnEvicted, sessionId);
+                _cache.Set(key, new CachedToken(sessionId, username), options);
+
+                if (!_index.TryGetValue(sessionId, out HashSet<string>? keys))
+                {
+                    keys = new HashSet<string>();
+                    _index[sessionId] = keys;
+                }
+                keys.Add(key);
+            }
+            return true;
+        }
+
+        public void EvictSession(long sessionId)
+        {
+            lock (_lock)
+            {
+                Interlocked.Increment(ref _generation);
+                if (!_index.Remove(sessionId, out HashSet<string>? keys))
+                {
+                    return;
+                }
+                foreach (string key in keys)
+                {
+                    _cache.Remove(key);
+                }
+                Interlocked.Add(ref _evictions, keys.Count);
+            }
+            _logger.LogDebug("Cached tokens evicted for session {SessionId}.", sessionId);
+        }
+
+        // expired, compacted or removed: drop the key from its session's index...
+        private void OnEvicted(object key, object? value, EvictionReason reason, object? state)
+        {
+            if (reason == EvictionReason.Replaced || state is not long sessionId)
+            {
+                return;
+            }
+
+            lock (_lock)
+            {
+                if (_index.TryGetValue(sessionId, out HashSet<string>? keys) && !_cache.TryGetValue(key, out _))
+                {
+                    keys.Remove((string)key);
+                    if (keys.Count == 0)
+                    {
+                        _index.Remove(sessionId);
+                    }
+                }
+            }
+        }
+
+        public TokenCacheStats Stats() =>
+            new(_cache.Count, Interlocked.Read(ref _hits), Interlocked.Read(ref _misses), Interlocked.Read(ref _evictions));
+
+        public void Dispose() => _cache.Dispose();
+    }
+}
@@ -13,16 +13,19 @@ namespace AdminPortal.Server.Services
         private readonly ILogger<TokenService> _logger;
         private readonly ICookieService _cookieService;
         private readonly ISessionService _sessionService;
+        private readonly ITokenCache _tokenCache;
         public TokenService(
             IConfiguration config, 
             ILogger<TokenService> logger, 
             ICookieService cookieService,
-            ISessionService sessionService)
+            ISessionService sessionService,
+            ITokenCache tokenCache)
         {
             _config = config;
             _logger = logger;
             _cookieService = cookieService;
             _sessionService = sessionService;
+            _tokenCache = tokenCache;
         }
 
         /* Token Generation
@@ -76,6 +79,12 @@ namespace AdminPortal.Server.Services
             var generatedAccess = _handler.WriteToken(access);
             var generatedRefresh = _handler.WriteToken(refresh);
 
+            // the session's previous tokens no longer match its row...
+            if (sessionId != 0)
+            {
+                _tokenCache.EvictSession(sessionId);
+            }
+
             try
             {
                 await _sessionService.AddOrUpdateSessionAsync(
@@ -141,7 +150,7 @@ namespace AdminPortal.Server.Services
 
                 // token is still valid + not expiring soon...
                 var exp = DateTimeOffset.FromUnixTimeSeconds(((JwtSecurityToken)validatedAccess).Payload.Expiration!.Value);
-                if (exp - DateTimeOffset.UtcNow > TimeSpan.FromMinutes(5))
+                if (exp - DateTimeOffset.UtcNow > TokenCache.RefreshWindow)
                 {
                     _logger.LogInformation("Access token is valid and not expiring soon for user: {Username}", username);
                     return new(true, Principal: principal);
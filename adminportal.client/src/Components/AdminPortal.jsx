@@ -21,7 +21,7 @@ import LoadingSpinner from './LoadingSpinner';
 
 import { updateUserInDB, removeUserFromDB, addUserToDB, fetchUserFromDB } from '../utils/api/users';
 import { updateCompanyInDB } from '../utils/api/companies';
-import { validateSession } from '../utils/api/sessions';
+import { validateSession, resolveMappings } from '../utils/api/sessions';
 
 import { useAppContext } from '../hooks/useAppContext.js';
 
@@ -160,11 +160,17 @@ const AdminPortal = () => {
             const username = data.user.Username;
             const userId = data.userId;
 
-            const company_map = JSON.parse(data.companies);
-            sessionStorage.setItem("companies_map", data.companies);
+            const mappings = await resolveMappings(API_URL, data.companies, data.modules);
+            if (!mappings) {
+                setLoading(false);
+                return;
+            }
+
+            const company_map = JSON.parse(mappings.companies);
+            sessionStorage.setItem("companies_map", mappings.companies);
             setCompanies(company_map);
-            const module_map = JSON.parse(data.modules);
-            sessionStorage.setItem("modules_map", data.modules);
+            const module_map = JSON.parse(mappings.modules);
+            sessionStorage.setItem("modules_map", mappings.modules);
             setModules(module_map);
 
             const company_name = company_map[data.user.ActiveCompany];
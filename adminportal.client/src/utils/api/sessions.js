@@ -24,6 +24,36 @@ export async function validateSession(url) {
     return response;
 }
 
+// /me echoes the mapping cookies: full JSON, or "v1:<hash>" versions fetched here once per version...
+export async function resolveMappings(url, companies, modules) {
+    const isVersion = (value) => typeof value === "string" && value.startsWith("v1:");
+    if (!isVersion(companies) && !isVersion(modules)) {
+        return { companies: companies, modules: modules };
+    }
+
+    if (sessionStorage.getItem("companies_version") === companies && sessionStorage.getItem("modules_version") === modules) {
+        return { companies: sessionStorage.getItem("companies_map"), modules: sessionStorage.getItem("modules_map") };
+    }
+
+    const response = await fetch(url + "v1/sessions/mappings", {
+        method: "GET",
+        headers: {
+            'Content-Type': 'application/json; charset=UTF-8'
+        },
+        credentials: 'include'
+    });
+
+    if (!response.ok) {
+        console.error(`Mapping fetch failed, Status: ${response.status} ${response.statusText}`);
+        return null;
+    }
+
+    const data = await response.json();
+    sessionStorage.setItem("companies_version", data.companiesVersion);
+    sessionStorage.setItem("modules_version", data.modulesVersion);
+    return { companies: JSON.stringify(data.companies), modules: JSON.stringify(data.modules) };
+}
+
 const goBackOneDirectory = () => {
     const currPath = window.location.pathname;
     if (currPath === '/' || currPath ==='') {